@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 학습 배치를 미리 전부 만들어 두지 않고, DataLoader worker 프로세스에서 필요할 때 만들어 줍니다
+# iteration번째 배치는 (seed, iteration)만으로 결정되므로 checkpoint['iteration']부터 다시 시작해도
+# 처음부터 학습했을 때와 같은 배치를 보게 됩니다
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+
+class RandomBatchPlan:
+    # iteration -> pairs 인덱스 리스트 (random.choice(pairs)를 batch_size번 뽑는 것과 같은 분포)
+    def __init__(self, n_pairs, batch_size, seed=0):
+        self.n_pairs = n_pairs
+        self.batch_size = batch_size
+        self.seed = seed
+
+    def __call__(self, iteration):
+        rng = np.random.default_rng([self.seed, iteration])
+        return rng.integers(0, self.n_pairs, size=self.batch_size).tolist()
+
+
+class TrainBatchDataset(Dataset):
+    # dataset[iteration] = collate(plan(iteration))
+    def __init__(self, collate, plan):
+        self.collate = collate
+        self.plan = plan
+
+    def __getitem__(self, iteration):
+        return self.collate(self.plan(iteration))
+
+
+def trainBatchLoader(dataset, start_iteration, n_iteration, num_workers=2, prefetch_factor=4):
+    # sampler가 iteration 번호를 순서대로 넘겨주고, 각 worker는 최대 prefetch_factor개의 배치만 미리 만들어 둡니다
+    kwargs = {}
+    if num_workers > 0:
+        kwargs['prefetch_factor'] = prefetch_factor
+    return DataLoader(dataset, batch_size=None, sampler=range(start_iteration, n_iteration + 1),
+                      num_workers=num_workers, **kwargs)
+
+
+class BucketBatchPlan:
+    # 질문/응답 WordPiece 길이가 비슷한 쌍끼리 묶어 zeroPadding의 패딩 토큰을 줄입니다
+    # epoch마다 (seed, epoch)로 섞은 뒤 (질문 길이, 응답 길이) 버킷 순서로 정렬하고 잘라서 배치를 만들고,
+    # 배치 순서를 다시 섞어서 버킷 사이의 무작위성은 유지합니다
+    # max_tokens가 주어지면 배치 크기를 바꿔 가며 배치당 (패딩 포함) 토큰 수를 max_tokens 이하로 맞춥니다
+    def __init__(self, input_lengths, target_lengths, batch_size, seed=0, max_tokens=None, bucket_width=1):
+        self.input_lengths = np.asarray(input_lengths, dtype=np.int64)
+        self.target_lengths = np.asarray(target_lengths, dtype=np.int64)
+        self.batch_size = batch_size
+        self.seed = seed
+        self.max_tokens = max_tokens
+        self.bucket_width = bucket_width
+        self.bucket_key = ((self.input_lengths // bucket_width) * (self.target_lengths.max() // bucket_width + 1)
+                           + self.target_lengths // bucket_width)
+        self.epoch_starts = [1] # epoch_starts[e] : e번째 epoch의 첫 iteration 번호
+        self.epoch = None
+        self.batches = None
+
+    def epochBatches(self, epoch):
+        rng = np.random.default_rng([self.seed, epoch])
+        order = rng.permutation(len(self.bucket_key))
+        order = order[np.argsort(self.bucket_key[order], kind='stable')]
+        if self.max_tokens is None:
+            batches = [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+        else:
+            batches = self.tokenBudgetBatches(order)
+        return [batches[i] for i in rng.permutation(len(batches))]
+
+    def tokenBudgetBatches(self, order):
+        batches = []
+        start = 0
+        max_in = max_tgt = 0
+        for i, idx in enumerate(order):
+            new_in = max(max_in, self.input_lengths[idx])
+            new_tgt = max(max_tgt, self.target_lengths[idx])
+            size = i - start + 1
+            if i > start and ((new_in + new_tgt) * size > self.max_tokens or
+                              (self.batch_size and size > self.batch_size)):
+                batches.append(order[start:i])
+                start = i
+                new_in, new_tgt = self.input_lengths[idx], self.target_lengths[idx]
+            max_in, max_tgt = new_in, new_tgt
+        if start < len(order):
+            batches.append(order[start:])
+        return batches
+
+    def __call__(self, iteration):
+        # iteration이 속한 epoch까지 배치 목록을 차례로 만들어 봅니다 (각 epoch의 배치 수는 seed로 결정)
+        epoch = 0 if self.epoch is None or iteration < self.epoch_starts[self.epoch] else self.epoch
+        while True:
+            if epoch != self.epoch:
+                self.epoch, self.batches = epoch, self.epochBatches(epoch)
+                if len(self.epoch_starts) == epoch + 1:
+                    self.epoch_starts.append(self.epoch_starts[epoch] + len(self.batches))
+            if iteration < self.epoch_starts[epoch + 1]:
+                return self.batches[iteration - self.epoch_starts[epoch]].tolist()
+            epoch += 1
+
+
+def paddingRatio(lengths_batches):
+    # lengths_batches : 배치별 길이 배열들, 반환값 : 패딩 토큰 / 전체(패딩 포함) 토큰
+    real = sum(int(l.sum()) for l in lengths_batches)
+    padded = sum(int(l.max()) * len(l) for l in lengths_batches)
+    return 1 - real / padded
+
+
+class PairCollator:
+    # 저장소의 id 배열에서 바로 패딩된 [max_len, batch] 텐서, 길이, bool mask를 만듭니다
+    # 토큰 하나하나에 대한 파이썬 반복문 없이 위치(arange) 버퍼와 gather 한 번으로 처리합니다
+    # 반환값은 batch2TrainData와 같습니다 : inp, lengths, output, mask, max_target_len
+    # id_map이 주어지면 저장소의 BERT id를 압축 id로 바꿉니다 (Voc.id_map)
+    def __init__(self, store, pad_token=0, id_map=None):
+        self.store = store
+        self.pad_token = pad_token
+        self.id_map = id_map
+        max_len = max(int(store.inputLengths().max(initial=0)), int(store.targetLengths().max(initial=0)), 1)
+        self.positions = np.arange(max_len, dtype=np.int64)[:, None] # [max_len, 1]
+
+    def padIds(self, ids, offsets, index):
+        starts = offsets[index]
+        lengths = offsets[index + 1] - starts
+        max_len = int(lengths.max())
+        positions = self.positions[:max_len]
+        mask = positions < lengths[None, :] # [max_len, batch]
+        gather = np.where(mask, starts[None, :] + positions, 0)
+        values = ids[gather] if self.id_map is None else self.id_map[ids[gather]]
+        padVar = torch.empty((max_len, len(index)), dtype=torch.long)
+        if self.pad_token == 0:
+            np.multiply(values, mask, out=padVar.numpy())
+        else:
+            np.copyto(padVar.numpy(), np.where(mask, values, self.pad_token))
+        return padVar, torch.from_numpy(lengths), torch.from_numpy(mask), max_len
+
+    def __call__(self, index_batch):
+        index = np.asarray(index_batch, dtype=np.int64)
+        # 질문 길이 내림차순 정렬 (pack_padded_sequence 조건), 길이가 같으면 원래 순서 유지
+        input_lengths = self.store.input_offsets[index + 1] - self.store.input_offsets[index]
+        index = index[np.argsort(-input_lengths, kind='stable')]
+        inp, lengths, _, _ = self.padIds(self.store.input_ids, self.store.input_offsets, index)
+        output, _, mask, max_target_len = self.padIds(self.store.target_ids, self.store.target_offsets, index)
+        return inp, lengths, output, mask, max_target_len
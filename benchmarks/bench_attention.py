@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 디코더 한 단계당 attention 비용 : 이전 방식(단계마다 인코더 쪽 Linear/cat 다시 계산) vs Attn.precompute
+#   python -m benchmarks.bench_attention --hidden_sizes 768 1024 --batch_size 64
+# precompute 비용은 문장 하나(디코더 --steps 단계)에 한 번이므로 단계 수로 나눠서 더합니다
+# 먼저 패딩이 없는 입력에서 두 방식의 가중치가 같은지 확인합니다
+
+import argparse
+import time
+
+import torch
+import torch.nn.functional as F
+
+from seq2seq import Attn
+
+
+def previousAttn(attn, hidden, encoder_outputs):
+    # precompute 이전의 Attn.forward (hidden : [1, batch_size, hidden_size] -> [batch_size, 1, max_length])
+    if attn.method == 'general':
+        attn_energies = torch.sum(hidden * attn.attn(encoder_outputs), dim=2)
+    elif attn.method == 'concat':
+        energy = attn.attn(torch.cat((hidden.expand(encoder_outputs.size(0), -1, -1), encoder_outputs), 2)).tanh()
+        attn_energies = torch.sum(attn.v * energy, dim=2)
+    elif attn.method == 'dot':
+        attn_energies = torch.sum(hidden * encoder_outputs, dim=2)
+    return F.softmax(attn_energies.t(), dim=1).unsqueeze(1)
+
+
+def timeIt(fn, repeat):
+    fn()
+    start = time.time()
+    for _ in range(repeat):
+        fn()
+    return (time.time() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hidden_sizes', type=int, nargs='+', default=[768, 1024])
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--max_length', type=int, default=10) # 인코더 출력 길이
+    parser.add_argument('--steps', type=int, default=10) # 문장당 디코더 단계 수
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    for hidden_size in args.hidden_sizes:
+        encoder_outputs = torch.randn(args.max_length, args.batch_size, hidden_size)
+        hidden = torch.randn(1, args.batch_size, hidden_size)
+        lengths = torch.full((args.batch_size,), args.max_length)
+        for method in ['dot', 'general', 'concat']:
+            attn = Attn(method, hidden_size)
+            if method == 'concat':
+                torch.nn.init.normal_(attn.v)
+            with torch.no_grad():
+                attn_keys = attn.precompute(encoder_outputs, lengths)
+                diff = (previousAttn(attn, hidden, encoder_outputs) - attn(hidden, encoder_outputs, attn_keys)).abs().max()
+                before = timeIt(lambda: previousAttn(attn, hidden, encoder_outputs), args.repeat)
+                precompute = timeIt(lambda: attn.precompute(encoder_outputs, lengths), args.repeat)
+                step = timeIt(lambda: attn(hidden, encoder_outputs, attn_keys), args.repeat)
+            after = step + precompute / args.steps
+            print("hidden {:4d} {:<7s} per step: before {:7.3f} ms  after {:7.3f} ms ({:5.2f}x)  "
+                  "[precompute {:.3f} ms/sentence, max diff {:.1e}]".format(
+                      hidden_size, method, before * 1e3, after * 1e3, before / after, precompute * 1e3, float(diff)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 빔 크기에 따른 응답 지연 시간 : BeamSearchDecoder ([batch * beam] 한 번에) vs 후보마다 디코더를 따로 실행하는 빔 탐색
+#   python -m benchmarks.bench_beam --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store
+# 무작위 초기화 모델이라 [SEP]로 일찍 끝나지 않으므로 항상 max_length 단계를 실행합니다 (최악의 경우)
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from batching import RandomBatchPlan
+from pair_store import PairStore
+from seq2seq import BeamSearchDecoder, EncoderRNN, LuongAttnDecoderRNN
+
+SOS_token = 101
+EOS_token = 102
+
+
+def naiveBeam(encoder, decoder, input_seq, input_length, max_length, beam_size):
+    # 후보(hypothesis)마다 디코더를 한 번씩 실행하는 빔 탐색 (문장 하나)
+    encoder_outputs, encoder_hidden = encoder(input_seq, input_length)
+    beams = [(0.0, [SOS_token], encoder_hidden[:decoder.n_layers])]
+    for _ in range(max_length):
+        candidates = []
+        for score, tokens, hidden in beams:
+            output, hidden = decoder(torch.tensor([[tokens[-1]]]), hidden, encoder_outputs)
+            log_probs, index = F.log_softmax(output, dim=1)[0].topk(beam_size)
+            for lp, t in zip(log_probs.tolist(), index.tolist()):
+                candidates.append((score + lp, tokens + [t], hidden))
+        beams = sorted(candidates, key=lambda c: -c[0])[:beam_size]
+    return beams[0][1][1:]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--hidden_size', type=int, default=768)
+    parser.add_argument('--vocab_size', type=int, default=30522)
+    parser.add_argument('--beams', type=int, nargs='+', default=[1, 2, 3, 4, 5, 6, 7, 8])
+    parser.add_argument('--batch_sizes', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--n_sentences', type=int, default=16)
+    parser.add_argument('--max_length', type=int, default=10)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    embedding = nn.Embedding(args.vocab_size, args.hidden_size)
+    encoder = EncoderRNN(args.hidden_size, embedding, 2, 0.1).eval()
+    decoder = LuongAttnDecoderRNN('dot', embedding, args.hidden_size, args.vocab_size, 2, 0.1).eval()
+    store = PairStore(args.store)
+    sentences = [store.inputIds(i).tolist() for i in RandomBatchPlan(len(store), args.n_sentences, seed=0)(1)]
+
+    print("beam  " + "  ".join("batch {:<3d} ms/sentence".format(b) for b in args.batch_sizes) + "  naive ms/sentence")
+    for beam_size in args.beams:
+        searcher = BeamSearchDecoder(encoder, decoder, SOS_token, EOS_token, 0, beam_size)
+        row = []
+        for batch_size in args.batch_sizes:
+            searcher.decodeBatch(sentences[:batch_size], args.max_length)
+            start = time.time()
+            for i in range(0, len(sentences), batch_size):
+                searcher.decodeBatch(sentences[i:i + batch_size], args.max_length)
+            row.append((time.time() - start) / len(sentences))
+        with torch.no_grad():
+            start = time.time()
+            for s in sentences[:4]:
+                naiveBeam(encoder, decoder, torch.tensor(s)[:, None], torch.tensor([len(s)]), args.max_length, beam_size)
+            naive = (time.time() - start) / 4
+        print("{:4d}  ".format(beam_size) + "  ".join("{:22.1f}".format(t * 1e3) for t in row) +
+              "  {:17.1f}".format(naive * 1e3))
+
+
+if __name__ == '__main__':
+    main()
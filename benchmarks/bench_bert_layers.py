@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# BertFeatureExtractor의 층 자르기(truncation) 깊이별 CPU 지연 시간 / 메모리 / 출력 품질 비교
+#   python -m benchmarks.bench_bert_layers --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store
+# 품질 지표는 마지막 층(전체 깊이) 출력과의 토큰별 cosine 유사도 평균과, 기존 방식(sequence-first 입력,
+# attention mask 없음, autograd 기록)의 전체 깊이 출력 대비 지연 시간입니다
+# 인터넷이 없으면 --random 으로 같은 크기의 무작위 초기화 BERT를 씁니다
+# (--model이 .json이면 그 config, 아니면 이름에 'base'가 있으면 BERT-base, 없으면 BERT-large 크기)
+
+import argparse
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+from batching import PairCollator, RandomBatchPlan
+from bert_features import BertFeatureExtractor
+from pair_store import PairStore
+
+
+def randomBertConfig(model):
+    # --random : 내려받지 않고 config를 만듭니다
+    from transformers import BertConfig
+    if model.endswith('.json'):
+        return BertConfig.from_json_file(model)
+    if 'base' in model:
+        return BertConfig()
+    return BertConfig(hidden_size=1024, num_hidden_layers=24, num_attention_heads=16, intermediate_size=4096)
+
+
+def parameterBytes(module):
+    return sum(p.numel() * p.element_size() for p in module.parameters())
+
+
+def timeIt(fn, repeat):
+    fn()
+    start = time.time()
+    for _ in range(repeat):
+        out = fn()
+    return (time.time() - start) / repeat, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--model', default='bert-large-uncased')
+    parser.add_argument('--random', action='store_true')
+    parser.add_argument('--depths', type=int, nargs='+', default=None)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--n_batches', type=int, default=5)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    from transformers import BertModel
+    if args.random:
+        bert_model = BertModel(randomBertConfig(args.model)).eval()
+    else:
+        bert_model = BertModel.from_pretrained(args.model).eval()
+    n_layers = bert_model.config.num_hidden_layers
+    depths = args.depths or [d for d in [1, 3, 6, 12, 18, 24] if d <= n_layers]
+
+    store = PairStore(args.store)
+    collator = PairCollator(store)
+    plan = RandomBatchPlan(len(store), args.batch_size, seed=0)
+    batches = [collator(plan(i))[:2] for i in range(1, args.n_batches + 1)]
+
+    def legacy():
+        return [bert_model(inp)[0] for inp, _ in batches]
+    legacy_time, _ = timeIt(legacy, 1)
+    print("legacy (sequence-first, no mask, autograd, {} layers): {:8.1f} ms/batch".format(
+        n_layers, legacy_time / len(batches) * 1e3))
+
+    full = BertFeatureExtractor(bert_model, [n_layers])
+    reference = [full.encode(inp, lengths) for inp, lengths in batches]
+    for depth in depths:
+        extractor = BertFeatureExtractor(bert_model, [depth])
+        elapsed, outputs = timeIt(lambda: [extractor.encode(inp, lengths) for inp, lengths in batches], 1)
+        similarity = []
+        for out, ref, (_, lengths) in zip(outputs, reference, batches):
+            mask = torch.arange(out.size(0))[:, None] < lengths[None, :]
+            similarity.append(F.cosine_similarity(out[mask], ref[mask], dim=-1).mean().item())
+        print("layers 1..{:2d}: {:8.1f} ms/batch  params {:7.1f}MB  cosine vs layer {}: {:.3f}".format(
+            depth, elapsed / len(batches) * 1e3, parameterBytes(extractor) / 2 ** 20, n_layers, np.mean(similarity)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# batch2TrainData 배치 생성 속도 비교
+#   기존 : 파이썬 리스트 + itertools.zip_longest(zeroPadding) + 이중 반복문(binaryMatrix) + ByteTensor
+#   PairCollator : 저장소 id 배열에서 gather 한 번으로 [max_len, batch] 텐서와 bool mask 생성
+#   python -m benchmarks.bench_collate --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store
+
+import argparse
+import itertools
+import timeit
+
+import torch
+
+from batching import PairCollator, RandomBatchPlan
+from pair_store import PairStore
+
+PAD_token = 0
+
+
+def zeroPadding(l, fillvalue=PAD_token):
+    return list(itertools.zip_longest(*l, fillvalue=fillvalue))
+
+def binaryMatrix(l, value=PAD_token):
+    m = []
+    for i, seq in enumerate(l):
+        m.append([])
+        for token in seq:
+            if token == PAD_token:
+                m[i].append(0)
+            else:
+                m[i].append(1)
+    return m
+
+def listBatch2TrainData(store, index_batch):
+    index_batch = sorted(index_batch, key=lambda i: len(store.inputIds(i)), reverse=True)
+    input_batch = [store.inputIds(i).tolist() for i in index_batch]
+    output_batch = [store.targetIds(i).tolist() for i in index_batch]
+    lengths = torch.tensor([len(indexes) for indexes in input_batch])
+    inp = torch.LongTensor(zeroPadding(input_batch))
+    max_target_len = max([len(indexes) for indexes in output_batch])
+    padList = zeroPadding(output_batch)
+    mask = torch.ByteTensor(binaryMatrix(padList))
+    output = torch.LongTensor(padList)
+    return inp, lengths, output, mask, max_target_len
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--batch_size', type=int, nargs='+', default=[64, 256])
+    parser.add_argument('--n_batches', type=int, default=200)
+    args = parser.parse_args()
+
+    store = PairStore(args.store)
+    collator = PairCollator(store, PAD_token)
+    for batch_size in args.batch_size:
+        plan = RandomBatchPlan(len(store), batch_size, seed=0)
+        batches = [plan(i) for i in range(1, args.n_batches + 1)]
+        for index in batches[:10]:
+            a, b = listBatch2TrainData(store, index), collator(index)
+            assert all(torch.equal(x, y) for x, y in zip(a[:3], b[:3])) and torch.equal(a[3].bool(), b[3]) and a[4] == b[4]
+        old = min(timeit.repeat(lambda: [listBatch2TrainData(store, index) for index in batches], number=1, repeat=3))
+        new = min(timeit.repeat(lambda: [collator(index) for index in batches], number=1, repeat=3))
+        print("batch_size {:4d}: list {:8.1f} us/batch  PairCollator {:8.1f} us/batch  x{:.1f}".format(
+            batch_size, old / len(batches) * 1e6, new / len(batches) * 1e6, old / new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 공유 임베딩/출력층 설정 비교 : 파라미터 수, Adam 상태 크기, checkpoint 크기, 학습 loss 곡선
+#   python -m benchmarks.bench_embedding --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store \
+#       --bert bert-large-uncased --n_iteration 2000
+#   untied       : 무작위 임베딩 + 따로 학습하는 decoder.out (기존 방식)
+#   tied         : decoder.out.weight = 임베딩
+#   tied+bert    : 묶은 임베딩을 BERT word embedding으로 초기화
+#   tied+frozen  : tied+bert에서 임베딩을 학습하지 않음
+# hidden_size는 BERT hidden 크기를 씁니다. untied의 마지막 평균 loss에 처음 도달한 iteration을 같이 출력합니다
+
+import argparse
+import io
+
+import torch
+import torch.nn as nn
+from torch import optim
+
+from batching import BucketBatchPlan, PairCollator
+from pair_store import PairStore
+from seq2seq import EncoderRNN, LuongAttnDecoderRNN, initEmbedding, maskNLLLossSequence
+from vocab import Voc
+
+CONFIGS = [('untied', False, False, False), ('tied', True, False, False),
+           ('tied+bert', True, True, False), ('tied+frozen', True, True, True)]
+
+
+def trainStep(encoder, decoder, optimizers, batch, sos_index, clip=50.0):
+    input_variable, lengths, target_variable, mask, _ = batch
+    for optimizer in optimizers:
+        optimizer.zero_grad()
+    encoder_outputs, encoder_hidden = encoder(input_variable, lengths)
+    decoder_input = torch.full((1, input_variable.size(1)), sos_index, dtype=torch.long)
+    decoder_inputs = torch.cat((decoder_input, target_variable[:-1]), 0)
+    attn_keys = decoder.attn.precompute(encoder_outputs, lengths)
+    output, _ = decoder.forwardSequence(decoder_inputs, encoder_hidden[:decoder.n_layers], encoder_outputs, attn_keys)
+    loss, mean_loss = maskNLLLossSequence(decoder.nllLoss(output, target_variable), mask)
+    loss.backward()
+    nn.utils.clip_grad_norm_(encoder.parameters(), clip)
+    nn.utils.clip_grad_norm_(decoder.parameters(), clip)
+    for optimizer in optimizers:
+        optimizer.step()
+    return mean_loss.item()
+
+
+def stateBytes(optimizers):
+    seen = set()
+    total = 0
+    for optimizer in optimizers:
+        for state in optimizer.state.values():
+            for v in state.values():
+                if isinstance(v, torch.Tensor) and v.data_ptr() not in seen:
+                    seen.add(v.data_ptr())
+                    total += v.numel() * v.element_size()
+    return total
+
+
+def checkpointBytes(encoder, decoder, embedding, optimizers):
+    buffer = io.BytesIO()
+    torch.save({'en': encoder.state_dict(), 'de': decoder.state_dict(), 'en_opt': optimizers[0].state_dict(),
+                'de_opt': optimizers[1].state_dict(), 'embedding': embedding.state_dict()}, buffer)
+    return buffer.tell()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--bert', default='bert-large-uncased') # BertModel/BertTokenizer 이름 또는 폴더
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--n_iteration', type=int, default=2000)
+    parser.add_argument('--print_every', type=int, default=100)
+    args = parser.parse_args()
+
+    from transformers import BertModel, BertTokenizer
+    tokenizer = BertTokenizer.from_pretrained(args.bert)
+    word_embeddings = BertModel.from_pretrained(args.bert).embeddings.word_embeddings
+    hidden_size = word_embeddings.embedding_dim
+
+    store = PairStore(args.store)
+    voc = Voc('bench', tokenizer).buildVocab(store)
+    sos_index = int(voc.toIndex(tokenizer.cls_token_id))
+    collator = PairCollator(store, 0, voc.id_map)
+    plan = BucketBatchPlan(store.inputLengths(), store.targetLengths(), args.batch_size, seed=0)
+    print("hidden_size {}; num_words {}".format(hidden_size, voc.num_words))
+
+    target_loss = None
+    for name, tie, bert_init, freeze in CONFIGS:
+        torch.manual_seed(0)
+        embedding = nn.Embedding(voc.num_words, hidden_size)
+        if bert_init:
+            initEmbedding(embedding, word_embeddings, voc.token_ids)
+        embedding.weight.requires_grad_(not freeze)
+        encoder = EncoderRNN(hidden_size, embedding, 2, 0.1)
+        decoder = LuongAttnDecoderRNN('dot', embedding, hidden_size, voc.num_words, 2, 0.1, tie_embedding=tie)
+        optimizers = [optim.Adam(encoder.parameters(), lr=1e-4), optim.Adam(decoder.parameters(), lr=5e-4)]
+
+        curve = []
+        print_loss = 0
+        for iteration in range(1, args.n_iteration + 1):
+            print_loss += trainStep(encoder, decoder, optimizers, collator(plan(iteration)), sos_index)
+            if iteration % args.print_every == 0:
+                curve.append((iteration, print_loss / args.print_every))
+                print_loss = 0
+
+        params = {id(p): p for m in (encoder, decoder) for p in m.parameters()}
+        trainable = sum(p.numel() for p in params.values() if p.requires_grad)
+        if target_loss is None:
+            target_loss = curve[-1][1]
+        reached = next((i for i, l in curve if l <= target_loss), None)
+        print("{:<12s} params {:6.1f}M (trainable {:6.1f}M)  Adam state {:7.1f}MB  checkpoint {:7.1f}MB  "
+              "final loss {:.4f}  reaches untied final loss at {}".format(
+                  name, sum(p.numel() for p in params.values()) / 1e6, trainable / 1e6,
+                  stateBytes(optimizers) / 2 ** 20, checkpointBytes(encoder, decoder, embedding, optimizers) / 2 ** 20,
+                  curve[-1][1], reached if reached is not None else 'not reached'))
+        print("    " + " ".join("{}:{:.3f}".format(i, l) for i, l in curve))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# BertModel 변형의 encoder_mode 비교 : 'rnn'(양방향 EncoderRNN으로 디코더 초기 은닉 상태) vs 'bert'(BertBridge)
+#   python -m benchmarks.bench_encoder_mode --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store
+# 학습 단계(teacher forcing)와 GreedySearchDecoder 응답 한 개의 지연 시간을 잽니다
+# BERT 출력은 두 방식 모두 같은 BertFeatureExtractor를 씁니다
+# (--random : 내려받지 않고 만든 무작위 초기화 BERT, bench_bert_layers.randomBertConfig)
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+from torch import optim
+
+from batching import PairCollator, RandomBatchPlan
+from benchmarks.bench_bert_layers import randomBertConfig
+from benchmarks.bench_teacher_forcing import maskNLLLoss
+from bert_features import BertFeatureExtractor
+from pair_store import PairStore
+from seq2seq import BertBridge, BertEncoder, EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+
+CLS_token = 101
+
+
+def trainStep(bert_encoder, encoder, decoder, optimizers, batch, clip=50.0):
+    input_variable, lengths, target_variable, mask, max_target_len = batch
+    for optimizer in optimizers:
+        optimizer.zero_grad()
+    encoder_outputs, encoder_hidden = bert_encoder(input_variable, lengths)
+    decoder_input = torch.full((1, input_variable.size(1)), CLS_token, dtype=torch.long)
+    decoder_hidden = encoder_hidden[:decoder.n_layers]
+    loss = 0
+    for t in range(max_target_len):
+        decoder_output, decoder_hidden = decoder(decoder_input, decoder_hidden, encoder_outputs)
+        decoder_input = target_variable[t].view(1, -1)
+        mask_loss, _ = maskNLLLoss(decoder_output, target_variable[t], mask[t])
+        loss += mask_loss
+    loss.backward()
+    nn.utils.clip_grad_norm_(encoder.parameters(), clip)
+    nn.utils.clip_grad_norm_(decoder.parameters(), clip)
+    for optimizer in optimizers:
+        optimizer.step()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--model', default='bert-large-uncased')
+    parser.add_argument('--random', action='store_true')
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--n_steps', type=int, default=10)
+    parser.add_argument('--max_length', type=int, default=10)
+    args = parser.parse_args()
+
+    from transformers import BertModel
+    if args.random:
+        bert_model = BertModel(randomBertConfig(args.model)).eval()
+    else:
+        bert_model = BertModel.from_pretrained(args.model).eval()
+    extractor = BertFeatureExtractor(bert_model)
+    hidden_size = extractor.hidden_size
+    vocab_size = bert_model.config.vocab_size
+
+    store = PairStore(args.store)
+    collator = PairCollator(store)
+    plan = RandomBatchPlan(len(store), args.batch_size, seed=0)
+    batches = [collator(plan(i)) for i in range(1, args.n_steps + 2)]
+    prompts = [collator([i])[:2] for i in range(20)]
+
+    for mode in ['rnn', 'bert']:
+        torch.manual_seed(0)
+        embedding = nn.Embedding(vocab_size, hidden_size)
+        decoder = LuongAttnDecoderRNN('dot', embedding, hidden_size, vocab_size, 2, 0.1)
+        if mode == 'bert':
+            encoder = BertEncoder(extractor, bridge=BertBridge(hidden_size, hidden_size, decoder.n_layers))
+            bert_encoder = encoder
+        else:
+            encoder = EncoderRNN(hidden_size, embedding, 2, 0.1)
+            bert_encoder = BertEncoder(extractor, rnn_encoder=encoder)
+        optimizers = [optim.Adam(encoder.parameters(), lr=1e-4), optim.Adam(decoder.parameters(), lr=5e-4)]
+        encoder.train()
+        decoder.train()
+        trainStep(bert_encoder, encoder, decoder, optimizers, batches[0])
+        start = time.time()
+        for batch in batches[1:]:
+            trainStep(bert_encoder, encoder, decoder, optimizers, batch)
+        train_time = (time.time() - start) / (len(batches) - 1)
+
+        encoder.eval()
+        decoder.eval()
+        searcher = GreedySearchDecoder(bert_encoder, decoder, CLS_token)
+        with torch.no_grad():
+            searcher(prompts[0][0], prompts[0][1], args.max_length)
+            start = time.time()
+            for input_seq, input_length in prompts:
+                searcher(input_seq, input_length, args.max_length)
+        infer_time = (time.time() - start) / len(prompts)
+        print("encoder_mode={:<5s} train {:8.1f} ms/step ({:5.2f} steps/s)  greedy reply {:7.1f} ms  encoder params {:6.1f}M".format(
+            mode, train_time * 1e3, 1 / train_time, infer_time * 1e3,
+            sum(p.numel() for p in encoder.parameters() if p is not embedding.weight) / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 탐욕적 디코딩 처리량 : 이전 GreedySearchDecoder(문장 하나씩, 항상 max_length 단계, 단계마다 torch.cat)
+# vs 배치 GreedySearchDecoder.decodeBatch (종료 마스크, 미리 만든 출력 텐서, 모두 끝나면 멈춤)
+#   python -m benchmarks.bench_greedy --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store
+# 무작위 초기화 모델은 [SEP]를 거의 내지 않으므로 --eos_after로 k번째 단계 이후 [SEP]가 나오게 할 수 있습니다
+# (출력층 bias를 바꾸지 않고 디코더 출력 logits에 더합니다)
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+
+from batching import RandomBatchPlan
+from pair_store import PairStore
+from seq2seq import EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+
+SOS_token = 101
+EOS_token = 102
+
+
+class EosAfter(nn.Module):
+    # 무작위 디코더가 문장마다 다른 단계에서 EOS를 내도록 logits를 바꿉니다
+    def __init__(self, decoder, eos_token, eos_after):
+        super(EosAfter, self).__init__()
+        self.decoder = decoder
+        self.n_layers = decoder.n_layers
+        self.attn = decoder.attn
+        self.eos_token = eos_token
+        self.eos_after = eos_after
+        self.step = 0
+
+    def forward(self, input_step, last_hidden, encoder_outputs, attn_keys=None):
+        output, hidden = self.decoder(input_step, last_hidden, encoder_outputs, attn_keys)
+        if self.eos_after:
+            # 문장 b는 eos_after + (b % eos_after) 단계 뒤에 끝납니다
+            stop = self.eos_after + torch.arange(output.size(0), device=output.device) % self.eos_after
+            output[:, self.eos_token] += torch.where(self.step >= stop, 1e4, 0.0)
+        self.step += 1
+        return output, hidden
+
+
+def previousGreedy(encoder, decoder, input_seq, input_length, max_length):
+    # 이전 GreedySearchDecoder.forward (문장 하나)
+    encoder_outputs, encoder_hidden = encoder(input_seq, input_length)
+    decoder_hidden = encoder_hidden[:decoder.n_layers]
+    decoder_input = torch.ones(1, 1, dtype=torch.long) * SOS_token
+    all_tokens = torch.zeros([0], dtype=torch.long)
+    all_scores = torch.zeros([0])
+    for _ in range(max_length):
+        decoder_output, decoder_hidden = decoder(decoder_input, decoder_hidden, encoder_outputs)
+        decoder_scores, decoder_input = torch.max(torch.softmax(decoder_output, dim=1), dim=1)
+        all_tokens = torch.cat((all_tokens, decoder_input), dim=0)
+        all_scores = torch.cat((all_scores, decoder_scores), dim=0)
+        decoder_input = torch.unsqueeze(decoder_input, 0)
+    return all_tokens, all_scores
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--hidden_size', type=int, default=768)
+    parser.add_argument('--vocab_size', type=int, default=30522)
+    parser.add_argument('--batch_sizes', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--n_sentences', type=int, default=64)
+    parser.add_argument('--max_length', type=int, default=10)
+    parser.add_argument('--eos_after', type=int, default=0)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    embedding = nn.Embedding(args.vocab_size, args.hidden_size)
+    encoder = EncoderRNN(args.hidden_size, embedding, 2, 0.1).eval()
+    decoder = LuongAttnDecoderRNN('dot', embedding, args.hidden_size, args.vocab_size, 2, 0.1).eval()
+    store = PairStore(args.store)
+    sentences = [store.inputIds(i).tolist() for i in RandomBatchPlan(len(store), args.n_sentences, seed=0)(1)]
+
+    with torch.no_grad():
+        start = time.time()
+        for s in sentences:
+            previousGreedy(encoder, decoder, torch.tensor(s)[:, None], torch.tensor([len(s)]), args.max_length)
+        before = len(sentences) / (time.time() - start)
+    print("previous (1 sentence, {} steps) {:8.1f} sentences/s".format(args.max_length, before))
+
+    for batch_size in args.batch_sizes:
+        steps = 0
+        start = time.time()
+        for i in range(0, len(sentences), batch_size):
+            wrapped = EosAfter(decoder, EOS_token, args.eos_after)
+            searcher = GreedySearchDecoder(encoder, wrapped, SOS_token, EOS_token)
+            searcher.decodeBatch(sentences[i:i + batch_size], args.max_length)
+            steps += wrapped.step
+        elapsed = time.time() - start
+        print("batched  batch_size {:3d}       {:8.1f} sentences/s ({:5.2f}x, {:.1f} decoder steps/batch)".format(
+            batch_size, len(sentences) / elapsed, len(sentences) / elapsed / before,
+            steps / -(-len(sentences) // batch_size)))
+
+
+if __name__ == '__main__':
+    main()
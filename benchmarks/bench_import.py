@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 명령별 import 시간 (python -X importtime) : 새 프로세스에서 chatbot 모듈을 import하는 데 걸리는 시간과 오래 걸린 모듈
+#   python -m benchmarks.bench_import --budget 5
+#   python -m chatbot bench import --checkpoint data/save/cb_model/.../50000_checkpoint.tar
+# tensorflow/sklearn은 어떤 명령에서도, transformers는 명령 파싱(chatbot.__main__)에서 import되면 실패(exit 1)합니다
+# --budget : 모듈별 cumulative 합이 이 시간(초)을 넘으면 실패 (import 시간 회귀 확인용)
+# --checkpoint가 주어지면 python -m chatbot chat이 첫 입력을 기다릴 때까지의 시간도 잽니다
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+# (import할 모듈, import되면 안 되는 최상위 모듈)
+TARGETS = [
+    ('chatbot.__main__', ['tensorflow', 'sklearn', 'transformers', 'torch']),
+    ('chatbot.data', ['tensorflow', 'sklearn', 'transformers']),
+    ('chatbot.chat', ['tensorflow', 'sklearn', 'transformers']),
+    ('chatbot.train', ['tensorflow', 'sklearn', 'transformers']),
+]
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def importTimes(module):
+    # -> {모듈 이름: cumulative 초}, 최상위 import의 cumulative 합 (-X importtime의 stderr를 읽습니다)
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    times = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative) / 1e6
+        # 중첩된 import는 이름 앞에 공백이 더 붙습니다
+        if not name[1:].startswith(' '):
+            total += int(cumulative) / 1e6
+    return times, total
+
+
+def chatStartup(checkpoint, config, repeats):
+    # python -m chatbot chat이 '> ' 프롬프트를 낼 때까지의 시간 (stdin을 닫아 두면 바로 끝납니다)
+    command = [sys.executable, '-m', 'chatbot', 'chat', '--checkpoint', os.path.abspath(checkpoint)]
+    if config is not None:
+        command += ['--config', os.path.abspath(config)]
+    # 현재 폴더에서 실행합니다 (data/save, 로컬 모델 폴더 등의 상대 경로가 학습할 때와 같도록)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+    times = []
+    for _ in range(repeats):
+        start = time.time()
+        subprocess.run(command, env=env, stdin=subprocess.DEVNULL, capture_output=True, check=True)
+        times.append(time.time() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budget', type=float, default=None) # 초, 없으면 확인하지 않음
+    parser.add_argument('--top', type=int, default=5)
+    parser.add_argument('--checkpoint', default=None)
+    parser.add_argument('--config', default=None) # 채팅 설정 파일 (모델 설정은 checkpoint에서 가져옵니다)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    failed = False
+    for module, forbidden in TARGETS:
+        times, total = importTimes(module)
+        imported = [name for name in forbidden if name in times]
+        print("{:<18s} total {:5.2f}s  {:4d} modules{}".format(
+            module, total, len(times), '  imports ' + ', '.join(imported) if imported else ''))
+        # 오래 걸린 최상위 패키지 (chatbot 자신과 flat 모듈을 포함한 cumulative 시간)
+        packages = [name for name in times if '.' not in name and name != module.split('.')[0]]
+        for name in sorted(packages, key=lambda name: -times[name])[:args.top]:
+            print("    {:<30s} {:5.2f}s".format(name, times[name]))
+        if imported or (args.budget is not None and total > args.budget):
+            failed = True
+
+    if args.checkpoint is not None:
+        print("python -m chatbot chat startup {:5.2f}s".format(chatStartup(args.checkpoint, args.config, args.repeats)))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 디코더 출력층 + 손실 비교 (BERT vocab 30,522개)
+#   softmax+log : 이전 방식 (F.softmax -> torch.gather -> -torch.log)
+#   fused CE    : logits + F.cross_entropy (log_softmax와 NLL을 한 번에)
+#   adaptive    : AdaptiveSoftmaxHead (코퍼스 빈도 순서 클러스터, 정답 토큰의 클러스터만 계산)
+#   python -m benchmarks.bench_output_head --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store
+# --store가 없으면 Zipf 분포 토큰 빈도를 씁니다
+
+import argparse
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from seq2seq import AdaptiveSoftmaxHead
+
+
+def tokenCounts(args):
+    if args.store:
+        from pair_store import PairStore
+        return PairStore(args.store).targetTokenCounts(args.vocab_size)
+    rng = np.random.default_rng(0)
+    return rng.permutation(1e6 / np.arange(1, args.vocab_size + 1)).astype(np.int64)
+
+
+def sampleTargets(counts, n):
+    p = counts / counts.sum()
+    return torch.from_numpy(np.random.default_rng(1).choice(len(counts), size=n, p=p))
+
+
+def softmaxLogLoss(out, features, target):
+    probs = F.softmax(out(features), dim=1)
+    return -torch.log(torch.gather(probs, 1, target.view(-1, 1)).squeeze(1)).mean()
+
+
+def fusedLoss(out, features, target):
+    return F.cross_entropy(out(features), target)
+
+
+def adaptiveLoss(head, features, target):
+    return head.nll(features, target).mean()
+
+
+def timeLoss(lossFn, module, features, target, n_steps):
+    for i in range(n_steps + 1):
+        if i == 1:
+            start = time.time()
+        module.zero_grad()
+        x = features.clone().requires_grad_()
+        loss = lossFn(module, x, target)
+        loss.backward()
+    return (time.time() - start) / n_steps, loss.item()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', default=None)
+    parser.add_argument('--hidden_size', type=int, default=768)
+    parser.add_argument('--vocab_size', type=int, default=30522)
+    parser.add_argument('--tokens', type=int, default=64 * 10) # batch_size * 응답 길이
+    parser.add_argument('--cutoffs', type=int, nargs='+', default=[2000, 10000])
+    parser.add_argument('--n_steps', type=int, default=5)
+    args = parser.parse_args()
+
+    counts = tokenCounts(args)
+    target = sampleTargets(counts, args.tokens)
+    torch.manual_seed(0)
+    features = torch.tanh(torch.randn(args.tokens, args.hidden_size))
+    linear = nn.Linear(args.hidden_size, args.vocab_size)
+    head = AdaptiveSoftmaxHead(args.hidden_size, counts, args.cutoffs)
+    head_share = counts[head.order[:args.cutoffs[0]].numpy()].sum() / counts.sum()
+    print("adaptive head cluster covers {:.1%} of target tokens".format(head_share))
+
+    for name, lossFn, module in [('softmax+log', softmaxLogLoss, linear), ('fused CE', fusedLoss, linear),
+                                 ('adaptive', adaptiveLoss, head)]:
+        elapsed, loss = timeLoss(lossFn, module, features, target, args.n_steps)
+        n_params = sum(p.numel() for p in module.parameters())
+        print("{:<12s} loss+backward {:7.1f} ms  ({:6.2f}M output params, loss {:.4f})".format(
+            name, elapsed * 1e3, n_params / 1e6, loss))
+
+    # 탐욕적 디코딩 : 한 단계에서 [batch_size, vocab] 중 최댓값과 그 softmax 점수 (GreedySearchDecoder는 predict를 씀)
+    step = features[:64]
+
+    def linearPredict(x):
+        logits = linear(x)
+        scores, tokens = torch.max(logits, dim=1)
+        return tokens, torch.exp(scores - torch.logsumexp(logits, dim=1))
+    with torch.no_grad():
+        for name, fn in [('linear', linearPredict),
+                         ('adaptive log_prob', lambda x: head(x).max(1)),
+                         ('adaptive predict', head.predict)]:
+            fn(step)
+            start = time.time()
+            for _ in range(20):
+                fn(step)
+            print("greedy {:<18s} {:7.2f} ms/step".format(name, (time.time() - start) / 20 * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# fp32 vs bf16 autocast : 학습 처리량과 같은 seed/배치로 학습한 loss, 탐욕적 디코딩 처리량, (선택) BERT forward 처리량
+#   python -m benchmarks.bench_precision --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store \
+#       --hidden_size 1024 --n_iteration 200 --bert bert-large-uncased
+# 학습은 teacher forcing (forwardSequence + nllLoss) + Adam이고 loss는 마지막 --tail iteration의 평균입니다
+# bf16 autocast를 빠르게 실행하려면 CPU가 AVX512-BF16/AMX를 지원해야 합니다
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+from torch import optim
+
+from batching import BucketBatchPlan, PairCollator
+from pair_store import PairStore
+from seq2seq import EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN, autocast, maskNLLLossSequence
+
+SOS_token = 101
+EOS_token = 102
+
+
+def trainStep(encoder, decoder, optimizers, batch, precision, clip=50.0):
+    input_variable, lengths, target_variable, mask, _ = batch
+    for optimizer in optimizers:
+        optimizer.zero_grad()
+    with autocast('cpu', precision):
+        encoder_outputs, encoder_hidden = encoder(input_variable, lengths)
+        decoder_input = torch.full((1, input_variable.size(1)), SOS_token, dtype=torch.long)
+        decoder_inputs = torch.cat((decoder_input, target_variable[:-1]), 0)
+        attn_keys = decoder.attn.precompute(encoder_outputs, lengths)
+        output, _ = decoder.forwardSequence(decoder_inputs, encoder_hidden[:decoder.n_layers], encoder_outputs, attn_keys)
+        loss, mean_loss = maskNLLLossSequence(decoder.nllLoss(output, target_variable), mask)
+    loss.backward()
+    nn.utils.clip_grad_norm_(encoder.parameters(), clip)
+    nn.utils.clip_grad_norm_(decoder.parameters(), clip)
+    for optimizer in optimizers:
+        optimizer.step()
+    return mean_loss.detach()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--hidden_size', type=int, default=1024)
+    parser.add_argument('--vocab_size', type=int, default=30522)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--n_iteration', type=int, default=100)
+    parser.add_argument('--tail', type=int, default=20)
+    parser.add_argument('--n_sentences', type=int, default=64)
+    parser.add_argument('--bert', default=None) # BertModel 이름 또는 폴더 (주면 BERT forward도 잽니다)
+    args = parser.parse_args()
+
+    store = PairStore(args.store)
+    collator = PairCollator(store)
+    plan = BucketBatchPlan(store.inputLengths(), store.targetLengths(), args.batch_size, seed=0)
+    batches = [collator(plan(i)) for i in range(1, args.n_iteration + 1)]
+    sentences = [store.inputIds(i).tolist() for i in range(min(args.n_sentences, len(store)))]
+
+    for precision in ['fp32', 'bf16']:
+        torch.manual_seed(0)
+        embedding = nn.Embedding(args.vocab_size, args.hidden_size)
+        encoder = EncoderRNN(args.hidden_size, embedding, 2, 0.1)
+        decoder = LuongAttnDecoderRNN('dot', embedding, args.hidden_size, args.vocab_size, 2, 0.1)
+        optimizers = [optim.Adam(encoder.parameters(), lr=1e-4), optim.Adam(decoder.parameters(), lr=5e-4)]
+
+        losses = []
+        start = time.time()
+        for batch in batches:
+            losses.append(trainStep(encoder, decoder, optimizers, batch, precision))
+        train_time = time.time() - start
+        tail = torch.stack(losses[-args.tail:]).mean().item()
+
+        encoder.eval()
+        decoder.eval()
+        searcher = GreedySearchDecoder(encoder, decoder, SOS_token, EOS_token, 0, precision)
+        searcher.decodeBatch(sentences[:2], 10)
+        start = time.time()
+        searcher.decodeBatch(sentences, 10)
+        decode_time = time.time() - start
+
+        print("{}  train {:6.2f} it/s  last {} iterations loss {:.4f}  greedy decode {:7.1f} sentences/s".format(
+            precision, len(batches) / train_time, args.tail, tail, len(sentences) / decode_time))
+
+    if args.bert is not None:
+        from transformers import BertModel
+        from bert_features import BertFeatureExtractor
+        bert = BertModel.from_pretrained(args.bert)
+        input_seq, lengths = collator(list(range(args.batch_size)))[:2]
+        reference = None
+        for precision in ['fp32', 'bf16']:
+            extractor = BertFeatureExtractor(bert, precision=precision)
+            features = extractor.encode(input_seq, lengths)
+            start = time.time()
+            for _ in range(3):
+                extractor.encode(input_seq, lengths)
+            elapsed = (time.time() - start) / 3
+            if reference is None:
+                reference = features
+            print("{}  BERT forward {:7.1f} sentences/s  max abs diff vs fp32 {:.3f}".format(
+                precision, args.batch_size / elapsed, float((features - reference).abs().max())))
+
+
+if __name__ == '__main__':
+    main()
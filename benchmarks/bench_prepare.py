@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# loadPrepareData 전처리(정규화 + 토크나이즈) 성능을 코어 수별로 비교합니다
+#   python -m benchmarks.bench_prepare --corpus /home/dilab/tmp/cornell_movie_dialogs_corpus --scale 1 10
+# scale > 1 이면 lineID를 밀어서 복제한 합성 코퍼스(scale배)를 임시 폴더에 만들어 측정합니다
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from corpus_stream import FIELD_SEPARATOR, formatCorpus, utterance_id_pattern
+from pair_store import buildPairStore, buildSegment, PairStore
+
+
+def makeSyntheticCorpus(corpus, scale, outputDir):
+    # movie_lines / movie_conversations를 scale번 복제하고 복제본마다 lineID를 offset만큼 밀어줍니다
+    with open(os.path.join(corpus, 'movie_lines.txt'), 'rb') as f:
+        lines = f.readlines()
+    with open(os.path.join(corpus, 'movie_conversations.txt'), 'r', encoding='iso-8859-1') as f:
+        conversations = f.readlines()
+    offset = max(int(l.split(FIELD_SEPARATOR.encode('iso-8859-1'), 1)[0][1:]) for l in lines) + 1
+    os.makedirs(outputDir)
+    with open(os.path.join(outputDir, 'movie_lines.txt'), 'wb') as f:
+        for k in range(scale):
+            for l in lines:
+                lineId, rest = l.split(FIELD_SEPARATOR.encode('iso-8859-1'), 1)
+                f.write('L{}'.format(int(lineId[1:]) + k * offset).encode('iso-8859-1') + FIELD_SEPARATOR.encode('iso-8859-1') + rest)
+    with open(os.path.join(outputDir, 'movie_conversations.txt'), 'w', encoding='iso-8859-1') as f:
+        for k in range(scale):
+            for l in conversations:
+                f.write(utterance_id_pattern.sub(lambda m: 'L{}'.format(int(m.group(1)) + k * offset), l))
+    return outputDir
+
+
+def sameStore(a, b):
+    return all(np.array_equal(getattr(a, name), getattr(b, name))
+               for name in ['input_ids', 'input_offsets', 'target_ids', 'target_offsets'])
+
+
+def benchCorpus(corpus, tokenizer, max_length, worker_counts, workDir):
+    shards = formatCorpus(corpus, outputDir=os.path.join(workDir, 'shards'), shardSize=100000)
+
+    # 기존 방식 : 한 문장씩 normalizeString + tokenizer.encode
+    start = time.time()
+    serialDir = os.path.join(workDir, 'serial')
+    for shard in shards:
+        buildSegment(shard, os.path.join(serialDir, os.path.basename(shard)), tokenizer, max_length)
+    serial_time = time.time() - start
+    n_pairs = sum(len(PairStore(os.path.join(serialDir, os.path.basename(s)))) for s in shards)
+    print("  serial encode      : {:8.2f}s  {:10.0f} pairs/s".format(serial_time, n_pairs / serial_time))
+
+    reference = None
+    for workers in worker_counts:
+        storeDir = os.path.join(workDir, 'parallel_{}'.format(workers))
+        start = time.time()
+        store = buildPairStore(shards, storeDir, tokenizer, max_length, workers=workers)
+        elapsed = time.time() - start
+        if reference is None:
+            reference = store
+        print("  batched, {:2d} proc  : {:8.2f}s  {:10.0f} pairs/s  x{:.2f} vs serial  same order: {}".format(
+            workers, elapsed, len(store) / elapsed, serial_time / elapsed, sameStore(store, reference)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', default=os.path.join('/home/dilab/tmp/', 'cornell_movie_dialogs_corpus'))
+    parser.add_argument('--tokenizer', default='bert-large-uncased')
+    parser.add_argument('--max_length', type=int, default=10)
+    parser.add_argument('--scale', type=int, nargs='+', default=[1, 10])
+    parser.add_argument('--workers', type=int, nargs='+', default=None)
+    args = parser.parse_args()
+
+    from transformers import BertTokenizer
+    tokenizer = BertTokenizer.from_pretrained(args.tokenizer, do_lower_case=False)
+    worker_counts = args.workers or sorted({1, 2, 4, 8, os.cpu_count()} & set(range(1, os.cpu_count() + 1)))
+
+    workDir = tempfile.mkdtemp(prefix='bench_prepare_')
+    try:
+        for scale in args.scale:
+            corpus = args.corpus
+            if scale > 1:
+                corpus = makeSyntheticCorpus(args.corpus, scale, os.path.join(workDir, 'x{}'.format(scale), 'corpus'))
+            print("corpus x{} ({})".format(scale, corpus))
+            benchCorpus(corpus, tokenizer, args.max_length, worker_counts, os.path.join(workDir, 'x{}'.format(scale)))
+    finally:
+        shutil.rmtree(workDir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# int8 동적 양자화 (quantize.py) : hidden_size별 모델 크기, 불러오는 시간, 응답 지연 시간, fp32와의 토큰 일치율
+#   python -m benchmarks.bench_quantize --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store \
+#       --tokenizer bert-large-uncased --hidden_sizes 768 1024
+# 스크립트와 같은 형식의 checkpoint를 무작위 초기화 모델로 만들어 씁니다 (학습한 checkpoint는 quantize.py를 직접 실행)
+# 단어집합은 len(tokenizer.vocab) 전체입니다
+
+import argparse
+import os
+import tempfile
+import time
+
+import torch
+import torch.nn as nn
+
+from pair_store import PairStore
+from quantize import loadCheckpoint, loadQuantized, moduleBytes, quantizeModel, replyLatency, saveQuantized, tokenAgreement
+from seq2seq import EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+from vocab import Voc
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--tokenizer', default='bert-large-uncased') # 이름 또는 vocab.txt 경로
+    parser.add_argument('--hidden_sizes', type=int, nargs='+', default=[768, 1024])
+    parser.add_argument('--n_prompts', type=int, default=100)
+    parser.add_argument('--max_length', type=int, default=10)
+    args = parser.parse_args()
+
+    from transformers import BertTokenizer
+    if args.tokenizer.endswith('.txt'):
+        tokenizer = BertTokenizer(args.tokenizer)
+    else:
+        tokenizer = BertTokenizer.from_pretrained(args.tokenizer)
+    voc = Voc('bench', tokenizer)
+    store = PairStore(args.store)
+    prompts = [store.inputIds(i).tolist() for i in range(min(args.n_prompts, len(store)))]
+    torch.set_grad_enabled(False)
+
+    directory = tempfile.mkdtemp()
+    for hidden_size in args.hidden_sizes:
+        torch.manual_seed(0)
+        embedding = nn.Embedding(voc.num_words, hidden_size)
+        encoder = EncoderRNN(hidden_size, embedding, 2, 0.1)
+        decoder = LuongAttnDecoderRNN('dot', embedding, hidden_size, voc.num_words, 2, 0.1)
+        checkpoint = os.path.join(directory, '{}_checkpoint.tar'.format(hidden_size))
+        torch.save({'en': encoder.state_dict(), 'de': decoder.state_dict(), 'embedding': embedding.state_dict(),
+                    'voc_dict': voc.__dict__, 'output_head': 'linear', 'tie_embedding': False}, checkpoint)
+
+        for embedding_precision in ['int8', 'fp32']:
+            start = time.time()
+            encoder, decoder, _, config = loadCheckpoint(checkpoint)
+            fp32_load = time.time() - start
+            reference = GreedySearchDecoder(encoder, decoder, tokenizer.cls_token_id, tokenizer.sep_token_id)
+            artifact = os.path.join(directory, '{}_{}.pt'.format(hidden_size, embedding_precision))
+            saveQuantized(artifact, *quantizeModel(encoder, decoder, embedding_precision), voc, config)
+            start = time.time()
+            searcher, _ = loadQuantized(artifact)
+            int8_load = time.time() - start
+
+            token_agreement, reply_agreement = tokenAgreement(reference, searcher, prompts, args.max_length)
+            print("hidden {:4d} embedding {}  fp32 {:6.1f}MB load {:5.2f}s reply {:6.1f} ms | "
+                  "int8 {:6.1f}MB load {:5.2f}s reply {:6.1f} ms | token agreement {:.3f}, identical replies {:.3f}".format(
+                      hidden_size, embedding_precision, moduleBytes(encoder, decoder) / 2 ** 20, fp32_load,
+                      replyLatency(reference, prompts, args.max_length) * 1e3, os.path.getsize(artifact) / 2 ** 20,
+                      int8_load, replyLatency(searcher, prompts, args.max_length) * 1e3, token_agreement, reply_agreement))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 무작위 배치 / 길이 버킷 배치 / 토큰 예산 배치의 패딩 비율과 학습 처리량(tokens/sec)을 비교합니다
+#   python -m benchmarks.bench_sampler --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store
+# tokens/sec는 패딩을 제외한 실제 토큰 수 기준이며, 스크립트와 같은 모양(임베딩 + 양방향 GRU 인코더 +
+# GRU 디코더 + 어휘 크기 출력층)의 작은 모델로 teacher forcing 학습 단계를 돌려 측정합니다
+
+import argparse
+import time
+
+import numpy as np
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from batching import BucketBatchPlan, RandomBatchPlan, paddingRatio
+from pair_store import PairStore
+
+
+class ProxySeq2Seq(nn.Module):
+    def __init__(self, vocab_size, hidden_size):
+        super(ProxySeq2Seq, self).__init__()
+        self.embedding = nn.Embedding(vocab_size, hidden_size)
+        self.encoder = nn.GRU(hidden_size, hidden_size, 2, bidirectional=True)
+        self.decoder = nn.GRU(hidden_size, hidden_size, 2)
+        self.out = nn.Linear(hidden_size, vocab_size)
+
+    def forward(self, inp, target):
+        _, hidden = self.encoder(self.embedding(inp))
+        outputs, _ = self.decoder(self.embedding(target[:-1]), hidden[:2].contiguous())
+        return self.out(outputs)
+
+
+def padBatch(ids, offsets, lengths, index):
+    batch = np.zeros((int(lengths[index].max()), len(index)), dtype=np.int64)
+    for j, i in enumerate(index):
+        batch[:lengths[i], j] = ids[offsets[i]:offsets[i + 1]]
+    return torch.from_numpy(batch)
+
+
+def run(name, plan, store, model, optimizer, n_batches, warmup=3):
+    input_lengths, target_lengths = store.inputLengths(), store.targetLengths()
+    batches = [np.asarray(plan(i)) for i in range(1, n_batches + warmup + 1)]
+    in_pad = paddingRatio([input_lengths[b] for b in batches])
+    tgt_pad = paddingRatio([target_lengths[b] for b in batches])
+    tokens = 0
+    for step, index in enumerate(batches):
+        if step == warmup:
+            start = time.time()
+        inp = padBatch(store.input_ids, store.input_offsets, input_lengths, index)
+        target = padBatch(store.target_ids, store.target_offsets, target_lengths, index)
+        logits = model(inp, target)
+        mask = target[1:] != 0
+        loss = F.cross_entropy(logits[mask], target[1:][mask])
+        optimizer.zero_grad()
+        loss.backward()
+        optimizer.step()
+        if step >= warmup:
+            tokens += int(input_lengths[index].sum() + target_lengths[index].sum())
+    elapsed = time.time() - start
+    print("{:<28s} padding(input) {:5.1f}%  padding(target) {:5.1f}%  {:8.0f} tokens/s  {:6.1f} pairs/batch".format(
+        name, in_pad * 100, tgt_pad * 100, tokens / elapsed,
+        np.mean([len(b) for b in batches[warmup:]])))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--max_tokens', type=int, default=None, help='기본값 : 무작위 배치의 평균 (패딩 포함) 토큰 수')
+    parser.add_argument('--hidden_size', type=int, default=256)
+    parser.add_argument('--n_batches', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    store = PairStore(args.store)
+    input_lengths, target_lengths = store.inputLengths(), store.targetLengths()
+    vocab_size = int(max(store.input_ids.max(), store.target_ids.max())) + 1
+    print("pairs: {}; mean input length {:.1f}; mean target length {:.1f}".format(
+        len(store), input_lengths.mean(), target_lengths.mean()))
+
+    random_plan = RandomBatchPlan(len(store), args.batch_size, args.seed)
+    max_tokens = args.max_tokens
+    if max_tokens is None:
+        sample = [np.asarray(random_plan(i)) for i in range(1, 101)]
+        max_tokens = int(np.mean([input_lengths[b].max() * len(b) + target_lengths[b].max() * len(b) for b in sample]))
+    plans = [
+        ('random', random_plan),
+        ('bucket', BucketBatchPlan(input_lengths, target_lengths, args.batch_size, args.seed)),
+        ('bucket, max_tokens={}'.format(max_tokens),
+         BucketBatchPlan(input_lengths, target_lengths, None, args.seed, max_tokens=max_tokens)),
+    ]
+    for name, plan in plans:
+        torch.manual_seed(args.seed)
+        model = ProxySeq2Seq(vocab_size, args.hidden_size)
+        optimizer = torch.optim.Adam(model.parameters(), lr=1e-4)
+        run(name, plan, store, model, optimizer, args.n_batches)
+
+
+if __name__ == '__main__':
+    main()
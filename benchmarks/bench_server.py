@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 채팅 서버 지연 시간 p50/p99 vs 초당 요청 수(QPS) : micro-batch vs 한 번에 요청 하나 (max_batch_size=1)
+#   python -m benchmarks.bench_server --hidden_size 512 --n_words 30000 --qps 5 10 20 40
+# 무작위 초기화 모델(chat_server.demoModel)로 오프라인에서 실행합니다
+# 요청은 포아송 과정으로 도착하고(open loop), 요청마다 새 HTTP 연결로 POST /chat을 보냅니다
+# 같은 프로세스의 이벤트 루프에서 서버와 부하 발생기를 같이 실행합니다
+# 디코더가 쉬는 시간이 있는 낮은 QPS에서는 micro-batch가 한 번에 하나보다 빠르지 않습니다 (max_wait는 부하가 높을 때만 씀)
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from chat_server import ChatServer, MicroBatcher, batchReplies, demoModel
+
+
+async def post(port, text):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    body = json.dumps({'text': text}).encode()
+    writer.write(b'POST /chat HTTP/1.1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n' % len(body) + body)
+    await writer.drain()
+    await reader.read()
+    writer.close()
+
+
+async def load(evaluate, max_batch_size, max_wait, qps, n_requests, sentences):
+    batcher = MicroBatcher(evaluate, max_batch_size, max_wait)
+    server = await ChatServer(batcher, '127.0.0.1', 0).start()
+    port = server.sockets[0].getsockname()[1]
+    rng = random.Random(0)
+    latencies = []
+
+    async def timed(text):
+        start = time.time()
+        await post(port, text)
+        latencies.append(time.time() - start)
+
+    tasks = []
+    for i in range(n_requests):
+        tasks.append(asyncio.ensure_future(timed(sentences[i % len(sentences)])))
+        await asyncio.sleep(rng.expovariate(qps))
+    await asyncio.gather(*tasks)
+    batcher.task.cancel()
+    server.close()
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)], batcher.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hidden_size', type=int, default=512)
+    parser.add_argument('--n_words', type=int, default=30000)
+    parser.add_argument('--max_length', type=int, default=10)
+    parser.add_argument('--qps', type=float, nargs='+', default=[5, 10, 20, 40])
+    parser.add_argument('--n_requests', type=int, default=200)
+    parser.add_argument('--max_batch_size', type=int, default=16)
+    parser.add_argument('--max_wait', type=float, default=0.005)
+    args = parser.parse_args()
+
+    searcher, voc = demoModel(args.hidden_size, args.n_words)
+    rng = random.Random(0)
+    sentences = [' '.join('tok{}'.format(rng.randrange(args.n_words)) for _ in range(rng.randint(3, 12)))
+                 for _ in range(100)]
+    evaluate = lambda batch: batchReplies(searcher, voc, batch, args.max_length)
+    evaluate(sentences[:2])
+
+    for qps in args.qps:
+        for name, max_batch_size, max_wait in [('one at a time', 1, 0.0),
+                                               ('micro-batch', args.max_batch_size, args.max_wait)]:
+            p50, p99, stats = asyncio.run(load(evaluate, max_batch_size, max_wait, qps, args.n_requests, sentences))
+            print("qps {:5.1f}  {:<14s} p50 {:8.1f} ms  p99 {:8.1f} ms  mean batch {:5.2f}  max queue {:3d}".format(
+                qps, name, p50 * 1e3, p99 * 1e3, stats['mean_batch_size'], stats['max_queue_depth']))
+
+
+if __name__ == '__main__':
+    main()
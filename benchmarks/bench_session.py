@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 여러 턴 대화의 턴마다 지연 시간 : 매 턴 지금까지의 모든 질문을 이어 붙여 처음부터 다시 인코딩 vs
+# SessionState (새 문장만 인코딩해서 context 뒤에 붙이고, 이전 턴의 디코더 hidden으로 인코더 시작)
+#   python -m benchmarks.bench_session --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store
+# 두 방식 모두 지금까지의 모든 턴에 attention하고, 무작위 모델이라 매 턴 max_length 단계를 디코딩합니다
+# 세션 크기는 SessionState.nbytes (context + 디코더 hidden)입니다
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+
+from batching import RandomBatchPlan
+from pair_store import PairStore
+from seq2seq import EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+from session_store import SessionState
+
+SOS_token = 101
+EOS_token = 102
+
+
+def timeTurn(searcher, indexes, max_length, session=None):
+    start = time.time()
+    for _ in searcher.stream(indexes, max_length, session):
+        pass
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--hidden_size', type=int, default=1024)
+    parser.add_argument('--vocab_size', type=int, default=30522)
+    parser.add_argument('--n_turns', type=int, default=12)
+    parser.add_argument('--n_conversations', type=int, default=5)
+    parser.add_argument('--max_length', type=int, default=10)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    embedding = nn.Embedding(args.vocab_size, args.hidden_size)
+    encoder = EncoderRNN(args.hidden_size, embedding, 2, 0.1).eval()
+    decoder = LuongAttnDecoderRNN('dot', embedding, args.hidden_size, args.vocab_size, 2, 0.1).eval()
+    searcher = GreedySearchDecoder(encoder, decoder, SOS_token, EOS_token)
+    store = PairStore(args.store)
+    plan = RandomBatchPlan(len(store), args.n_turns, seed=0)
+    conversations = [[store.inputIds(i).tolist() for i in plan(c)] for c in range(1, args.n_conversations + 1)]
+    timeTurn(searcher, conversations[0][0], args.max_length)
+
+    naive = [0.0] * args.n_turns
+    cached = [0.0] * args.n_turns
+    context = [0] * args.n_turns
+    nbytes = [0] * args.n_turns
+    for turns in conversations:
+        session = SessionState()
+        history = []
+        for t, indexes in enumerate(turns):
+            history += indexes
+            naive[t] += timeTurn(searcher, history, args.max_length)
+            cached[t] += timeTurn(searcher, indexes, args.max_length, session)
+            session.commit()
+            context[t] += len(history)
+            nbytes[t] += session.nbytes()
+
+    n = len(conversations)
+    print("turn  context tokens  re-encode ms  session ms  speedup  session KB")
+    for t in range(args.n_turns):
+        print("{:4d}  {:14.1f}  {:12.1f}  {:10.1f}  {:6.2f}x  {:10.1f}".format(
+            t + 1, context[t] / n, naive[t] / n * 1e3, cached[t] / n * 1e3, naive[t] / cached[t], nbytes[t] / n / 2 ** 10))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 응답의 첫 토큰까지의 시간(TTFT)과 전체 시간 : 이전 evaluateInput (decodeBatch로 max_length 단계를 모두 만든 뒤
+# convert_ids_to_tokens + '##' 합치기) vs GreedySearchDecoder.stream + Voc.detokenize
+#   python -m benchmarks.bench_stream --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store --hidden_size 1024
+# 무작위 초기화 모델은 [SEP]를 거의 내지 않으므로 두 방식 모두 max_length 단계를 실행합니다
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+
+from batching import RandomBatchPlan
+from pair_store import PairStore
+from seq2seq import EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+from vocab import Voc
+
+
+def previousReply(searcher, voc, tokenizer, indexes, max_length):
+    # 이전 evaluate + evaluateInput의 출력 부분 (모든 토큰이 나온 뒤 한 번에 합칩니다)
+    tokens, scores = searcher.decodeBatch([indexes], max_length)[0]
+    words = tokenizer.convert_ids_to_tokens(voc.toTokenIds(tokens).tolist())
+    result = []
+    for word in words:
+        if word in ('[CLS]', '[SEP]', '[PAD]'):
+            continue
+        if word.startswith('##') and result:
+            result[-1] += word[2:]
+        else:
+            result.append(word)
+    return ' '.join(result)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--tokenizer', default='bert-large-uncased') # 이름 또는 vocab.txt 경로
+    parser.add_argument('--hidden_size', type=int, default=1024)
+    parser.add_argument('--n_sentences', type=int, default=20)
+    parser.add_argument('--max_lengths', type=int, nargs='+', default=[10, 30])
+    args = parser.parse_args()
+
+    from transformers import BertTokenizer
+    if args.tokenizer.endswith('.txt'):
+        tokenizer = BertTokenizer(args.tokenizer)
+    else:
+        tokenizer = BertTokenizer.from_pretrained(args.tokenizer)
+    store = PairStore(args.store)
+    voc = Voc('bench', tokenizer).buildVocab(store)
+
+    torch.manual_seed(0)
+    embedding = nn.Embedding(voc.num_words, args.hidden_size)
+    encoder = EncoderRNN(args.hidden_size, embedding, 2, 0.1).eval()
+    decoder = LuongAttnDecoderRNN('dot', embedding, args.hidden_size, voc.num_words, 2, 0.1).eval()
+    searcher = GreedySearchDecoder(encoder, decoder, int(voc.toIndex(tokenizer.cls_token_id)))
+    sentences = [voc.toIndex(store.inputIds(i)).tolist()
+                 for i in RandomBatchPlan(len(store), args.n_sentences, seed=0)(1)]
+    previousReply(searcher, voc, tokenizer, sentences[0], 2)
+
+    for max_length in args.max_lengths:
+        before = 0
+        first, total = 0, 0
+        for indexes in sentences:
+            start = time.time()
+            previousReply(searcher, voc, tokenizer, indexes, max_length)
+            before += time.time() - start
+
+            start = time.time()
+            first_token = None
+            for _ in voc.detokenize(token for token, score in searcher.stream(indexes, max_length)):
+                if first_token is None:
+                    first_token = time.time() - start
+            elapsed = time.time() - start
+            total += elapsed
+            first += elapsed if first_token is None else first_token
+        n = len(sentences)
+        print("max_length {:3d}  previous: first token = total {:7.1f} ms   "
+              "stream: first token {:6.1f} ms ({:5.1f}x sooner), total {:7.1f} ms".format(
+                  max_length, before / n * 1e3, first / n * 1e3, before / first, total / n * 1e3))
+
+
+if __name__ == '__main__':
+    main()
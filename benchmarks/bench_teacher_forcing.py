@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# teacher forcing 학습 단계 비교 : 단계마다 decoder(...) + maskNLLLoss를 부르는 반복문 vs decoder.forwardSequence
+#   python -m benchmarks.bench_teacher_forcing --hidden_size 768 --batch_size 64
+# 먼저 dropout 없이 두 방식의 loss/기울기가 같은지 확인한 뒤 steps/s를 잽니다
+# 인코더 출력은 무작위 텐서를 씁니다 (디코더 쪽 비용만 비교)
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+from seq2seq import LuongAttnDecoderRNN, maskNLLLossSequence
+
+SOS_token = 101
+
+
+def maskNLLLoss(inp, target, mask):
+    # 단계별 loss (학습은 maskNLLLossSequence를 씀, 비교용)
+    # inp : 디코더 출력 logits [batch_size, voc.num_words]. log_softmax + NLL을 한 번에 계산합니다 (확률 텐서 없음)
+    nTotal = mask.sum()
+    crossEntropy = F.cross_entropy(inp, target, reduction='none')
+    loss = crossEntropy.masked_select(mask).mean()
+    return loss, nTotal.item()
+
+
+def makeBatch(vocab_size, hidden_size, batch_size, src_len, tgt_len, n_layers):
+    encoder_outputs = torch.randn(src_len, batch_size, hidden_size)
+    encoder_hidden = torch.randn(n_layers, batch_size, hidden_size)
+    lengths = torch.randint(1, tgt_len + 1, (batch_size,))
+    lengths[0] = tgt_len
+    mask = torch.arange(tgt_len)[:, None] < lengths[None, :]
+    target = torch.randint(1, vocab_size, (tgt_len, batch_size)) * mask
+    return encoder_outputs, encoder_hidden, target, mask
+
+
+def stepLoss(decoder, encoder_outputs, encoder_hidden, target, mask):
+    decoder_input = torch.full((1, target.size(1)), SOS_token, dtype=torch.long)
+    decoder_hidden = encoder_hidden
+    loss = 0
+    print_losses = []
+    n_totals = 0
+    for t in range(target.size(0)):
+        decoder_output, decoder_hidden = decoder(decoder_input, decoder_hidden, encoder_outputs)
+        decoder_input = target[t].view(1, -1)
+        mask_loss, nTotal = maskNLLLoss(decoder_output, target[t], mask[t])
+        loss += mask_loss
+        print_losses.append(mask_loss.item() * nTotal)
+        n_totals += nTotal
+    return loss, sum(print_losses) / n_totals
+
+
+def sequenceLoss(decoder, encoder_outputs, encoder_hidden, target, mask):
+    decoder_input = torch.full((1, target.size(1)), SOS_token, dtype=torch.long)
+    decoder_inputs = torch.cat((decoder_input, target[:-1]), 0)
+    decoder_output, _ = decoder.forwardSequence(decoder_inputs, encoder_hidden, encoder_outputs)
+    loss, mean_loss = maskNLLLossSequence(decoder.nllLoss(decoder_output, target), mask)
+    return loss, mean_loss.item()
+
+
+def gradients(decoder, lossFn, batch):
+    decoder.zero_grad()
+    loss, print_loss = lossFn(decoder, *batch)
+    loss.backward()
+    return loss.item(), print_loss, [p.grad.clone() for p in decoder.parameters()]
+
+
+def checkEquivalence(args):
+    for attn_model in ['dot', 'general', 'concat']:
+        torch.manual_seed(0)
+        embedding = nn.Embedding(args.vocab_size, args.hidden_size)
+        decoder = LuongAttnDecoderRNN(attn_model, embedding, args.hidden_size, args.vocab_size, args.n_layers, 0)
+        if attn_model == 'concat':
+            nn.init.normal_(decoder.attn.v)
+        batch = makeBatch(args.vocab_size, args.hidden_size, 8, args.src_len, args.tgt_len, args.n_layers)
+        step_loss, step_print, step_grads = gradients(decoder, stepLoss, batch)
+        seq_loss, seq_print, seq_grads = gradients(decoder, sequenceLoss, batch)
+        grad_diff = max(float((a - b).abs().max()) for a, b in zip(step_grads, seq_grads))
+        print("{:<7s} loss {:.6f} vs {:.6f}; print loss {:.6f} vs {:.6f}; max grad diff {:.2e}".format(
+            attn_model, step_loss, seq_loss, step_print, seq_print, grad_diff))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--hidden_size', type=int, default=768)
+    parser.add_argument('--vocab_size', type=int, default=30522)
+    parser.add_argument('--n_layers', type=int, default=2)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--src_len', type=int, default=12)
+    parser.add_argument('--tgt_len', type=int, default=12)
+    parser.add_argument('--n_steps', type=int, default=5)
+    args = parser.parse_args()
+
+    checkEquivalence(args)
+
+    torch.manual_seed(0)
+    embedding = nn.Embedding(args.vocab_size, args.hidden_size)
+    decoder = LuongAttnDecoderRNN('dot', embedding, args.hidden_size, args.vocab_size, args.n_layers, 0.1)
+    batch = makeBatch(args.vocab_size, args.hidden_size, args.batch_size, args.src_len, args.tgt_len, args.n_layers)
+    for name, lossFn in [('step loop', stepLoss), ('forwardSequence', sequenceLoss)]:
+        gradients(decoder, lossFn, batch)
+        start = time.time()
+        for _ in range(args.n_steps):
+            gradients(decoder, lossFn, batch)
+        elapsed = (time.time() - start) / args.n_steps
+        print("{:<16s} {:8.1f} ms/step ({:6.2f} steps/s)".format(name, elapsed * 1e3, 1 / elapsed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# eager (checkpoint + GreedySearchDecoder) vs TorchScript 파일 (export_script.py + script_chat.py)
+# : 새 파이썬 프로세스에서 import부터 첫 응답까지의 시간 (cold start), 응답 하나의 지연 시간, 응답이 같은 비율
+#   python -m benchmarks.bench_torchscript --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store \
+#       --tokenizer bert-large-uncased --hidden_sizes 768 1024
+# 스크립트와 같은 형식의 checkpoint를 무작위 초기화 모델로 만들어 씁니다 (bench_quantize와 같음)
+# eager cold start는 checkpoint를 불러오는 최소 경로(quantize.loadCheckpoint, voc_dict 안의 BertTokenizer 때문에
+# transformers를 import)이고, python -m chatbot chat의 시작 경로와 같습니다
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import torch
+import torch.nn as nn
+
+from export_script import exportScripted
+from pair_store import PairStore
+from quantize import loadCheckpoint, quantizeModel
+from seq2seq import EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+from vocab import Voc
+
+EAGER_START = """
+import time
+start = time.time()
+from quantize import loadCheckpoint
+from seq2seq import GreedySearchDecoder
+encoder, decoder, voc, _ = loadCheckpoint({path!r})
+tokenizer = voc.tokenizer
+searcher = GreedySearchDecoder(encoder, decoder, int(voc.toIndex(tokenizer.cls_token_id)), int(voc.toIndex(tokenizer.sep_token_id)))
+searcher.decodeBatch([voc.toIndex(tokenizer.encode({sentence!r})).tolist()], 10)
+print(time.time() - start)
+"""
+
+SCRIPTED_START = """
+import time
+start = time.time()
+from script_chat import ScriptedChatbot
+ScriptedChatbot({path!r}).reply({sentence!r})
+print(time.time() - start)
+"""
+
+
+def coldStart(code, repeats):
+    # 새 프로세스에서 import부터 첫 응답까지 (인터프리터 자체의 시작 시간은 뺌)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    times = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def replyLatency(reply, prompts):
+    reply(prompts[0])
+    start = time.time()
+    for prompt in prompts:
+        reply(prompt)
+    return (time.time() - start) / len(prompts)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--tokenizer', default='bert-large-uncased') # 이름 또는 vocab.txt 경로
+    parser.add_argument('--hidden_sizes', type=int, nargs='+', default=[768, 1024])
+    parser.add_argument('--n_prompts', type=int, default=100)
+    parser.add_argument('--max_length', type=int, default=10)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    from transformers import BertTokenizer
+    if args.tokenizer.endswith('.txt'):
+        tokenizer = BertTokenizer(args.tokenizer)
+    else:
+        tokenizer = BertTokenizer.from_pretrained(args.tokenizer)
+    voc = Voc('bench', tokenizer)
+    store = PairStore(args.store)
+    prompts = [store.inputIds(i).tolist() for i in range(min(args.n_prompts, len(store)))]
+    sentence = 'how are you ?'
+    torch.set_grad_enabled(False)
+
+    directory = tempfile.mkdtemp()
+    for hidden_size in args.hidden_sizes:
+        torch.manual_seed(0)
+        embedding = nn.Embedding(voc.num_words, hidden_size)
+        encoder = EncoderRNN(hidden_size, embedding, 2, 0.1)
+        decoder = LuongAttnDecoderRNN('dot', embedding, hidden_size, voc.num_words, 2, 0.1)
+        checkpoint = os.path.join(directory, '{}_checkpoint.tar'.format(hidden_size))
+        torch.save({'en': encoder.state_dict(), 'de': decoder.state_dict(), 'embedding': embedding.state_dict(),
+                    'voc_dict': voc.__dict__}, checkpoint)
+
+        encoder, decoder, _, _ = loadCheckpoint(checkpoint)
+        searcher = GreedySearchDecoder(encoder, decoder, tokenizer.cls_token_id, tokenizer.sep_token_id)
+        eager_replies = [tokens for tokens, _ in searcher.decodeBatch(prompts, args.max_length)]
+        print("hidden {:4d} eager            cold start {:5.2f}s  reply {:6.1f} ms".format(
+            hidden_size, coldStart(EAGER_START.format(path=checkpoint, sentence=sentence), args.repeats),
+            replyLatency(lambda p: searcher.decodeBatch([p], args.max_length), prompts) * 1e3))
+
+        for name in ['torchscript', 'torchscript int8']:
+            scripted_encoder, scripted_decoder = encoder, decoder
+            if name == 'torchscript int8':
+                # export_script.py --int8과 같이 인코더 GRU는 fp32
+                scripted_encoder, scripted_decoder = quantizeModel(encoder, decoder)
+                scripted_encoder.gru = encoder.gru
+            path = os.path.join(directory, '{}_{}.pt'.format(hidden_size, name.replace(' ', '_')))
+            scripted = exportScripted(scripted_encoder, scripted_decoder, voc, path, args.max_length)
+
+            def reply(prompt):
+                return scripted(torch.tensor(prompt).unsqueeze(1), torch.tensor([len(prompt)]), args.max_length)[0][0]
+            same = sum(reply(p).tolist() == tokens for p, tokens in zip(prompts, eager_replies)) / len(prompts)
+            print("hidden {:4d} {:<16s} cold start {:5.2f}s  reply {:6.1f} ms  {:6.1f}MB  same replies as eager {:.3f}".format(
+                hidden_size, name, coldStart(SCRIPTED_START.format(path=path, sentence=sentence), args.repeats),
+                replyLatency(reply, prompts) * 1e3, os.path.getsize(path) / 2 ** 20, same))
+
+
+if __name__ == '__main__':
+    main()
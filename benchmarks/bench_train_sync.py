@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 학습 단계마다 장치 -> host 동기화 횟수와 시간 : 이전 train (free-running 입력을 파이썬 리스트로 다시 만들고
+# 단계마다 mask_loss.item()) vs 장치에 둔 free-running 입력/loss (print_every마다 한 번만 읽음)
+#   python -m benchmarks.bench_train_sync --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store
+# 동기화 횟수는 torch.profiler의 aten::_local_scalar_dense (item(), 0차원 텐서 -> 파이썬 수, bool(텐서))
+# 호출 수입니다. CPU에서도 같은 연산이 기록되고, CUDA에서는 이 연산마다 스트림이 동기화됩니다
+# 학습 단계는 forward + loss + backward까지이고 (optimizer 제외) 항상 free-running(teacher forcing 미사용)입니다
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.profiler import ProfilerActivity, profile
+
+from batching import PairCollator, RandomBatchPlan
+from benchmarks.bench_teacher_forcing import maskNLLLoss
+from pair_store import PairStore
+from seq2seq import EncoderRNN, LuongAttnDecoderRNN, maskNLLLossSequence
+
+SOS_token = 101
+
+
+def previousStep(encoder, decoder, batch, teacher_forcing_ratio):
+    # 이전 train의 teacher forcing 미사용 부분. trainIters에 float를 돌려줍니다
+    input_variable, lengths, target_variable, mask, max_target_len = batch
+    batch_size = input_variable.size(1)
+    encoder_outputs, encoder_hidden = encoder(input_variable, lengths)
+    decoder_input = torch.LongTensor([[SOS_token for _ in range(batch_size)]])
+    decoder_hidden = encoder_hidden[:decoder.n_layers]
+    attn_keys = decoder.attn.precompute(encoder_outputs, lengths)
+    loss = 0
+    print_losses = []
+    n_totals = 0
+    for t in range(max_target_len):
+        decoder_output, decoder_hidden = decoder(decoder_input, decoder_hidden, encoder_outputs, attn_keys)
+        _, topi = decoder_output.topk(1)
+        decoder_input = torch.LongTensor([[topi[i][0] for i in range(batch_size)]])
+        mask_loss, nTotal = maskNLLLoss(decoder_output, target_variable[t], mask[t])
+        loss += mask_loss
+        print_losses.append(mask_loss.item() * nTotal)
+        n_totals += nTotal
+    loss.backward()
+    return sum(print_losses) / n_totals
+
+
+def deviceStep(encoder, decoder, batch, teacher_forcing_ratio):
+    # 지금의 train (teacher_forcing_ratio > 0이면 'element' scheduled sampling). 장치 위의 텐서를 돌려줍니다
+    input_variable, lengths, target_variable, mask, max_target_len = batch
+    batch_size = input_variable.size(1)
+    encoder_outputs, encoder_hidden = encoder(input_variable, lengths)
+    decoder_input = torch.full((1, batch_size), SOS_token, dtype=torch.long)
+    decoder_hidden = encoder_hidden[:decoder.n_layers]
+    attn_keys = decoder.attn.precompute(encoder_outputs, lengths)
+    crossEntropy = []
+    for t in range(max_target_len):
+        decoder_output, decoder_hidden = decoder(decoder_input, decoder_hidden, encoder_outputs, attn_keys)
+        decoder_input = decoder_output.argmax(dim=1)
+        if teacher_forcing_ratio > 0:
+            use_target = torch.rand(batch_size) < teacher_forcing_ratio
+            decoder_input = torch.where(use_target, target_variable[t], decoder_input)
+        decoder_input = decoder_input.unsqueeze(0)
+        crossEntropy.append(F.cross_entropy(decoder_output, target_variable[t], reduction='none'))
+    loss, mean_loss = maskNLLLossSequence(torch.stack(crossEntropy), mask)
+    loss.backward()
+    return mean_loss.detach()
+
+
+def countSyncs(step, *args):
+    with profile(activities=[ProfilerActivity.CPU]) as prof:
+        step(*args)
+    return sum(1 for e in prof.events() if e.name == 'aten::_local_scalar_dense')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--hidden_size', type=int, default=512)
+    parser.add_argument('--vocab_size', type=int, default=30522)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--n_steps', type=int, default=5)
+    parser.add_argument('--print_every', type=int, default=100)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    embedding = nn.Embedding(args.vocab_size, args.hidden_size)
+    encoder = EncoderRNN(args.hidden_size, embedding, 2, 0.0)
+    decoder = LuongAttnDecoderRNN('dot', embedding, args.hidden_size, args.vocab_size, 2, 0.0)
+    store = PairStore(args.store)
+    collator = PairCollator(store)
+    plan = RandomBatchPlan(len(store), args.batch_size, seed=0)
+    batches = [collator(plan(i)) for i in range(1, args.n_steps + 2)]
+
+    # 같은 모델/배치에서 두 방식의 loss가 같은지 확인합니다
+    before = previousStep(encoder, decoder, batches[0], 0.0)
+    after = float(deviceStep(encoder, decoder, batches[0], 0.0))
+    print("loss previous {:.6f}  device-resident {:.6f}".format(before, after))
+
+    for name, step, ratio in [('previous', previousStep, 0.0), ('device-resident', deviceStep, 0.0),
+                              ('scheduled sampling 0.5', deviceStep, 0.5)]:
+        syncs = countSyncs(step, encoder, decoder, batches[0], ratio)
+        start = time.time()
+        for batch in batches[1:]:
+            step(encoder, decoder, batch, ratio)
+        elapsed = (time.time() - start) / args.n_steps
+        # 이전 방식은 trainIters에서 더할 때 동기화가 없고, 지금은 print_every마다 .item() 한 번
+        per_step = syncs + (1.0 / args.print_every if step is deviceStep else 0.0)
+        print("{:<24s} host syncs/step {:6.2f} (max_target_len {})  {:7.1f} ms/step".format(
+            name, per_step, batches[0][4], elapsed * 1e3))
+
+
+if __name__ == '__main__':
+    main()
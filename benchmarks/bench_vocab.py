@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 압축 단어집합(Voc.buildVocab) 크기에 따른 임베딩/출력층 메모리와 학습 단계 시간
+#   python -m benchmarks.bench_vocab --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store --hidden_size 1024
+# 'full'은 len(tokenizer.vocab) 전체를 쓰는 기존 방식입니다
+# 학습 단계는 무작위 인코더 출력 + teacher forcing 디코더(forwardSequence)의 forward/backward/Adam step입니다
+
+import argparse
+import time
+
+import torch
+import torch.nn as nn
+from torch import optim
+
+from batching import PairCollator, RandomBatchPlan
+from pair_store import PairStore
+from seq2seq import LuongAttnDecoderRNN, maskNLLLossSequence
+from vocab import Voc
+
+
+def trainStep(decoder, optimizer, batch, hidden_size):
+    _, _, target, mask, _ = batch
+    batch_size = target.size(1)
+    encoder_outputs = torch.randn(10, batch_size, hidden_size)
+    decoder_hidden = torch.randn(decoder.n_layers, batch_size, hidden_size)
+    decoder_inputs = torch.cat((torch.zeros(1, batch_size, dtype=torch.long), target[:-1]), 0)
+    optimizer.zero_grad()
+    output, _ = decoder.forwardSequence(decoder_inputs, decoder_hidden, encoder_outputs)
+    loss, _ = maskNLLLossSequence(decoder.nllLoss(output, target), mask)
+    loss.backward()
+    optimizer.step()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--store', required=True)
+    parser.add_argument('--tokenizer', default='bert-large-uncased') # 이름 또는 vocab.txt 경로
+    parser.add_argument('--hidden_size', type=int, default=1024)
+    parser.add_argument('--batch_size', type=int, default=64)
+    parser.add_argument('--min_counts', type=int, nargs='+', default=[1, 3, 10])
+    parser.add_argument('--n_steps', type=int, default=5)
+    args = parser.parse_args()
+
+    from transformers import BertTokenizer
+    if args.tokenizer.endswith('.txt'):
+        tokenizer = BertTokenizer(args.tokenizer)
+    else:
+        tokenizer = BertTokenizer.from_pretrained(args.tokenizer)
+    store = PairStore(args.store)
+    plan = RandomBatchPlan(len(store), args.batch_size, seed=0)
+
+    for min_count in [None] + args.min_counts:
+        voc = Voc('bench', tokenizer)
+        if min_count is not None:
+            voc.buildVocab(store, min_count)
+        collator = PairCollator(store, 0, voc.id_map)
+        batches = [collator(plan(i)) for i in range(1, args.n_steps + 2)]
+
+        torch.manual_seed(0)
+        embedding = nn.Embedding(voc.num_words, args.hidden_size)
+        decoder = LuongAttnDecoderRNN('dot', embedding, args.hidden_size, voc.num_words, 2, 0.1)
+        optimizer = optim.Adam(decoder.parameters(), lr=5e-4)
+        trainStep(decoder, optimizer, batches[0], args.hidden_size)
+        start = time.time()
+        for batch in batches[1:]:
+            trainStep(decoder, optimizer, batch, args.hidden_size)
+        elapsed = (time.time() - start) / args.n_steps
+
+        vocab_params = embedding.weight.numel() + sum(p.numel() for p in decoder.out.parameters())
+        # 파라미터 + 기울기 + Adam 상태 2개 (fp32)
+        vocab_mb = vocab_params * 4 * 4 / 2 ** 20
+        name = 'full' if min_count is None else 'min_count={}'.format(min_count)
+        print("{:<12s} num_words {:6d}  embedding+out {:6.1f}M params ({:7.1f}MB with grads/Adam)  {:7.1f} ms/step".format(
+            name, voc.num_words, vocab_params / 1e6, vocab_mb, elapsed * 1e3))
+
+
+if __name__ == '__main__':
+    main()
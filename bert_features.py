@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 고정된(학습하지 않는) BERT 인코더 출력을 입력 토큰 id 시퀀스마다 한 번만 계산해서 저장해 두는 캐시
+#   디스크 : storeDir/features.bin 에 [길이, hidden] 행렬을 fp16/bf16(2바이트)로 이어 붙이고 np.memmap으로 읽습니다
+#            storeDir/index.pkl   : 토큰 id(bytes) -> (시작 행, 길이)
+#   메모리 : 최근에 쓴 시퀀스를 ram_budget_bytes 안에서 LRU로 들고 있습니다
+
+import copy
+import json
+import os
+import pickle
+from collections import OrderedDict
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from seq2seq import autocast
+
+FEATURE_DTYPES = {'float16': torch.float16, 'bfloat16': torch.bfloat16}
+
+
+def truncateBert(bert_model, depth):
+    # depth층까지만 실행하는 BertModel : 가중치는 bert_model과 공유하고, 모델/인코더 객체와 층 목록/config는 새로 만듭니다
+    # (호출한 쪽의 bert_model은 그대로 전체 깊이로 남습니다)
+    if depth == bert_model.config.num_hidden_layers:
+        return bert_model
+    config = copy.deepcopy(bert_model.config)
+    config.num_hidden_layers = depth
+    encoder = copy.copy(bert_model.encoder)
+    encoder._modules = OrderedDict(encoder._modules)
+    encoder.layer = nn.ModuleList(list(bert_model.encoder.layer)[:depth])
+    encoder.config = config
+    bert = copy.copy(bert_model)
+    bert._modules = OrderedDict(bert._modules)
+    bert.encoder = encoder
+    bert.config = config
+    return bert
+
+
+class BertFeatureExtractor(nn.Module):
+    # 고정된 BERT에서 디코더 attention에 쓸 인코더 출력을 뽑습니다
+    #   - batch-first 입력 + 패딩 위치를 가리는 attention mask
+    #   - torch.inference_mode (autograd 기록 없음)
+    #   - layers : 사용할 hidden layer 번호 (0 = 임베딩 출력, 1..num_hidden_layers, 음수는 뒤에서부터)
+    #     가장 깊은 layer 뒤의 층은 잘라내서 아예 실행하지 않습니다 (예: layers=[12]면 24층 중 12층까지만)
+    #   - 여러 layer를 고르면 평균(combine='mean') 또는 합(combine='sum')을 씁니다
+    #   - precision='bf16'이면 BERT를 bf16 autocast로 실행합니다 (출력은 fp32)
+    def __init__(self, bert_model, layers=(-1,), combine='mean', precision='fp32'):
+        super(BertFeatureExtractor, self).__init__()
+        n_layers = bert_model.config.num_hidden_layers
+        self.layers = sorted(set(l if l >= 0 else n_layers + 1 + l for l in layers))
+        if not self.layers or self.layers[0] < 0 or self.layers[-1] > n_layers:
+            raise ValueError(layers, 'is not a valid layer selection for a {}-layer BERT.'.format(n_layers))
+        if combine not in ['mean', 'sum']:
+            raise ValueError(combine, 'is not an appropriate layer combination.')
+        self.combine = combine
+        self.precision = precision
+        self.n_layers = n_layers
+        self.depth = self.layers[-1]
+        self.bert = truncateBert(bert_model, self.depth).eval()
+        self.hidden_size = bert_model.config.hidden_size
+
+    def identity(self):
+        # bf16로 뽑은 특징은 다른 캐시에 저장합니다 (fp32 캐시의 identity는 이전과 같음)
+        identity = {'layers': self.layers, 'combine': self.combine}
+        if self.precision != 'fp32':
+            identity['precision'] = self.precision
+        return identity
+
+    def forward(self, input_ids, attention_mask):
+        # input_ids, attention_mask : [batch, max_len] -> [batch, max_len, hidden]
+        with torch.inference_mode(), autocast(input_ids.device, self.precision):
+            outputs = self.bert(input_ids, attention_mask=attention_mask, output_hidden_states=True)
+            hidden_states = outputs.hidden_states if hasattr(outputs, 'hidden_states') else outputs[2]
+            features = hidden_states[self.layers[0]]
+            for l in self.layers[1:]:
+                features = features + hidden_states[l]
+            if self.combine == 'mean' and len(self.layers) > 1:
+                features = features / len(self.layers)
+        # inference tensor는 autograd 연산에 저장될 수 없으므로 일반 (fp32) 텐서로 복사합니다
+        return features.to(torch.float32, copy=True)
+
+    def encode(self, input_variable, lengths):
+        # input_variable : [max_len, batch] (GRU와 같은 sequence-first) -> [max_len, batch, hidden]
+        positions = torch.arange(input_variable.size(0), device=input_variable.device)
+        attention_mask = (positions[None, :] < lengths.to(input_variable.device)[:, None]).long()
+        return self(input_variable.t(), attention_mask).transpose(0, 1)
+
+
+class LRUCache:
+    # 바이트 예산을 넘으면 가장 오래 안 쓴 항목부터 버립니다
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.nbytes = 0
+        self.items = OrderedDict()
+
+    def get(self, key):
+        value = self.items.get(key)
+        if value is not None:
+            self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value, nbytes):
+        if nbytes > self.budget_bytes:
+            return
+        old = self.items.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[1]
+        self.items[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.budget_bytes:
+            _, (_, size) = self.items.popitem(last=False)
+            self.nbytes -= size
+
+    def __len__(self):
+        return len(self.items)
+
+
+class BertFeatureStore:
+    # extractor : BertFeatureExtractor
+    def __init__(self, extractor, storeDir, dtype='float16', ram_budget_bytes=1 << 30):
+        self.extractor = extractor
+        self.storeDir = storeDir
+        self.dtype = FEATURE_DTYPES[dtype]
+        self.hidden_size = extractor.hidden_size
+        self.ram = LRUCache(ram_budget_bytes)
+        self.hits = {'ram': 0, 'disk': 0, 'bert': 0}
+
+        # BERT 모델/사용 layer/저장 형식이 바뀌면 캐시를 새로 만듭니다
+        meta = {'model': getattr(extractor.bert.config, '_name_or_path', ''), 'hidden_size': self.hidden_size,
+                'dtype': dtype, 'extractor': extractor.identity()}
+        if not os.path.exists(storeDir):
+            os.makedirs(storeDir)
+        self.dataPath = os.path.join(storeDir, 'features.bin')
+        self.indexPath = os.path.join(storeDir, 'index.pkl')
+        metaPath = os.path.join(storeDir, 'meta.json')
+        old_meta = None
+        if os.path.exists(metaPath):
+            with open(metaPath) as f:
+                old_meta = json.load(f)
+        if old_meta != meta or not os.path.exists(self.indexPath):
+            open(self.dataPath, 'wb').close()
+            self.index = {}
+            with open(metaPath, 'w') as f:
+                json.dump(meta, f)
+            self.flush()
+        else:
+            with open(self.indexPath, 'rb') as f:
+                self.index = pickle.load(f)
+        # 마지막 flush 뒤에 붙인 행(프로세스가 checkpoint 사이에 죽은 경우)은 인덱스가 없으므로 잘라냅니다
+        self.n_rows = max((start + length for start, length in self.index.values()), default=0)
+        if os.path.getsize(self.dataPath) > self.n_rows * 2 * self.hidden_size:
+            os.truncate(self.dataPath, self.n_rows * 2 * self.hidden_size)
+        self.data = None
+        self.dirty = False
+
+    def flush(self):
+        # 인덱스를 디스크에 씁니다 (checkpoint를 저장할 때 같이 부르면 됩니다)
+        with open(self.indexPath + '.tmp', 'wb') as f:
+            pickle.dump(self.index, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(self.indexPath + '.tmp', self.indexPath)
+        self.dirty = False
+
+    def mapped(self, end_row):
+        # 파일이 커졌으면 memmap을 다시 엽니다
+        if self.data is None or len(self.data) < end_row:
+            self.data = np.memmap(self.dataPath, dtype=np.int16, mode='r').reshape(-1, self.hidden_size)
+        return self.data
+
+    def readDisk(self, key):
+        start, length = self.index[key]
+        rows = np.array(self.mapped(start + length)[start:start + length])
+        return torch.from_numpy(rows).view(self.dtype)
+
+    def append(self, features):
+        # features : [길이, hidden] -> 파일 끝에 붙이고 (시작 행, 길이)를 돌려줍니다
+        rows = features.to(self.dtype).cpu().contiguous().view(torch.int16).numpy()
+        with open(self.dataPath, 'ab') as f:
+            rows.tofile(f)
+        start = self.n_rows
+        self.n_rows += len(rows)
+        return start, len(rows)
+
+    def computeFeatures(self, sequences, device):
+        # 캐시에 없는 시퀀스들만 모아서 배치 우선(batch-first) + attention mask로 BERT를 한 번 실행합니다
+        max_len = max(len(s) for s in sequences)
+        ids = torch.zeros((len(sequences), max_len), dtype=torch.long)
+        attention_mask = torch.zeros((len(sequences), max_len), dtype=torch.long)
+        for i, s in enumerate(sequences):
+            ids[i, :len(s)] = torch.from_numpy(s)
+            attention_mask[i, :len(s)] = 1
+        outputs = self.extractor(ids.to(device), attention_mask.to(device))
+        return [outputs[i, :len(s)] for i, s in enumerate(sequences)]
+
+    def lookup(self, sequences, device):
+        # sequences : np.int32 토큰 id 배열 리스트 -> [길이, hidden] 텐서(저장 dtype, CPU) 리스트
+        results = [None] * len(sequences)
+        missing = {}
+        for i, s in enumerate(sequences):
+            key = s.tobytes()
+            cached = self.ram.get(key)
+            if cached is not None:
+                results[i] = cached[0]
+                self.hits['ram'] += 1
+            elif key in self.index:
+                results[i] = self.readDisk(key)
+                self.ram.put(key, results[i], results[i].numel() * 2)
+                self.hits['disk'] += 1
+            else:
+                missing.setdefault(key, []).append(i)
+        if missing:
+            keys = list(missing)
+            computed = self.computeFeatures([sequences[missing[k][0]] for k in keys], device)
+            for key, features in zip(keys, computed):
+                features = features.to(self.dtype).cpu()
+                self.index[key] = self.append(features)
+                self.ram.put(key, features, features.numel() * 2)
+                for i in missing[key]:
+                    results[i] = features
+                self.hits['bert'] += 1
+            self.dirty = True
+        return results
+
+    def encode(self, input_variable, lengths):
+        # input_variable : [max_len, batch] (GRU와 같은 sequence-first), lengths : [batch]
+        # 반환값 : BertFeatureExtractor.encode와 같은 인코더 출력 [max_len, batch, hidden] (float32, 패딩 위치는 0)
+        device = input_variable.device
+        ids = input_variable.t().cpu().numpy().astype(np.int32)
+        sequences = [ids[b, :l] for b, l in enumerate(lengths.cpu().tolist())]
+        features = self.lookup(sequences, device)
+        padded = padFeatures(features, input_variable.size(0))
+        return padded.to(device=device, dtype=torch.float32)
+
+
+def padFeatures(features, max_len):
+    out = torch.zeros((max_len, len(features), features[0].size(1)), dtype=features[0].dtype)
+    for b, f in enumerate(features):
+        out[:f.size(0), b] = f
+    return out
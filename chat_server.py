@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 로컬 채팅 서버 (asyncio, 표준 라이브러리만 사용)
+#   POST /chat  {"text": "..."} -> {"reply": "..."}
+#   GET  /stats 대기열 길이, micro-batch 크기 통계
+#   GET  /ws    WebSocket : 텍스트 메시지 하나가 질문 하나, 응답도 텍스트 메시지 하나
+# 동시에 들어온 요청은 MicroBatcher가 모아서 (최대 max_batch_size개, 부하가 높을 때만 첫 요청 뒤 최대 max_wait초)
+# searcher.decodeBatch 한 번으로 디코딩하고 결과를 요청마다 돌려줍니다
+# 학습한 모델은 python -m chatbot chat --serve true로 띄우고, 이 파일을 직접 실행하면 무작위 초기화 모델로 오프라인에서 띄웁니다
+#   python chat_server.py --port 8000
+#   curl -d '{"text": "hello"}' localhost:8000/chat
+
+import argparse
+import asyncio
+import base64
+import collections
+import hashlib
+import json
+import os
+import struct
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import torch
+import torch.nn as nn
+
+from seq2seq import EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+from vocab import Voc
+
+WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+
+
+def replyText(voc, tokens):
+    # 응답 토큰 -> 문자열 ('.' 또는 '?'에서 끝냅니다, evaluateStream과 같은 규칙)
+    text = ''
+    for delta in voc.detokenize(tokens):
+        text += delta
+        if delta.strip() == '.' or delta.strip() == '?':
+            break
+    return text
+
+
+def batchReplies(searcher, voc, sentences, max_length):
+    # 문장 리스트 -> 응답 문자열 리스트 (디코더 배치 한 번)
+    indexes_batch = [voc.toIndex(voc.tokenizer.encode(sentence)).tolist() for sentence in sentences]
+    return [replyText(voc, tokens) for tokens, scores in searcher.decodeBatch(indexes_batch, max_length)]
+
+
+class MicroBatcher:
+    def __init__(self, evaluate, max_batch_size=16, max_wait=0.005):
+        self.evaluate = evaluate # 문장 리스트 -> 응답 리스트
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        # 디코딩은 스레드 하나에서 실행합니다 (그동안 이벤트 루프는 계속 요청을 받아 대기열에 넣습니다)
+        self.executor = ThreadPoolExecutor(1)
+        self.batch_sizes = collections.Counter()
+        self.n_requests = 0
+        self.max_queue_depth = 0
+        self.loaded = False # 직전 디코딩 중에 새 요청이 들어왔는지
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.ensure_future(self.run())
+
+    async def submit(self, sentence):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((sentence, future))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return await future
+
+    async def nextBatch(self):
+        # 첫 요청을 기다린 뒤, 이미 쌓인 요청은 바로 가져오고 모자라면 max_wait까지 더 기다립니다
+        # 직전 디코딩 동안 요청이 하나도 들어오지 않았으면(부하가 낮으면) 기다리지 않고 바로 디코딩합니다
+        # (max_wait는 디코더가 쉴 틈 없이 바쁠 때만 배치를 키우고, 그렇지 않으면 지연 시간만 늘립니다)
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            if not self.loaded:
+                break
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.nextBatch()
+            try:
+                replies = await loop.run_in_executor(self.executor, self.evaluate, [s for s, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            finally:
+                self.loaded = not self.queue.empty()
+            for (_, future), reply in zip(batch, replies):
+                if not future.done():
+                    future.set_result(reply)
+            self.batch_sizes[len(batch)] += 1
+            self.n_requests += len(batch)
+
+    def stats(self):
+        n_batches = sum(self.batch_sizes.values())
+        return {'queue_depth': self.queue.qsize(), 'max_queue_depth': self.max_queue_depth,
+                'requests': self.n_requests, 'batches': n_batches,
+                'mean_batch_size': self.n_requests / n_batches if n_batches else 0.0,
+                'batch_sizes': {str(k): v for k, v in sorted(self.batch_sizes.items())}}
+
+
+async def readFrame(reader):
+    # WebSocket 프레임 하나 -> (opcode, payload). 조각난(fragmented) 메시지는 지원하지 않습니다
+    head = await reader.readexactly(2)
+    length = head[1] & 0x7f
+    if length == 126:
+        length = struct.unpack('>H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('>Q', await reader.readexactly(8))[0]
+    mask = await reader.readexactly(4) if head[1] & 0x80 else b''
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return head[0] & 0x0f, payload
+
+
+def wsFrame(opcode, payload):
+    # 서버 -> 클라이언트 프레임 (마스크 없음, FIN)
+    if len(payload) < 126:
+        head = struct.pack('>BB', 0x80 | opcode, len(payload))
+    elif len(payload) < 65536:
+        head = struct.pack('>BBH', 0x80 | opcode, 126, len(payload))
+    else:
+        head = struct.pack('>BBQ', 0x80 | opcode, 127, len(payload))
+    return head + payload
+
+
+class ChatServer:
+    def __init__(self, batcher, host='127.0.0.1', port=8000):
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+
+    async def start(self):
+        self.batcher.start()
+        return await asyncio.start_server(self.handle, self.host, self.port)
+
+    async def serveForever(self):
+        server = await self.start()
+        print('Serving on {}'.format(', '.join('{}:{}'.format(*s.getsockname()[:2]) for s in server.sockets)))
+        async with server:
+            await server.serve_forever()
+
+    async def handle(self, reader, writer):
+        try:
+            while True: # keep-alive : 한 연결에서 요청을 여러 번 받을 수 있습니다
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path = request_line.decode('latin-1').split()[:2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, value = line.decode('latin-1').split(':', 1)
+                    headers[key.strip().lower()] = value.strip()
+
+                if path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                    await self.websocket(reader, writer, headers)
+                    break
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                status, payload = await self.route(method, path, body)
+                data = json.dumps(payload).encode()
+                writer.write('HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\n\r\n'.format(
+                    status, STATUS[status], len(data)).encode() + data)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method, path, body):
+        if method == 'GET' and path == '/stats':
+            return 200, self.batcher.stats()
+        if method != 'POST' or path != '/chat':
+            return 404, {'error': 'not found'}
+        try:
+            text = json.loads(body)['text']
+        except (ValueError, KeyError, TypeError):
+            return 400, {'error': 'expected {"text": ...}'}
+        try:
+            return 200, {'reply': await self.batcher.submit(text)}
+        except Exception as e:
+            return 500, {'error': repr(e)}
+
+    async def websocket(self, reader, writer, headers):
+        accept = base64.b64encode(hashlib.sha1((headers['sec-websocket-key'] + WS_GUID).encode()).digest()).decode()
+        writer.write('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                     'Sec-WebSocket-Accept: {}\r\n\r\n'.format(accept).encode())
+        while True:
+            opcode, payload = await readFrame(reader)
+            if opcode == 0x8: # close
+                writer.write(wsFrame(0x8, b''))
+                await writer.drain()
+                break
+            if opcode == 0x9: # ping
+                writer.write(wsFrame(0xA, payload))
+            elif opcode == 0x1: # text
+                try:
+                    reply = await self.batcher.submit(payload.decode('utf-8'))
+                except Exception as e:
+                    reply = 'Error: {!r}'.format(e)
+                writer.write(wsFrame(0x1, reply.encode('utf-8')))
+            await writer.drain()
+
+
+def serveChat(searcher, voc, max_length, host='127.0.0.1', port=8000, max_batch_size=16, max_wait=0.005):
+    # chatbot/chat.py에서 evaluateInput 대신 부릅니다 (Ctrl+C로 종료)
+    async def main():
+        batcher = MicroBatcher(lambda sentences: batchReplies(searcher, voc, sentences, max_length),
+                               max_batch_size, max_wait)
+        await ChatServer(batcher, host, port).serveForever()
+    asyncio.run(main())
+
+
+def demoModel(hidden_size=64, n_words=1000, vocab_file=None, seed=0):
+    # 오프라인 시험용 무작위 초기화 모델 -> (searcher, voc)
+    # vocab_file이 없으면 특수 토큰 + tok0, tok1, ... 로 된 vocab.txt를 임시로 만듭니다
+    from transformers import BertTokenizer
+    if vocab_file is None:
+        fd, vocab_file = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(fd, 'w') as f:
+            f.write('\n'.join(['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]', '.', '?'] +
+                              ['tok{}'.format(i) for i in range(n_words)] + ['##s']) + '\n')
+    voc = Voc('demo', BertTokenizer(vocab_file))
+    torch.manual_seed(seed)
+    embedding = nn.Embedding(voc.num_words, hidden_size)
+    encoder = EncoderRNN(hidden_size, embedding, 2, 0.1).eval()
+    decoder = LuongAttnDecoderRNN('dot', embedding, hidden_size, voc.num_words, 2, 0.1).eval()
+    searcher = GreedySearchDecoder(encoder, decoder, voc.tokenizer.cls_token_id, voc.tokenizer.sep_token_id)
+    return searcher, voc
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--hidden_size', type=int, default=64)
+    parser.add_argument('--vocab', default=None) # vocab.txt 경로 (없으면 작은 임시 vocab)
+    parser.add_argument('--max_length', type=int, default=10)
+    parser.add_argument('--max_batch_size', type=int, default=16)
+    parser.add_argument('--max_wait', type=float, default=0.005)
+    args = parser.parse_args()
+
+    searcher, voc = demoModel(args.hidden_size, vocab_file=args.vocab)
+    serveChat(searcher, voc, args.max_length, args.host, args.port, args.max_batch_size, args.max_wait)
@@ -0,0 +1,2 @@
+# 챗봇 학습/채팅 명령 (python -m chatbot {prepare,train,chat,bench}, __main__.py 참고)
+# 무거운 의존성(torch, transformers)은 명령을 실행할 때 필요한 모듈에서만 import합니다
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# python -m chatbot {prepare,train,chat,bench} [--config config.json] [--키 값 ...]
+#   prepare : 코퍼스 -> PairStore/단어집합 (chatbot/data.py)
+#   train   : 학습, save_every마다 checkpoint (chatbot/train.py)
+#   chat    : checkpoint로 채팅/서버 (chatbot/chat.py)
+#   bench   : benchmarks/bench_*.py (chatbot/bench.py)
+# 설정 키와 기본값은 chatbot/config.py의 DEFAULTS입니다. 예)
+#   python -m chatbot train --model bert --n_iteration 40000 --precision bf16
+#   python -m chatbot chat --checkpoint data/save/cb_model/.../50000_checkpoint.tar --search_method beam
+# 명령에 필요한 모듈만 그 명령을 실행할 때 import합니다 (--help와 명령행 파싱은 표준 라이브러리만 사용)
+
+import argparse
+
+from chatbot.config import addConfigArguments, makeConfig
+
+COMMANDS = [
+    ('prepare', '코퍼스를 PairStore와 단어집합으로 준비합니다'),
+    ('train', '모델을 학습합니다'),
+    ('chat', 'checkpoint로 채팅하거나 서버를 띄웁니다'),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m chatbot')
+    commands = parser.add_subparsers(dest='command', required=True)
+    for name, description in COMMANDS:
+        addConfigArguments(commands.add_parser(name, help=description))
+    bench = commands.add_parser('bench', help='benchmarks/bench_<name>.py를 실행합니다')
+    bench.add_argument('name', nargs='?', default=None) # 없으면 목록
+    bench.add_argument('args', nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    if args.command == 'bench':
+        from chatbot.bench import runBench
+        runBench(args.name, args.args)
+        return
+    config = makeConfig(args)
+    if args.command == 'prepare':
+        from chatbot.data import runPrepare
+        runPrepare(config)
+    elif args.command == 'train':
+        from chatbot.train import runTrain
+        runTrain(config)
+    elif args.command == 'chat':
+        from chatbot.chat import runChat
+        runChat(config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# bench : benchmarks/bench_<이름>.py를 실행합니다 (나머지 인자는 그 벤치마크의 인자)
+#   python -m chatbot bench                    벤치마크 목록
+#   python -m chatbot bench import             import 시간 확인 (-X importtime)
+#   python -m chatbot bench quantize --store /home/dilab/tmp/cornell_movie_dialogs_corpus/bert_pair_store
+
+import importlib
+import os
+import sys
+
+BENCHMARK_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+
+
+def benchNames():
+    return sorted(name[len('bench_'):-len('.py')] for name in os.listdir(BENCHMARK_DIR)
+                  if name.startswith('bench_') and name.endswith('.py'))
+
+
+def runBench(name, argv):
+    if name is None:
+        print('\n'.join(benchNames()))
+        return
+    if name not in benchNames():
+        raise ValueError(name, "is not an appropriate benchmark, see python -m chatbot bench.")
+    module = importlib.import_module('benchmarks.bench_' + name)
+    # 벤치마크의 argparse가 sys.argv를 읽습니다
+    sys.argv = ['python -m chatbot bench ' + name] + list(argv)
+    module.main()
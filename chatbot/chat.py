@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# chat : 학습한 checkpoint로 채팅합니다 (입력 루프, --serve true면 로컬 HTTP/WebSocket 서버)
+#   python -m chatbot chat --checkpoint data/save/cb_model/.../50000_checkpoint.tar
+# 코퍼스를 읽지 않고 토크나이저/단어집합과 모델 설정(model, hidden_size 등)도 checkpoint에서 가져옵니다
+# (model='rnn'이면 BERT 모델을 불러오지 않고, transformers는 checkpoint 안의 토크나이저를 불러올 때만 import됩니다)
+
+import time
+
+from chatbot.config import checkpointPath
+from chatbot.model import PAD_token, applyCheckpoint, buildModel, loadCheckpointFile, selectDevice
+from seq2seq import BeamSearchDecoder, GreedySearchDecoder
+from session_store import SessionStore
+from vocab import Voc
+
+
+def evaluateBatch(searcher, voc, sentences, max_length):
+    # indexes_batch : 문장들을 단어집합에 저장된 수로 바꿉니다 ([CLS] ... [SEP])
+    tokenizer = voc.tokenizer
+    indexes_batch = [voc.toIndex(tokenizer.encode(sentence)).tolist() for sentence in sentences]
+
+    # searcher가 한 번에 패딩/정렬해서 배치로 디코딩하고, 문장마다 [SEP]에서 멈춥니다
+    results = searcher.decodeBatch(indexes_batch, max_length)
+
+    # 인덱스 -> 단어
+    return [tokenizer.convert_ids_to_tokens(voc.toTokenIds(tokens).tolist()) for tokens, scores in results]
+
+
+def evaluate(searcher, voc, sentence, max_length):
+    return evaluateBatch(searcher, voc, [sentence], max_length)[0]
+
+
+def evaluateStream(searcher, voc, sentence, max_length, session=None):
+    # 응답을 디코더가 토큰을 만드는 대로 글자 조각으로 내놓습니다 ('.' 또는 '?'가 나오면 디코딩을 멈춥니다)
+    # session이 주어지면 이전 턴들의 인코더 출력/디코더 hidden에 이어서 이번 문장만 인코딩합니다
+    indexes = voc.toIndex(voc.tokenizer.encode(sentence)).tolist()
+    for delta in voc.detokenize(token for token, score in searcher.stream(indexes, max_length, session)):
+        yield delta
+        if delta.strip() == '.' or delta.strip() == '?':
+            break
+
+
+def evaluateInput(searcher, voc, max_length, sessions=None, session_id='local', show_latency=True):
+    # sessions : SessionStore가 주어지면 앞의 대화를 이어 갑니다 ('reset'으로 새 대화)
+    input_sentence = ''
+    while(1):
+        try:
+            # 입력 문장을 받아옵니다
+            input_sentence = input('> ')
+            # 종료 조건인지 검사합니다
+            if input_sentence == 'exit' or input_sentence == 'quit': break
+            if input_sentence == 'reset' and sessions is not None:
+                sessions.pop(session_id)
+                continue
+            session = None if sessions is None else sessions.get(session_id)
+            # 응답을 만들어지는 대로 출력합니다
+            start = time.time()
+            first_token = None
+            print('Bot:', end=' ', flush=True)
+            for delta in evaluateStream(searcher, voc, input_sentence, max_length, session):
+                if first_token is None:
+                    first_token = time.time() - start
+                print(delta, end='', flush=True)
+            total = time.time() - start
+            print()
+            if session is not None:
+                sessions.put(session_id, session)
+            if show_latency:
+                print('(first token {:.1f} ms, total {:.1f} ms)'.format(
+                    (total if first_token is None else first_token) * 1000, total * 1000))
+
+        except KeyError:
+            print("Error: Encountered unknown word.")
+        except EOFError:
+            break
+
+
+def buildSearcher(config, model):
+    # model='bert'면 학습과 같은 경로(BERT 출력 + EncoderRNN 또는 BertBridge 은닉 상태)로 탐색합니다
+    if config['search_method'] == 'beam':
+        return BeamSearchDecoder(model.input_encoder, model.decoder, model.cls_index, model.sep_index, PAD_token,
+                                 config['beam_size'], config['length_penalty'], config['precision'])
+    return GreedySearchDecoder(model.input_encoder, model.decoder, model.cls_index, model.sep_index, PAD_token,
+                               config['precision'])
+
+
+def loadChatModel(config):
+    # -> (config, model) : checkpoint 하나로 (코퍼스 없이) 모델을 만듭니다
+    device = selectDevice(config)
+    checkpoint = loadCheckpointFile(config['checkpoint'] or checkpointPath(config), device)
+    config = applyCheckpoint(config, checkpoint)
+    voc = Voc(config['corpus_name'], checkpoint['voc_dict']['tokenizer'])
+    return config, buildModel(config, voc, device, checkpoint)
+
+
+def runChat(config, model=None):
+    # model : 방금 학습한 ChatModel (None이면 checkpoint에서 불러옵니다)
+    if model is None:
+        config, model = loadChatModel(config)
+    model.eval()
+    searcher = buildSearcher(config, model)
+
+    if config['torchscript_file'] is not None:
+        if config['model'] != 'rnn':
+            raise ValueError(config['model'], "is not supported, torchscript_file needs model='rnn'.")
+        from export_script import exportScripted
+        exportScripted(model.encoder, model.decoder, model.voc, config['torchscript_file'], config['max_length'])
+
+    # 채팅을 시작합니다
+    if config['serve']:
+        from chat_server import serveChat
+        serveChat(searcher, model.voc, config['max_length'], port=config['serve_port'],
+                  max_batch_size=config['serve_max_batch_size'], max_wait=config['serve_max_wait'])
+    else:
+        sessions = None
+        if config['multi_turn'] and config['search_method'] == 'greedy':
+            sessions = SessionStore(config['session_max_bytes'], config['session_ttl'], config['session_max_context'])
+        evaluateInput(searcher, model.voc, config['max_length'], sessions, show_latency=config['show_latency'])
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 설정 : 기본값 <- 설정 파일(--config, JSON) <- 명령행 옵션(--hidden_size 1024 ...) 순서로 덮어씁니다
+# 명령행 값은 JSON으로 읽고 (1024, 0.5, true, null, [2000,10000]) JSON이 아니면 문자열로 씁니다
+# model : 'rnn'  = bert_large_en_pytorch_chatbot_tutorial.py (토크나이저만 BERT, EncoderRNN, hidden 768)
+#         'bert' = bert_model_large_en_pytorch_chatbot_tutorial.py (디코더가 BERT 출력에 attention, hidden 1024)
+# 이 모듈은 표준 라이브러리만 import합니다 (명령행 파싱이 torch/transformers를 기다리지 않도록)
+
+import argparse
+import json
+import os
+
+DEFAULTS = {
+    'model': 'rnn',
+    'device': None, # None이면 cuda가 있으면 cuda, 없으면 cpu
+    # 'fp32' 또는 'bf16' : 학습/탐색의 forward(와 BERT)를 bfloat16 autocast로 실행합니다
+    # loss/softmax/optimizer 상태는 fp32 그대로이고 checkpoint는 precision과 관계없이 같은 형식입니다
+    'precision': 'fp32',
+
+    # 데이터
+    'corpus_name': 'cornell_movie_dialogs_corpus',
+    'corpus': '/home/dilab/tmp/cornell_movie_dialogs_corpus',
+    # 학습에 사용할 코퍼스 폴더들 (Cornell 형식 movie_lines.txt / movie_conversations.txt, None이면 [corpus])
+    # 새 코퍼스를 추가하면 그 코퍼스의 샤드만 새로 만듭니다
+    'corpus_sources': None,
+    'delimiter': ' ', # 새로운 파일(샤드)에 따로 저장할 때의 구분자 (unicode_escape로 읽습니다)
+    'tokenizer': 'bert-large-uncased',
+    'do_lower_case': False,
+    'max_length': 10,
+    # 임베딩/디코더 출력층을 코퍼스에 나오는 WordPiece id만으로 만듭니다 (False면 len(tokenizer.vocab) 전체)
+    'compact_vocab': True,
+    'min_count': 1, # compact_vocab에서 min_count번 미만 나온 토큰은 [UNK]로 바꿉니다
+
+    # 모델
+    'model_name': 'cb_model',
+    'attn_model': 'dot', # 'dot', 'general', 'concat'
+    'hidden_size': 768,
+    'encoder_n_layers': 2,
+    'decoder_n_layers': 2,
+    'dropout': 0.1,
+    'output_head': 'linear', # 디코더 출력층 'linear' : vocab 전체 nn.Linear, 'adaptive' : 빈도 순서 클러스터 adaptive softmax
+    'adaptive_cutoffs': [2000, 10000], # 'adaptive'에서 빈도 순위 기준 클러스터 경계
+    'tie_embedding': False, # True : decoder.out.weight를 공유 임베딩과 묶습니다 (output_head='linear'만)
+    'bert_init_embedding': False, # True : 새로 학습할 때 공유 임베딩을 BERT word embedding으로 초기화 (hidden_size가 BERT hidden과 같아야 함)
+    'freeze_embedding': False, # True : 공유 임베딩(묶었으면 출력층 가중치도)을 학습하지 않습니다
+    'bert_embedding_model': 'bert-base-uncased', # model='rnn'에서 bert_init_embedding에 쓸 BERT (hidden 768, 같은 vocab)
+
+    # 학습
+    'save_dir': os.path.join('data', 'save'),
+    'checkpoint': None, # train : 이어서 학습할 checkpoint (None이면 처음부터), chat : None이면 checkpoint_iter의 checkpoint
+    'checkpoint_iter': 50000,
+    'batch_size': 64,
+    'batch_seed': 0, # 배치 순서를 정하는 seed (checkpoint에 저장되어 재시작할 때 같은 배치를 이어서 봅니다)
+    'batch_workers': 2, # 배치를 만드는 DataLoader worker 프로세스 수
+    'batch_prefetch': 4, # worker마다 미리 만들어 둘 배치 수
+    'batch_sampler': 'bucket', # 'random' : 무작위 쌍, 'bucket' : 길이가 비슷한 쌍끼리 묶어 패딩을 줄임
+    'max_tokens': None, # 'bucket'에서 배치당 (패딩 포함) 토큰 수 상한. 주어지면 batch_size는 배치 크기 상한
+    'clip': 50.0,
+    'teacher_forcing_ratio': 1.0,
+    # 'batch' : 배치마다 teacher forcing 여부를 정함, 'element' : 문장/단계마다 정답과 디코더 출력을 섞음 (scheduled sampling)
+    'teacher_forcing_mode': 'batch',
+    'learning_rate': 0.0001,
+    'decoder_learning_ratio': 5.0,
+    'n_iteration': 50000,
+    'print_every': 1,
+    'save_every': 10000,
+
+    # 채팅
+    'search_method': 'greedy', # 'greedy' : 탐욕적 디코딩, 'beam' : 빔 탐색 (반복이 적은 응답, beam_size배 계산)
+    'beam_size': 4,
+    'length_penalty': 1.0, # 빔 탐색 점수 = log 확률 합 / 길이 ** length_penalty (0이면 정규화 없음)
+    'show_latency': True, # 응답마다 첫 토큰까지의 시간과 전체 시간을 출력합니다
+    'multi_turn': True, # 앞의 대화를 이어서 응답합니다 (greedy에서만, 세션마다 인코더 출력과 디코더 hidden을 저장)
+    'session_max_bytes': 256 * 2 ** 20, # 모든 세션 상태의 최대 크기 (넘으면 가장 오래 안 쓴 세션부터 지움)
+    'session_ttl': 30 * 60, # 마지막 사용 후 세션을 지우기까지의 시간(초)
+    'session_max_context': None, # 세션마다 남길 최대 인코더 출력 길이 (None이면 4 * max_length, 오래된 턴부터 버림)
+    'serve': False, # True면 입력 루프 대신 로컬 HTTP/WebSocket 서버(chat_server.py)를 띄웁니다
+    'serve_port': 8000,
+    'serve_max_batch_size': 16, # 동시에 들어온 요청을 최대 몇 개까지 한 번에 디코딩할지
+    'serve_max_wait': 0.005, # 첫 요청 뒤 다른 요청을 기다리는 최대 시간(초), 직전 디코딩 중에 요청이 쌓였을 때(부하가 높을 때)만 기다림
+    'torchscript_file': None, # 경로를 주면 탐욕적 디코딩 모델을 TorchScript로 내보냅니다 (model='rnn'만, export_script.py 참고)
+
+    # model='bert'
+    'bert_model': 'bert-large-uncased',
+    # 'rnn' : 디코더 초기 은닉 상태를 양방향 EncoderRNN에서 (기존 checkpoint와 호환)
+    # 'bert' : BERT [CLS](또는 pooled) 출력의 작은 선형 변환(BertBridge)에서, EncoderRNN은 실행하지 않음
+    'encoder_mode': 'rnn',
+    'bert_bridge_source': 'cls', # 'cls', 'pooled' 또는 'mean' (패딩을 뺀 평균)
+    # 디코더 attention에 쓸 BERT hidden layer (0 = 임베딩, 1..24, -1 = 마지막 층)
+    # 가장 깊은 layer 뒤의 층은 실행하지 않습니다. 예) [12] : 24층 중 12층까지만 실행
+    'bert_layers': [-1],
+    'use_bert_feature_store': True, # 학습할 때 BERT 출력 캐시 (False면 매 배치마다 BERT 실행)
+    'bert_feature_dtype': 'float16', # 'float16' 또는 'bfloat16'
+    'bert_feature_ram_bytes': 4 << 30, # 메모리(LRU)에 들고 있을 캐시 크기
+}
+
+# model마다 다른 기본값
+MODEL_DEFAULTS = {
+    'rnn': {},
+    'bert': {'hidden_size': 1024, 'checkpoint_iter': 40000, 'n_iteration': 40000},
+}
+
+
+def parseValue(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def addConfigArguments(parser):
+    # DEFAULTS의 모든 키를 --키 옵션으로 추가합니다 (주지 않은 옵션은 args에 들어가지 않음)
+    parser.add_argument('--config', default=None, help='JSON 설정 파일')
+    for key in DEFAULTS:
+        parser.add_argument('--' + key, type=parseValue, default=argparse.SUPPRESS, metavar='VALUE')
+    return parser
+
+
+def makeConfig(args=None, **overrides):
+    # args : addConfigArguments를 거친 argparse 결과 -> 설정 dict
+    flags = {key: value for key, value in vars(args or argparse.Namespace()).items() if key in DEFAULTS}
+    flags.update(overrides)
+    from_file = {}
+    if getattr(args, 'config', None) is not None:
+        with open(args.config) as f:
+            from_file = json.load(f)
+        unknown = sorted(set(from_file) - set(DEFAULTS))
+        if unknown:
+            raise ValueError(unknown, "are not appropriate config keys.")
+    model = flags.get('model', from_file.get('model', DEFAULTS['model']))
+    if model not in MODEL_DEFAULTS:
+        raise ValueError(model, "is not an appropriate model.")
+    config = dict(DEFAULTS)
+    config.update(MODEL_DEFAULTS[model])
+    config.update(from_file)
+    config.update(flags)
+    # 설정 파일이나 명령행으로 직접 준 키 (applyCheckpoint가 checkpoint와 다른 값을 거부하는 데 씁니다)
+    config['explicit_keys'] = sorted(set(from_file) | set(flags))
+    if config['corpus_sources'] is None:
+        config['corpus_sources'] = [config['corpus']]
+    if config['session_max_context'] is None:
+        config['session_max_context'] = 4 * config['max_length']
+    return config
+
+
+def modelDir(config):
+    # checkpoint 폴더 : 두 스크립트가 쓰던 경로 그대로
+    if config['model'] == 'rnn':
+        return 'large'
+    return 'large_model' if config['encoder_mode'] == 'rnn' else 'large_model_bert_bridge'
+
+
+def checkpointDir(config):
+    return os.path.join(config['save_dir'], config['model_name'], config['corpus_name'], modelDir(config),
+                        '{}-{}_{}'.format(config['encoder_n_layers'], config['decoder_n_layers'], config['hidden_size']))
+
+
+def checkpointPath(config, iteration=None):
+    return os.path.join(checkpointDir(config), '{}_checkpoint.tar'.format(iteration or config['checkpoint_iter']))
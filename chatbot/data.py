@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# prepare : 코퍼스 -> PairStore (토큰 id로 저장된 질문/응답 쌍) + 단어집합(Voc)
+#   python -m chatbot prepare --corpus /home/dilab/tmp/cornell_movie_dialogs_corpus
+# 원본 코퍼스/전처리 설정이 그대로면 파싱과 토크나이즈를 건너뛰고 저장소를 memmap으로 바로 엽니다 (dataset_manifest.py)
+
+import codecs
+import os
+
+from vocab import Voc
+
+
+def loadTokenizer(config):
+    # transformers는 토크나이저가 필요할 때 import합니다
+    from transformers import BertTokenizer
+    return BertTokenizer.from_pretrained(config['tokenizer'], do_lower_case=config['do_lower_case'])
+
+
+def storeDir(config):
+    return os.path.join(config['corpus'], 'bert_pair_store')
+
+
+def loadPrepareData(config, tokenizer):
+    # -> voc : 단어집합, pairs : 토큰 id로 저장된 질문 쌍, pairs[i] = (input_ids, target_ids)
+    from dataset_manifest import prepareDataset
+    voc = Voc(config['corpus_name'], tokenizer)
+    # 구분자에 대해 unescape 함수를 호출합니다
+    delimiter = str(codecs.decode(config['delimiter'], 'unicode_escape'))
+    pairs = prepareDataset(config['corpus_sources'], storeDir(config), tokenizer, config['max_length'],
+                           shardSize=100000, delimiter=delimiter)
+    if config['compact_vocab']:
+        voc.buildVocab(pairs, config['min_count'])
+        print("Compact vocabulary: {} of {} WordPiece ids".format(voc.num_words, len(tokenizer.vocab)))
+    return voc, pairs
+
+
+def runPrepare(config):
+    tokenizer = loadTokenizer(config)
+    voc, pairs = loadPrepareData(config, tokenizer)
+    print("{} pairs in {}".format(len(pairs), storeDir(config)))
+    return voc, pairs
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 설정(과 checkpoint)으로 임베딩/인코더/디코더를 만듭니다 (train과 chat이 같이 씀)
+# model='bert'일 때만 transformers의 BertModel을 import합니다
+
+import os
+
+import torch
+import torch.nn as nn
+
+from chatbot.config import DEFAULTS, MODEL_DEFAULTS
+from seq2seq import AdaptiveSoftmaxHead, BertBridge, BertEncoder, EncoderRNN, LuongAttnDecoderRNN, initEmbedding
+
+PAD_token = 0
+CLS_token = 101
+SEP_token = 102
+
+# checkpoint에 저장하고 applyCheckpoint가 복원하는 모델 설정
+CHECKPOINT_KEYS = ['model', 'hidden_size', 'attn_model', 'encoder_n_layers', 'decoder_n_layers',
+                   'output_head', 'tie_embedding', 'adaptive_cutoffs', 'encoder_mode', 'bert_layers', 'bert_bridge_source']
+
+
+def selectDevice(config):
+    return torch.device(config['device'] or ('cuda' if torch.cuda.is_available() else 'cpu'))
+
+
+def loadCheckpointFile(path, device):
+    # voc_dict에 토크나이저가 pickle되어 있으므로 weights_only=False로 불러옵니다 (믿을 수 있는 파일만)
+    return torch.load(path, map_location=device, weights_only=False)
+
+
+def checkpointModelConfig(checkpoint, model):
+    # checkpoint의 모델 설정 -> dict (이전 checkpoint에 저장되지 않은 값은 quantize.checkpointConfig처럼 state_dict 모양에서 읽습니다)
+    # model : checkpoint에 model/encoder_mode가 없을 때의 model (BERT 출력에 attention하는 이전 checkpoint는 state_dict로 구분할 수 없음)
+    saved = {key: checkpoint[key] for key in CHECKPOINT_KEYS if key in checkpoint}
+    saved.setdefault('model', 'bert' if 'encoder_mode' in checkpoint else model)
+    saved.setdefault('hidden_size', checkpoint['embedding']['weight'].shape[1])
+    de = checkpoint['de']
+    if 'attn_model' not in saved:
+        saved['attn_model'] = 'concat' if 'attn.v' in de else 'general' if 'attn.attn.weight' in de else 'dot'
+    # encoder_mode='bert'면 EncoderRNN이 없으므로 encoder_n_layers는 알 수 없습니다
+    encoder_n_layers = sum(1 for k in checkpoint['en'] if k.startswith('gru.weight_ih_l') and 'reverse' not in k)
+    if encoder_n_layers:
+        saved.setdefault('encoder_n_layers', encoder_n_layers)
+    saved.setdefault('decoder_n_layers', sum(1 for k in de if k.startswith('gru.weight_ih_l')))
+    saved.setdefault('output_head', 'linear')
+    saved.setdefault('tie_embedding', False)
+    if saved['model'] == 'bert':
+        saved.setdefault('encoder_mode', 'rnn')
+    # bert_layers/bert_bridge_source가 없는 이전 checkpoint는 state_dict로 알 수 없으므로 설정 값을 그대로 씁니다
+    return saved
+
+
+def applyCheckpoint(config, checkpoint):
+    # checkpoint에 저장된 모델 설정이 기본값보다 우선합니다 (--model 없이 model='bert' checkpoint를 열어도 BERT 모델을 만듭니다)
+    # 설정 파일이나 명령행으로 checkpoint와 다른 값을 직접 주면 ValueError
+    explicit = config.get('explicit_keys', [])
+    saved = checkpointModelConfig(checkpoint, config['model'])
+    for key, value in saved.items():
+        if key in explicit and config[key] != value:
+            raise ValueError(config[key], "is not an appropriate {} for this checkpoint ({!r} was saved).".format(key, value))
+    config = dict(config)
+    if saved['model'] != config['model']:
+        # model마다 다른 기본값도 checkpoint의 model에 맞춥니다
+        for key in MODEL_DEFAULTS[config['model']]:
+            if key not in explicit:
+                config[key] = DEFAULTS[key]
+        for key, value in MODEL_DEFAULTS[saved['model']].items():
+            if key not in explicit:
+                config[key] = value
+    config.update(saved)
+    config['batch_seed'] = checkpoint.get('batch_seed', config['batch_seed'])
+    return config
+
+
+class ChatModel:
+    # 학습/채팅에 쓰는 모듈 묶음
+    #   input_encoder : train/GreedySearchDecoder가 쓰는 인코더 (model='rnn'이면 encoder, 'bert'면 BERT 출력 + 은닉 상태)
+    #   bert_features : 학습용 BERT 출력 캐시 (BertFeatureStore, 없으면 None)
+    def __init__(self, voc, embedding, encoder, decoder, input_encoder, bert_features=None):
+        self.voc = voc
+        self.embedding = embedding
+        self.encoder = encoder
+        self.decoder = decoder
+        self.input_encoder = input_encoder
+        self.bert_features = bert_features
+        # 디코더의 시작 토큰([CLS])과 끝 토큰([SEP])의 압축 id
+        self.cls_index = int(voc.toIndex(CLS_token))
+        self.sep_index = int(voc.toIndex(SEP_token))
+
+    def train(self):
+        # Dropout 레이어를 학습 모드로 둡니다
+        self.encoder.train()
+        self.decoder.train()
+
+    def eval(self):
+        # Dropout 레이어를 평가 모드로 설정합니다
+        self.encoder.eval()
+        self.decoder.eval()
+
+
+def buildModel(config, voc, device, checkpoint=None, pairs=None, feature_store=False):
+    # checkpoint가 주어지면 voc에 checkpoint의 단어집합 매핑을 불러오고 가중치를 채웁니다 (config는 applyCheckpoint를 거친 것)
+    # pairs : output_head='adaptive'를 새로 만들 때의 토큰 빈도 (checkpoint에서 불러오면 필요 없음)
+    # feature_store : model='bert'에서 코퍼스 폴더의 BERT 출력 캐시를 씁니다 (학습용)
+    if checkpoint is not None:
+        voc.loadDict(checkpoint['voc_dict'])
+    hidden_size = config['hidden_size']
+
+    bert_model = None
+    if config['model'] == 'bert':
+        from transformers import BertModel
+        bert_model = BertModel.from_pretrained(config['bert_model'])
+
+    embedding = nn.Embedding(voc.num_words, hidden_size)
+    if checkpoint is not None:
+        embedding.load_state_dict(checkpoint['embedding'])
+    elif config['bert_init_embedding']:
+        if bert_model is None:
+            from transformers import BertModel
+            word_embeddings = BertModel.from_pretrained(config['bert_embedding_model']).embeddings.word_embeddings
+        else:
+            word_embeddings = bert_model.embeddings.word_embeddings
+        initEmbedding(embedding, word_embeddings, voc.token_ids)
+    embedding.weight.requires_grad_(not config['freeze_embedding'])
+
+    bert_features = None
+    if bert_model is not None:
+        from bert_features import BertFeatureExtractor, BertFeatureStore
+        bert_model = bert_model.to(device)
+        bert_extractor = BertFeatureExtractor(bert_model, config['bert_layers'], precision=config['precision'])
+        if feature_store and config['use_bert_feature_store']:
+            bert_features = BertFeatureStore(bert_extractor, os.path.join(config['corpus'], 'bert_feature_store'),
+                                             config['bert_feature_dtype'], config['bert_feature_ram_bytes'])
+    if bert_model is not None and config['encoder_mode'] == 'bert':
+        # pooler는 마지막 층 출력에 맞춰 학습되었으므로 다른 층(또는 층 평균)을 쓰면 'pooled'를 쓸 수 없습니다
+        if config['bert_bridge_source'] == 'pooled' and bert_extractor.layers != [bert_extractor.n_layers]:
+            raise ValueError(config['bert_layers'], "is not an appropriate layer selection for bert_bridge_source='pooled', use the last layer only.")
+        bridge = BertBridge(bert_extractor.hidden_size, hidden_size, config['decoder_n_layers'],
+                            config['bert_bridge_source'], bert_model.pooler)
+        encoder = BertEncoder(bert_features or bert_extractor, bridge=bridge, token_ids=voc.token_ids)
+    else:
+        encoder = EncoderRNN(hidden_size, embedding, config['encoder_n_layers'], config['dropout'])
+
+    decoder_out = None
+    if config['output_head'] == 'adaptive':
+        # checkpoint에서 불러올 때는 빈도 순서 버퍼도 state_dict에서 채워지므로 빈도는 0으로 둡니다
+        if pairs is not None:
+            counts = voc.compactCounts(pairs.targetTokenCounts(len(voc.tokenizer.vocab)))
+        else:
+            counts = torch.zeros(voc.num_words, dtype=torch.long)
+        decoder_out = AdaptiveSoftmaxHead(hidden_size, counts, config['adaptive_cutoffs'])
+    decoder = LuongAttnDecoderRNN(config['attn_model'], embedding, hidden_size, voc.num_words, config['decoder_n_layers'],
+                                  config['dropout'], decoder_out, config['tie_embedding'])
+    if checkpoint is not None:
+        encoder.load_state_dict(checkpoint['en'])
+        decoder.load_state_dict(checkpoint['de'])
+
+    encoder = encoder.to(device)
+    decoder = decoder.to(device)
+    input_encoder = encoder
+    if bert_model is not None and config['encoder_mode'] == 'rnn':
+        # 입력은 압축 id이므로 BERT에 넣기 전에 voc.token_ids로 BERT id로 되돌립니다
+        input_encoder = BertEncoder(bert_features or bert_extractor, rnn_encoder=encoder, token_ids=voc.token_ids).to(device)
+    return ChatModel(voc, embedding, encoder, decoder, input_encoder, bert_features)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# train : 코퍼스 준비 -> 모델 생성(또는 --checkpoint에서 이어서) -> n_iteration까지 학습, save_every마다 checkpoint 저장
+#   python -m chatbot train --hidden_size 768 --n_iteration 50000
+#   python -m chatbot train --model bert --checkpoint data/save/.../10000_checkpoint.tar
+
+import os
+import random
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch import optim
+
+from batching import BucketBatchPlan, PairCollator, RandomBatchPlan, TrainBatchDataset, trainBatchLoader
+from chatbot.config import checkpointDir
+from chatbot.data import loadPrepareData, loadTokenizer
+from chatbot.model import PAD_token, applyCheckpoint, buildModel, loadCheckpointFile, selectDevice
+from seq2seq import autocast, maskNLLLossSequence
+
+
+def train(input_variable, lengths, target_variable, mask, max_target_len, model, encoder_optimizer, decoder_optimizer,
+          config, device):
+    decoder = model.decoder
+    teacher_forcing_ratio = config['teacher_forcing_ratio']
+    teacher_forcing_mode = config['teacher_forcing_mode']
+    batch_size = input_variable.size(1)
+
+    encoder_optimizer.zero_grad()
+    decoder_optimizer.zero_grad()
+
+    input_variable = input_variable.to(device)
+    # lengths는 host에 둡니다 (pack_padded_sequence가 CPU lengths를 쓰므로 장치로 보냈다가 다시 읽지 않음)
+    target_variable = target_variable.to(device)
+    mask = mask.to(device)
+
+    # precision='bf16'이면 forward와 loss 계산을 autocast 안에서 실행합니다 (backward는 밖에서)
+    with autocast(device, config['precision']):
+        # 인코더 실행 : model='bert'면 encoder_outputs는 BERT 출력, encoder_hidden은 EncoderRNN 또는 BertBridge에서
+        # (bert_model은 학습하지 않으므로 입력 시퀀스마다 한 번만 계산해 둔 출력을 씁니다)
+        encoder_outputs, encoder_hidden = model.input_encoder(input_variable, lengths)
+
+        # 초기 디코더 입력을 생성(각 문장을 SOS 토큰으로 시작)
+        decoder_input = torch.full((1, batch_size), model.cls_index, device=device, dtype=torch.long)
+
+        # 디코더의 초기 은닉 상태를 인코더의 마지막 은닉 상태로
+        decoder_hidden = encoder_hidden[:decoder.n_layers]
+
+        # 인코더 쪽 attention key(및 패딩 마스크)는 배치마다 한 번만 계산해서 모든 디코더 단계에서 씁니다
+        attn_keys = decoder.attn.precompute(encoder_outputs, lengths)
+
+        # teacher_forcing : Decoder부분에서 앞 단어가 잘못 추측되었을 경우 뒤에도 달라지니 정답을 입력해 주는 것
+        # 'batch' : 배치마다 teacher_forcing_ratio 확률로 전체를 teacher forcing
+        # 'element' : scheduled sampling, 단계마다 문장별로 teacher_forcing_ratio 확률로 정답/디코더 출력을 고릅니다
+        if teacher_forcing_mode == 'element':
+            use_teacher_forcing = teacher_forcing_ratio >= 1
+        else:
+            use_teacher_forcing = True if random.random() < teacher_forcing_ratio else False
+
+        if use_teacher_forcing:
+            # Teacher forcing 사용: 디코더 입력이 SOS + 정답(한 칸 민 것)으로 미리 정해져 있으므로
+            # 단계마다 반복하지 않고 LuongAttnDecoderRNN.forwardSequence로 전체 시퀀스를 한 번에 실행합니다
+            decoder_inputs = torch.cat((decoder_input, target_variable[:-1]), 0)
+            decoder_output, decoder_hidden = decoder.forwardSequence(decoder_inputs, decoder_hidden, encoder_outputs, attn_keys)
+            loss, mean_loss = maskNLLLossSequence(decoder.nllLoss(decoder_output, target_variable), mask)
+        else:
+            # 다음 입력/토큰별 loss를 모두 장치 위에 두고, 단계마다 host로 값을 읽지 않습니다
+            crossEntropy = []
+            for t in range(max_target_len):
+                decoder_output, decoder_hidden = decoder(decoder_input, decoder_hidden, encoder_outputs, attn_keys)
+
+                # Teacher forcing 미사용: 다음 입력을 디코더의 출력으로 둡니다
+                decoder_input = decoder_output.argmax(dim=1)
+                if teacher_forcing_mode == 'element' and teacher_forcing_ratio > 0:
+                    use_target = torch.rand(decoder_input.size(0), device=device) < teacher_forcing_ratio
+                    decoder_input = torch.where(use_target, target_variable[t], decoder_input)
+                decoder_input = decoder_input.unsqueeze(0)
+                crossEntropy.append(F.cross_entropy(decoder_output.float(), target_variable[t], reduction='none'))
+            # 단계별 마스크 NLL 평균의 합과 같은 loss, 출력용 값은 마스크된 전체 토큰의 평균 NLL
+            loss, mean_loss = maskNLLLossSequence(torch.stack(crossEntropy), mask)
+
+    loss.backward()
+
+    # clip_grad_norm_: 그라디언트를 제자리에서 수정합니다
+    _ = nn.utils.clip_grad_norm_(model.encoder.parameters(), config['clip'])
+    _ = nn.utils.clip_grad_norm_(decoder.parameters(), config['clip'])
+
+    encoder_optimizer.step()
+    decoder_optimizer.step()
+
+    # 출력용 loss는 장치 위의 텐서로 돌려주고, trainIters가 print_every마다 한 번만 읽습니다
+    return mean_loss.detach()
+
+
+def trainIters(config, model, encoder_optimizer, decoder_optimizer, collator, plan, start_iteration, device):
+    n_iteration = config['n_iteration']
+    print_every = config['print_every']
+    print_loss = 0
+
+    # 각 단계에 대한 배치 설정
+    # 배치는 worker 프로세스에서 필요할 때 만들어지고, iteration번째 배치는 plan(iteration)으로 정해집니다
+    # collator : return inp, lengths, output, mask, max_target_len
+    training_batches = trainBatchLoader(TrainBatchDataset(collator, plan), start_iteration, n_iteration,
+                                        config['batch_workers'], config['batch_prefetch'])
+
+    print("Training...")
+
+    for iteration, training_batch in zip(range(start_iteration, n_iteration + 1), training_batches):
+        torch.cuda.empty_cache() # GPU 캐시 데이터 삭제
+
+        input_variable, lengths, target_variable, mask, max_target_len = training_batch
+
+        # max_tokens를 쓰는 경우 배치마다 크기가 다릅니다
+        loss = train(input_variable, lengths, target_variable, mask, max_target_len, model, encoder_optimizer,
+                     decoder_optimizer, config, device)
+
+        print_loss += loss
+
+        if iteration % print_every == 0:
+            print_loss_avg = print_loss.item() / print_every
+            print("Iteration: {}; Percent complete: {:.1f}%; Average loss: {:.4f}".format(iteration, iteration / n_iteration * 100, print_loss_avg))
+            print_loss = 0
+
+        # Checkpoint를 저장
+        if (iteration % config['save_every'] == 0):
+            directory = checkpointDir(config)
+            if not os.path.exists(directory):
+                os.makedirs(directory)
+            checkpoint = {
+                'iteration': iteration,
+                'en': model.encoder.state_dict(),
+                'de': model.decoder.state_dict(),
+                'en_opt': encoder_optimizer.state_dict(),
+                'de_opt': decoder_optimizer.state_dict(),
+                'loss': loss.item(),
+                'voc_dict': model.voc.__dict__,
+                'embedding': model.embedding.state_dict(),
+                'batch_seed': plan.seed,
+                'model': config['model'],
+                'hidden_size': config['hidden_size'],
+                'attn_model': config['attn_model'],
+                'encoder_n_layers': config['encoder_n_layers'],
+                'decoder_n_layers': config['decoder_n_layers'],
+                'output_head': config['output_head'],
+                'tie_embedding': config['tie_embedding']
+            }
+            if config['output_head'] == 'adaptive':
+                checkpoint['adaptive_cutoffs'] = config['adaptive_cutoffs']
+            if config['model'] == 'bert':
+                checkpoint['encoder_mode'] = config['encoder_mode']
+                checkpoint['bert_layers'] = config['bert_layers']
+                if config['encoder_mode'] == 'bert':
+                    checkpoint['bert_bridge_source'] = config['bert_bridge_source']
+            torch.save(checkpoint, os.path.join(directory, '{}_{}.tar'.format(iteration, 'checkpoint')))
+            if model.bert_features is not None:
+                model.bert_features.flush()
+
+    if model.bert_features is not None:
+        model.bert_features.flush()
+
+
+def runTrain(config):
+    # -> (config, model) : checkpoint의 설정이 반영된 config와 학습한 ChatModel
+    device = selectDevice(config)
+    print(device)
+    print(torch.__version__)
+
+    tokenizer = loadTokenizer(config)
+    voc, pairs = loadPrepareData(config, tokenizer)
+
+    # --checkpoint가 주어지는 경우에는 모델을 불러와서 이어서 학습합니다
+    checkpoint = None
+    start_iteration = 1
+    if config['checkpoint'] is not None:
+        checkpoint = loadCheckpointFile(config['checkpoint'], device)
+        config = applyCheckpoint(config, checkpoint)
+        start_iteration = checkpoint['iteration'] + 1
+    model = buildModel(config, voc, device, checkpoint, pairs, feature_store=True)
+
+    # 저장소의 id 배열에서 패딩된 입력/출력 텐서와 mask를 바로 만듭니다 (batching.PairCollator)
+    # 저장소의 BERT id는 (checkpoint에 저장된) voc.id_map으로 압축 id로 바꿉니다
+    collator = PairCollator(pairs, PAD_token, voc.id_map)
+
+    model.train()
+
+    # Optimizer를 초기화합니다
+    learning_rate = config['learning_rate']
+    encoder_optimizer = optim.Adam(model.encoder.parameters(), lr=learning_rate)
+    decoder_optimizer = optim.Adam(model.decoder.parameters(), lr=learning_rate * config['decoder_learning_ratio'])
+    if checkpoint is not None:
+        encoder_optimizer.load_state_dict(checkpoint['en_opt'])
+        decoder_optimizer.load_state_dict(checkpoint['de_opt'])
+    for optimizer in [encoder_optimizer, decoder_optimizer]:
+        for state in optimizer.state.values():
+            for k, v in state.items():
+                if isinstance(v, torch.Tensor):
+                    state[k] = v.to(device)
+
+    # iteration -> 배치에 들어갈 pairs 인덱스
+    if config['batch_sampler'] == 'bucket':
+        plan = BucketBatchPlan(pairs.inputLengths(), pairs.targetLengths(), config['batch_size'], config['batch_seed'],
+                               max_tokens=config['max_tokens'])
+    else:
+        plan = RandomBatchPlan(len(pairs), config['batch_size'], config['batch_seed'])
+
+    # 학습 단계를 수행합니다
+    trainIters(config, model, encoder_optimizer, decoder_optimizer, collator, plan, start_iteration, device)
+    return config, model
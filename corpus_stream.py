@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Cornell 코퍼스를 스트리밍으로 읽어 질문-응답 쌍을 샤드 파일로 저장합니다
+# 메모리에는 lineID -> movie_lines.txt 바이트 오프셋 인덱스만 유지합니다
+
+import csv
+import os
+import re
+import resource
+import time
+from array import array
+
+FIELD_SEPARATOR = " +++$+++ "
+FIELD_SEPARATOR_BYTES = FIELD_SEPARATOR.encode('iso-8859-1')
+MOVIE_LINES_TEXT_FIELD = 4               # ["lineID", "characterID", "movieID", "character", "text"]
+MOVIE_CONVERSATIONS_UTTERANCE_FIELD = 3  # ["character1ID", "character2ID", "movieID", "utteranceIDs"]
+
+# 파일마다 한 번만 컴파일합니다 (레코드마다 다시 만들지 않음)
+utterance_id_pattern = re.compile('L([0-9]+)')
+
+
+def peakRSS():
+    # 프로세스 최대 메모리 사용량(MB), 리눅스에서 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def buildLineIndex(fileName):
+    # index[1045] = 'L1045' 줄의 시작 바이트 오프셋, 없는 lineID는 -1
+    index = array('q')
+    offset = 0
+    with open(fileName, 'rb') as f:
+        for line in f:
+            lineNum = int(line.split(FIELD_SEPARATOR_BYTES, 1)[0][1:])
+            if lineNum >= len(index):
+                index.extend(array('q', [-1]) * max(lineNum + 1 - len(index), len(index)))
+            index[lineNum] = offset
+            offset += len(line)
+    return index
+
+
+def readLineText(f, index, lineNum):
+    offset = index[lineNum] if lineNum < len(index) else -1
+    if offset < 0:
+        raise KeyError('L{}'.format(lineNum))
+    f.seek(offset)
+    values = f.readline().split(FIELD_SEPARATOR_BYTES)
+    return values[MOVIE_LINES_TEXT_FIELD].decode('iso-8859-1')
+
+
+def streamSentencePairs(linesFile, conversationsFile, index=None):
+    # 대화 하나씩 읽어 i -> i+1 쌍을 바로 내보냅니다 (대화의 마지막 대사는 응답이 없으므로 무시)
+    if index is None:
+        index = buildLineIndex(linesFile)
+    with open(linesFile, 'rb') as lf, open(conversationsFile, 'r', encoding='iso-8859-1') as cf:
+        for line in cf:
+            utteranceIDs = line.split(FIELD_SEPARATOR)[MOVIE_CONVERSATIONS_UTTERANCE_FIELD]
+            texts = [readLineText(lf, index, int(n)).strip() for n in utterance_id_pattern.findall(utteranceIDs)]
+            for inputLine, targetLine in zip(texts, texts[1:]):
+                # 잘못된 샘플은 제거(리스트가 하나라도 비어 있는 경우)
+                if inputLine and targetLine:
+                    yield [inputLine, '[SEP]', targetLine]
+
+
+def shardPath(outputDir, prefix, shard):
+    return os.path.join(outputDir, '{}.{:05d}.txt'.format(prefix, shard))
+
+
+def writeShardedPairs(pairs, outputDir, prefix, shardSize=100000, delimiter=' ', report_every=100000):
+    # shardSize 쌍마다 새 파일을 엽니다. 반환값 : 샤드 파일 경로 리스트
+    if not os.path.exists(outputDir):
+        os.makedirs(outputDir)
+    paths = []
+    outputfile = None
+    writer = None
+    n_pairs = 0
+    start = time.time()
+    try:
+        for pair in pairs:
+            if n_pairs % shardSize == 0:
+                if outputfile is not None:
+                    outputfile.close()
+                paths.append(shardPath(outputDir, prefix, len(paths)))
+                outputfile = open(paths[-1], 'w', encoding='utf-8')
+                writer = csv.writer(outputfile, delimiter=delimiter, lineterminator='\n')
+            writer.writerow(pair)
+            n_pairs += 1
+            if report_every and n_pairs % report_every == 0:
+                reportProgress(n_pairs, start)
+    finally:
+        if outputfile is not None:
+            outputfile.close()
+    reportProgress(n_pairs, start, len(paths))
+    return paths
+
+
+def reportProgress(n_pairs, start, n_shards=None):
+    elapsed = max(time.time() - start, 1e-9)
+    msg = "Pairs: {}; Pairs/sec: {:.0f}; Peak RSS: {:.1f}MB".format(n_pairs, n_pairs / elapsed, peakRSS())
+    if n_shards is not None:
+        msg += "; Shards: {}".format(n_shards)
+    print(msg)
+
+
+def formatCorpus(corpus, outputDir=None, prefix='bert_formatted_movie_lines', shardSize=100000, delimiter=' '):
+    linesFile = os.path.join(corpus, "movie_lines.txt")
+    conversationsFile = os.path.join(corpus, "movie_conversations.txt")
+    pairs = streamSentencePairs(linesFile, conversationsFile)
+    return writeShardedPairs(pairs, outputDir or corpus, prefix, shardSize, delimiter)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 원본 코퍼스 파일 해시 + 전처리 설정을 manifest.json에 기록해 두고
+# 바뀐 것이 없으면 전처리를 통째로 건너뜁니다. 코퍼스(source)가 추가/변경되면 그 코퍼스의 샤드만 다시 만듭니다
+#
+# manifest.json
+# {"settings": {"max_length": 10, "normalization": {...}, "tokenizer": {...}, "shard_size": 100000, "delimiter": " "},
+#  "sources": {"cornell_movie_dialogs_corpus": {"path": ..., "files": {"movie_lines.txt": {"sha1": ..., "size": ..., "mtime": ...}},
+#                                              "shards": [...], "segments": [...]}},
+#  "order": ["cornell_movie_dialogs_corpus", ...]}
+
+import hashlib
+import json
+import os
+import shutil
+
+from corpus_stream import formatCorpus
+from pair_store import NORMALIZATION_SETTINGS, PairStore, buildSegment, mergeSegments, preparePool
+
+MANIFEST = 'manifest.json'
+SOURCE_FILES = ['movie_lines.txt', 'movie_conversations.txt']
+
+
+def fileSha1(path, chunk_size=1 << 20):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprintFiles(sourceDir, previous=None):
+    # 크기와 수정 시각이 그대로면 이전 해시를 재사용하고, 바뀐 경우에만 내용을 다시 해시합니다
+    previous = previous or {}
+    files = {}
+    for name in SOURCE_FILES:
+        path = os.path.join(sourceDir, name)
+        stat = os.stat(path)
+        old = previous.get(name)
+        if old and old['size'] == stat.st_size and old['mtime'] == stat.st_mtime:
+            files[name] = old
+        else:
+            files[name] = {'sha1': fileSha1(path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+    return files
+
+
+def tokenizerIdentity(tokenizer):
+    vocab = sorted(tokenizer.get_vocab().items(), key=lambda x: x[1])
+    return {
+        'class': type(tokenizer).__name__,
+        'name_or_path': getattr(tokenizer, 'name_or_path', ''),
+        'do_lower_case': getattr(tokenizer, 'do_lower_case', None),
+        'vocab_sha1': hashlib.sha1('\n'.join(token for token, _ in vocab).encode('utf-8')).hexdigest(),
+    }
+
+
+def readManifest(storeDir):
+    path = os.path.join(storeDir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def writeManifest(storeDir, manifest):
+    path = os.path.join(storeDir, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def sourceName(sourceDir):
+    return os.path.basename(os.path.normpath(sourceDir))
+
+
+def buildSource(sourceDir, storeDir, tokenizer, settings, pool=None, workers=1):
+    name = sourceName(sourceDir)
+    shards = formatCorpus(sourceDir, prefix='bert_formatted_{}'.format(name),
+                          shardSize=settings['shard_size'], delimiter=settings['delimiter'])
+    segmentRoot = os.path.join(storeDir, 'segments', name)
+    if os.path.exists(segmentRoot):
+        shutil.rmtree(segmentRoot)
+    segments = []
+    for shard in shards:
+        segmentDir = os.path.join(segmentRoot, os.path.splitext(os.path.basename(shard))[0])
+        buildSegment(shard, segmentDir, tokenizer, settings['max_length'], pool, parallel=True, workers=workers)
+        segments.append(segmentDir)
+    return shards, segments
+
+
+def prepareDataset(sources, storeDir, tokenizer, max_length, shardSize=100000, delimiter=' ', workers=None):
+    # sources : Cornell 형식(movie_lines.txt, movie_conversations.txt) 코퍼스 폴더 리스트
+    # workers : 정규화/토크나이즈 프로세스 수 (None이면 os.cpu_count())
+    settings = {
+        'max_length': max_length,
+        'normalization': NORMALIZATION_SETTINGS,
+        'tokenizer': tokenizerIdentity(tokenizer),
+        'shard_size': shardSize,
+        'delimiter': delimiter,
+    }
+    manifest = readManifest(storeDir)
+    if manifest is None or manifest['settings'] != settings:
+        # 설정이 바뀌면 모든 샤드를 다시 만듭니다
+        manifest = {'settings': settings, 'sources': {}, 'order': []}
+        changed = True
+    else:
+        changed = False
+
+    if workers is None:
+        workers = os.cpu_count()
+    pool = None
+    order = [sourceName(s) for s in sources]
+    if len(set(order)) != len(order):
+        raise ValueError('duplicate corpus source names: {}'.format(order))
+    for sourceDir in sources:
+        name = sourceName(sourceDir)
+        entry = manifest['sources'].get(name, {})
+        files = fingerprintFiles(sourceDir, entry.get('files'))
+        unchanged = (entry.get('path') == os.path.abspath(sourceDir) and
+                     entry.get('files') is not None and
+                     all(files[f]['sha1'] == entry['files'][f]['sha1'] for f in SOURCE_FILES) and
+                     all(os.path.exists(os.path.join(s, 'meta.json')) for s in entry.get('segments', [])))
+        if unchanged:
+            entry['files'] = files
+            continue
+        print("Preparing {}...".format(name))
+        if pool is None:
+            pool = preparePool(tokenizer, max_length, workers)
+        shards, segments = buildSource(sourceDir, storeDir, tokenizer, settings, pool, workers)
+        manifest['sources'][name] = {'path': os.path.abspath(sourceDir), 'files': files,
+                                     'shards': shards, 'segments': segments}
+        changed = True
+
+    if pool is not None:
+        pool.shutdown()
+
+    # 목록에서 빠진 코퍼스의 세그먼트는 지웁니다
+    for name in list(manifest['sources']):
+        if name not in order:
+            shutil.rmtree(os.path.join(storeDir, 'segments', name), ignore_errors=True)
+            del manifest['sources'][name]
+            changed = True
+    if manifest['order'] != order:
+        changed = True
+
+    if changed or not os.path.exists(os.path.join(storeDir, 'meta.json')):
+        segments = [s for name in order for s in manifest['sources'][name]['segments']]
+        mergeSegments(segments, storeDir)
+        manifest['order'] = order
+    else:
+        print("Prepared dataset is up to date, skipping preparation.")
+    writeManifest(storeDir, manifest)
+    return PairStore(storeDir)
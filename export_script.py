@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 학습 checkpoint({iteration}_checkpoint.tar)를 TorchScript 파일 하나로 내보냅니다 (탐욕적 디코딩 + 토크나이저 vocab)
+#   python export_script.py save/cb_model/.../4000_checkpoint.tar --out chatbot_script.pt [--int8]
+# 파이토치 챗봇 튜토리얼의 TorchScript 배포와 같은 방식입니다
+#   - 인코더(+ attention precompute)와 디코더 한 단계는 예제 입력으로 trace (모델 구조가 checkpoint마다 고정)
+#   - 디코딩 루프(ScriptedSearch)는 script (문장마다 단계 수가 달라지는 제어 흐름)
+# BERT id -> 압축 id (Voc.id_map), 압축 id -> BERT id (Voc.token_ids) 변환표도 모듈 버퍼로 들어가므로
+# 파일은 BERT id를 받아 BERT id를 돌려줍니다. vocab.txt와 토크나이저 설정(config.json)은 _extra_files로 같이 저장하고
+# script_chat.py가 torch와 wordpiece.py만으로 불러옵니다 (transformers/tensorflow/학습 스크립트 없이)
+# --int8이면 quantize.py의 동적 양자화 모델을 내보냅니다 (인코더 GRU는 fp32)
+# BERT 인코더를 쓰는 checkpoint와 adaptive softmax 출력층은 quantize.checkpointConfig처럼 지원하지 않습니다
+
+import argparse
+import json
+import os
+import warnings
+from typing import Tuple
+
+import torch
+import torch.nn as nn
+from torch.jit import script, trace
+
+from quantize import loadCheckpoint, quantizeModel
+
+
+class EncodeStep(nn.Module):
+    # 인코더 + attention key 계산 (trace용) -> (encoder_outputs, 디코더의 처음 hidden, keys, mask)
+    def __init__(self, encoder, decoder):
+        super(EncodeStep, self).__init__()
+        self.encoder = encoder
+        self.attn = decoder.attn
+        self.n_layers = decoder.n_layers
+
+    def forward(self, input_seq, input_length):
+        encoder_outputs, encoder_hidden = self.encoder(input_seq, input_length)
+        keys, mask = self.attn.precompute(encoder_outputs, input_length)
+        return encoder_outputs, encoder_hidden[:self.n_layers], keys, mask
+
+
+class DecodeStep(nn.Module):
+    # 디코더 한 단계 (trace용). trace는 None/중첩 tuple을 입력으로 받지 않으므로 keys, mask를 따로 받습니다
+    def __init__(self, decoder):
+        super(DecodeStep, self).__init__()
+        self.decoder = decoder
+
+    def forward(self, decoder_input, decoder_hidden, encoder_outputs, keys, mask):
+        return self.decoder(decoder_input, decoder_hidden, encoder_outputs, (keys, mask))
+
+
+class ScriptedSearch(nn.Module):
+    # GreedySearchDecoder.forward와 같은 디코딩 (입력/출력은 BERT id)
+    def __init__(self, encode_step, decode_step, id_map, token_ids, sos_token, eos_token, pad_token=0):
+        super(ScriptedSearch, self).__init__()
+        self.encode_step = encode_step
+        self.decode_step = decode_step
+        self.register_buffer('id_map', id_map) # BERT id -> 압축 id
+        self.register_buffer('token_ids', token_ids) # 압축 id -> BERT id
+        self.sos_token = sos_token # 압축 id
+        self.eos_token = eos_token
+        self.pad_token = pad_token
+
+    # TorchScript는 Tensor가 아닌 인자에 타입 표시가 필요합니다
+    def forward(self, input_seq: torch.Tensor, input_length: torch.Tensor, max_length: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        # input_seq : BERT id [max_len, batch_size] (길이 내림차순), input_length : [batch_size]
+        # 반환값 : BERT id, 점수 [batch_size, 실행한 단계 수 <= max_length] (이미 끝난 문장은 [PAD], 0)
+        device = input_seq.device
+        batch_size = input_seq.size(1)
+        encoder_outputs, decoder_hidden, keys, mask = self.encode_step(self.id_map[input_seq], input_length)
+
+        decoder_input = torch.full((1, batch_size), self.sos_token, device=device, dtype=torch.long)
+        all_tokens = torch.full((batch_size, max_length), self.pad_token, device=device, dtype=torch.long)
+        all_scores = torch.zeros((batch_size, max_length), device=device)
+        finished = torch.zeros(batch_size, device=device, dtype=torch.bool)
+        n_steps = 0
+        for t in range(max_length):
+            decoder_output, decoder_hidden = self.decode_step(decoder_input, decoder_hidden, encoder_outputs, keys, mask)
+            decoder_output = decoder_output.float()
+            decoder_scores, tokens = torch.max(decoder_output, dim=1)
+            decoder_scores = torch.exp(decoder_scores - torch.logsumexp(decoder_output, dim=1))
+            all_tokens[:, t] = tokens.masked_fill(finished, self.pad_token)
+            all_scores[:, t] = decoder_scores.masked_fill(finished, 0.)
+            n_steps = t + 1
+            finished = finished | (tokens == self.eos_token)
+            if bool(finished.all()):
+                break
+            decoder_input = tokens.unsqueeze(0)
+        return self.token_ids[all_tokens[:, :n_steps]], all_scores[:, :n_steps]
+
+
+def tokenizerConfig(tokenizer):
+    # script_chat.py의 WordPieceTokenizer 인자 (BertTokenizer 생성 인자와 특수 토큰)
+    return {'do_lower_case': tokenizer.init_kwargs.get('do_lower_case', True),
+            'tokenize_chinese_chars': tokenizer.init_kwargs.get('tokenize_chinese_chars', True),
+            'strip_accents': tokenizer.init_kwargs.get('strip_accents'),
+            'unk_token': tokenizer.unk_token, 'cls_token': tokenizer.cls_token, 'sep_token': tokenizer.sep_token,
+            'pad_token': tokenizer.pad_token, 'mask_token': tokenizer.mask_token}
+
+
+def scriptSearcher(encoder, decoder, voc):
+    # encoder, decoder : eval 모드의 EncoderRNN, LuongAttnDecoderRNN (quantizeModel 결과도 가능) -> ScriptedSearch (script)
+    tokenizer = voc.tokenizer
+    n_tokens = len(tokenizer.vocab)
+    id_map = torch.arange(n_tokens) if voc.id_map is None else torch.as_tensor(voc.id_map)
+    token_ids = torch.arange(n_tokens) if voc.token_ids is None else torch.as_tensor(voc.token_ids)
+    sos = int(id_map[tokenizer.cls_token_id])
+    eos = int(id_map[tokenizer.sep_token_id])
+
+    # 예제 입력 : 길이가 다른 두 문장 (pack_padded_sequence/패딩 마스크 경로가 trace에 들어가도록)
+    input_seq = torch.full((6, 2), voc.toIndex(tokenizer.pad_token_id).item(), dtype=torch.long)
+    input_seq[:, 0] = torch.as_tensor(voc.toIndex([tokenizer.cls_token_id] + [tokenizer.unk_token_id] * 4 +
+                                                  [tokenizer.sep_token_id]))
+    input_seq[:4, 1] = input_seq[[0, 1, 2, 5], 0]
+    input_length = torch.tensor([6, 4])
+    encode_step = EncodeStep(encoder, decoder).eval()
+    decode_step = DecodeStep(decoder).eval()
+    with torch.no_grad(), warnings.catch_warnings():
+        # pack_padded_sequence의 길이 텐서 변환 등 trace 경고 (입력 크기에 따라 값이 바뀌지 않는 부분)와
+        # torch.jit 이전 안내 경고는 감춥니다
+        warnings.simplefilter('ignore', torch.jit.TracerWarning)
+        warnings.simplefilter('ignore', FutureWarning)
+        warnings.simplefilter('ignore', DeprecationWarning)
+        traced_encoder = trace(encode_step, (input_seq, input_length))
+        encoder_outputs, decoder_hidden, keys, mask = encode_step(input_seq, input_length)
+        decoder_input = torch.full((1, 2), sos, dtype=torch.long)
+        traced_decoder = trace(decode_step, (decoder_input, decoder_hidden, encoder_outputs, keys, mask))
+        return script(ScriptedSearch(traced_encoder, traced_decoder, id_map, token_ids, sos, eos,
+                                     int(voc.toIndex(tokenizer.pad_token_id))))
+
+
+def saveScripted(path, scripted, voc, max_length):
+    tokenizer = voc.tokenizer
+    # BERT id 순서의 WordPiece 목록 (vocab.txt에 같은 토큰이 두 번 있어 비는 id는 어떤 조각과도 맞지 않는 빈 줄)
+    vocab = [token or '' for token in tokenizer.convert_ids_to_tokens(list(range(len(tokenizer.vocab))))]
+    config = {'tokenizer': tokenizerConfig(tokenizer), 'max_length': max_length}
+    scripted.save(path, _extra_files={'vocab.txt': '\n'.join(vocab) + '\n', 'config.json': json.dumps(config)})
+
+
+def exportScripted(encoder, decoder, voc, path, max_length):
+    # chatbot/chat.py에서 부릅니다 (--torchscript_file, 모델이 이미 메모리에 있을 때)
+    scripted = scriptSearcher(encoder.eval(), decoder.eval(), voc)
+    saveScripted(path, scripted, voc, max_length)
+    return scripted
+
+
+def checkScripted(reference, scripted, voc, prompts, max_length):
+    # 같은 문장들에서 eager GreedySearchDecoder와 TorchScript 결과 토큰이 같은 비율
+    same = 0
+    for (tokens, _), prompt in zip(reference.decodeBatch([voc.toIndex(p).tolist() for p in prompts], max_length), prompts):
+        scripted_tokens = scripted(torch.tensor(prompt).unsqueeze(1), torch.tensor([len(prompt)]), max_length)[0][0]
+        same += voc.toTokenIds(tokens).tolist() == scripted_tokens.tolist()
+    return same / max(len(prompts), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('checkpoint')
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--int8', action='store_true') # quantize.py의 동적 양자화 모델을 내보냅니다
+    parser.add_argument('--max_length', type=int, default=10) # script_chat.py의 기본 응답 길이
+    args = parser.parse_args()
+
+    from seq2seq import GreedySearchDecoder
+    torch.set_grad_enabled(False)
+    encoder, decoder, voc, config = loadCheckpoint(args.checkpoint)
+    if args.int8:
+        # 동적 양자화된 GRU는 packed 입력으로 trace하면 예제의 batch 크기가 고정되므로 인코더 GRU만 fp32로 둡니다
+        # (인코더는 응답마다 한 번, 디코더는 토큰마다 실행)
+        gru = encoder.gru
+        encoder, decoder = quantizeModel(encoder, decoder)
+        encoder.gru = gru
+    scripted = exportScripted(encoder, decoder, voc, args.out, args.max_length)
+
+    tokenizer = voc.tokenizer
+    reference = GreedySearchDecoder(encoder, decoder, int(voc.toIndex(tokenizer.cls_token_id)),
+                                    int(voc.toIndex(tokenizer.sep_token_id)))
+    prompts = [tokenizer.encode(s) for s in ['hello .', 'how are you ?', 'where are you going tonight ?',
+                                             'i do not know what you are talking about .']]
+    print("config {}".format(config))
+    print("same replies as the eager searcher {:.2f} ({} prompts)".format(
+        checkScripted(reference, scripted, voc, prompts, args.max_length), len(prompts)))
+    print("saved {} ({:.1f}MB)".format(args.out, os.path.getsize(args.out) / 2 ** 20))
+
+
+if __name__ == '__main__':
+    main()
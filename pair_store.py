@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 정규화 + WordPiece 인코딩을 한 번만 수행해 디스크에 저장하는 문장 쌍 저장소
+# input/target 토큰 id를 평평한 int32 배열로, 각 쌍의 시작 위치를 int64 offsets 배열로 저장하고
+# 학습 때는 np.memmap으로 열어서 인덱스로 배치를 꺼냅니다
+#
+# storeDir/
+#   input_ids.int32   input_offsets.int64   (offsets[i] : offsets[i+1] 가 i번째 쌍의 질문)
+#   target_ids.int32  target_offsets.int64
+#   meta.json
+
+import collections
+import json
+import os
+import re
+import shutil
+import tempfile
+import unicodedata
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+STORE_ARRAYS = [('input_ids', 'int32'), ('input_offsets', 'int64'),
+                ('target_ids', 'int32'), ('target_offsets', 'int64')]
+STORE_META = 'meta.json'
+
+
+# normalizeString/filterPair를 바꾸면 version을 올려 주세요 (manifest가 저장소를 다시 만듭니다)
+NORMALIZATION_SETTINGS = {'version': 1, 'lower': True, 'strip_accents': True,
+                          'keep': '[a-zA-Z.!?]', 'filter': 'words < max_length'}
+
+
+# 유니코드 문자열을 아스키로 변환합니다
+# https://stackoverflow.com/a/518232/2809427 참고
+def unicodeToAscii(s):
+    # 이미 아스키인 문자열은 NFD 결과가 같고 결합 문자(Mn)도 없으므로 그대로 돌려줍니다
+    if s.isascii():
+        return s
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', s)
+        if unicodedata.category(c) != 'Mn'
+    )
+
+punctuation_pattern = re.compile(r"([.!?])")
+non_letter_pattern = re.compile(r"[^a-zA-Z.!?]+")
+whitespace_pattern = re.compile(r"\s+")
+
+# 소문자로 만들고, 공백을 넣고, 알파벳 외의 글자를 제거합니다
+def normalizeString(s):
+    s = unicodeToAscii(s.lower().strip())
+    s = punctuation_pattern.sub(r" \1", s)
+    s = non_letter_pattern.sub(r" ", s)
+    s = whitespace_pattern.sub(r" ", s).strip()
+    return s
+
+def filterPair(p, max_length):
+    return len(p[0].split(' ')) < max_length and len(p[1].split(' ')) < max_length
+
+
+def normalizePairs(lines, max_length):
+    # lines : 'inputLine [SEP] targetLine' 형식의 csv 줄
+    for l in lines:
+        if not l.strip():
+            continue
+        pair = [normalizeString(s) for s in l.strip().split('[SEP]')]
+        if filterPair(pair, max_length):
+            yield pair[0].strip(), pair[1].strip()
+
+
+def encodePairs(lines, tokenizer, max_length):
+    for inputLine, targetLine in normalizePairs(lines, max_length):
+        yield tokenizer.encode(inputLine), tokenizer.encode(targetLine)
+
+
+def fastTokenizer(tokenizer):
+    # 느린 BertTokenizer와 같은 vocab/설정으로 Rust 기반 BertTokenizerFast를 만듭니다
+    if getattr(tokenizer, 'is_fast', False):
+        return tokenizer
+    from transformers import BertTokenizerFast
+    with tempfile.TemporaryDirectory() as vocabDir:
+        vocab_file = tokenizer.save_vocabulary(vocabDir)[0]
+        return BertTokenizerFast(vocab_file, do_lower_case=tokenizer.do_lower_case,
+                                 strip_accents=tokenizer.basic_tokenizer.strip_accents,
+                                 tokenize_chinese_chars=tokenizer.basic_tokenizer.tokenize_chinese_chars)
+
+
+# 전처리 프로세스마다 한 번만 설정되는 값들
+_worker = {}
+
+def initWorker(tokenizer, max_length):
+    _worker['tokenizer'] = tokenizer
+    _worker['max_length'] = max_length
+
+def encodeChunk(lines):
+    # 줄 묶음 하나를 정규화하고 배치 토크나이저로 한 번에 id로 바꿉니다
+    pairs = list(normalizePairs(lines, _worker['max_length']))
+    if not pairs:
+        return []
+    tokenizer = _worker['tokenizer']
+    input_ids = tokenizer([p[0] for p in pairs], add_special_tokens=True)['input_ids']
+    target_ids = tokenizer([p[1] for p in pairs], add_special_tokens=True)['input_ids']
+    return list(zip(input_ids, target_ids))
+
+def readChunks(f, chunk_size):
+    chunk = []
+    for line in f:
+        chunk.append(line)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def preparePool(tokenizer, max_length, workers):
+    # workers 개의 프로세스를 띄웁니다. workers <= 1이면 None(현재 프로세스에서 배치 토크나이저로 처리)
+    tokenizer = fastTokenizer(tokenizer)
+    initWorker(tokenizer, max_length)
+    if workers is None or workers <= 1:
+        return None
+    return ProcessPoolExecutor(workers, initializer=initWorker, initargs=(tokenizer, max_length))
+
+def encodeChunks(f, pool, workers=1, chunk_size=5000):
+    # workers : pool을 만들 때 쓴 프로세스 수. 한 번에 2 * workers개의 묶음만 pool에 넣어 두고 들어간 순서대로 결과를 꺼냅니다
+    # (pool.map은 입력 전체를 먼저 제출하므로 큰 코퍼스의 줄과 결과가 모두 메모리에 올라옵니다)
+    # 출력 순서는 직렬 처리와 같습니다
+    chunks = readChunks(f, chunk_size)
+    if pool is None:
+        results = map(encodeChunk, chunks)
+    else:
+        results = boundedMap(pool, encodeChunk, chunks, 2 * workers)
+    for encoded in results:
+        for pair in encoded:
+            yield pair
+
+def boundedMap(pool, fn, items, max_pending):
+    pending = collections.deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def storePath(storeDir, name, dtype):
+    return os.path.join(storeDir, '{}.{}'.format(name, dtype))
+
+
+def writeStore(encodedPairs, storeDir, **meta):
+    # encodedPairs : (input_ids, target_ids) 반복자
+    if not os.path.exists(storeDir):
+        os.makedirs(storeDir)
+    input_ids, target_ids = array('i'), array('i')
+    input_offsets, target_offsets = array('q', [0]), array('q', [0])
+    for inp, tgt in encodedPairs:
+        input_ids.extend(inp)
+        input_offsets.append(len(input_ids))
+        target_ids.extend(tgt)
+        target_offsets.append(len(target_ids))
+    arrays = {'input_ids': input_ids, 'input_offsets': input_offsets,
+              'target_ids': target_ids, 'target_offsets': target_offsets}
+    for name, dtype in STORE_ARRAYS:
+        with open(storePath(storeDir, name, dtype), 'wb') as f:
+            arrays[name].tofile(f)
+    meta['n_pairs'] = len(input_offsets) - 1
+    with open(os.path.join(storeDir, STORE_META), 'w') as f:
+        json.dump(meta, f)
+    return meta['n_pairs']
+
+
+def buildSegment(datafile, segmentDir, tokenizer, max_length, pool=None, parallel=False, workers=1):
+    # parallel=True 이면 preparePool로 준비한 배치 토크나이저(pool이 있으면 프로세스 풀)를 사용합니다
+    with open(datafile, encoding='utf-8') as f:
+        encoded = encodeChunks(f, pool, workers) if parallel else encodePairs(f, tokenizer, max_length)
+        return writeStore(encoded, segmentDir, source=os.path.basename(datafile), max_length=max_length)
+
+
+def mergeSegments(segmentDirs, storeDir):
+    # 세그먼트(샤드별 저장소)를 바이트 단위로 이어 붙입니다. offsets만 누적 위치만큼 밀어줍니다
+    if not os.path.exists(storeDir):
+        os.makedirs(storeDir)
+    for name, dtype in STORE_ARRAYS:
+        with open(storePath(storeDir, name, dtype), 'wb') as out:
+            if name.endswith('_offsets'):
+                np.zeros(1, dtype=dtype).tofile(out)
+            base = 0
+            for segmentDir in segmentDirs:
+                path = storePath(segmentDir, name, dtype)
+                if name.endswith('_offsets'):
+                    offsets = np.fromfile(path, dtype=dtype)
+                    (offsets[1:] + base).tofile(out)
+                    base += int(offsets[-1])
+                else:
+                    with open(path, 'rb') as f:
+                        shutil.copyfileobj(f, out)
+    metas = [PairStore.readMeta(segmentDir) for segmentDir in segmentDirs]
+    n_pairs = sum(meta['n_pairs'] for meta in metas)
+    with open(os.path.join(storeDir, STORE_META), 'w') as f:
+        json.dump({'n_pairs': n_pairs, 'segments': [os.path.basename(s) for s in segmentDirs]}, f)
+    return n_pairs
+
+
+def buildPairStore(datafiles, storeDir, tokenizer, max_length, workers=None):
+    # 샤드 하나당 세그먼트 하나를 만든 뒤 하나의 저장소로 합칩니다
+    pool = preparePool(tokenizer, max_length, workers)
+    try:
+        segmentDirs = []
+        for datafile in datafiles:
+            segmentDir = os.path.join(storeDir, 'segments', os.path.splitext(os.path.basename(datafile))[0])
+            buildSegment(datafile, segmentDir, tokenizer, max_length, pool, parallel=True, workers=workers)
+            segmentDirs.append(segmentDir)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    mergeSegments(segmentDirs, storeDir)
+    return PairStore(storeDir)
+
+
+class PairStore:
+    def __init__(self, storeDir):
+        self.storeDir = storeDir
+        self.meta = self.readMeta(storeDir)
+        for name, dtype in STORE_ARRAYS:
+            setattr(self, name, self.openArray(storePath(storeDir, name, dtype), dtype))
+
+    @staticmethod
+    def readMeta(storeDir):
+        with open(os.path.join(storeDir, STORE_META)) as f:
+            return json.load(f)
+
+    @staticmethod
+    def openArray(path, dtype):
+        # 크기가 0인 파일은 memmap으로 열 수 없습니다
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def __len__(self):
+        return len(self.input_offsets) - 1
+
+    def inputIds(self, i):
+        return self.input_ids[self.input_offsets[i]:self.input_offsets[i + 1]]
+
+    def targetIds(self, i):
+        return self.target_ids[self.target_offsets[i]:self.target_offsets[i + 1]]
+
+    def inputLengths(self):
+        return np.diff(self.input_offsets)
+
+    def targetLengths(self):
+        return np.diff(self.target_offsets)
+
+    def targetTokenCounts(self, vocab_size):
+        # 응답 토큰 id별 등장 횟수 (AdaptiveSoftmaxHead의 빈도 순서 클러스터에 씁니다)
+        return np.bincount(self.target_ids, minlength=vocab_size)
+
+    def __getitem__(self, i):
+        return self.inputIds(i), self.targetIds(i)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 학습 checkpoint({iteration}_checkpoint.tar)로 CPU 서비스용 int8 동적 양자화 모델을 만듭니다
+#   python quantize.py save/cb_model/.../4000_checkpoint.tar --out cb_model_int8.pt --prompts prompts.txt
+#   - EncoderRNN/LuongAttnDecoderRNN의 GRU와 concat/out Linear : int8 가중치 + 실행할 때 활성값 양자화 (quantize_dynamic)
+#   - 공유 임베딩 : 행마다 scale/zero_point를 둔 weight-only int8 (--embedding fp32면 그대로)
+#   - attention의 Linear(general/concat)는 precompute가 가중치를 직접 쓰므로 fp32로 둡니다
+# 학습에 쓰지 않은 같은 프롬프트(--prompts)에서 fp32 모델과 int8 모델의 탐욕적 디코딩 결과가 얼마나 같은지,
+# 크기/불러오는 시간/응답 지연 시간을 출력합니다
+# 결과 파일은 모듈을 그대로 pickle하므로 torch.load(..., weights_only=False)로 (믿을 수 있는 파일만) 불러옵니다
+# model='bert' (bert_model_large_en_pytorch_chatbot_tutorial.py)의 checkpoint는 인코더 출력이 BERT에서 나오므로 지원하지 않습니다
+
+import argparse
+import io
+import os
+import time
+import warnings
+
+import torch
+import torch.nn as nn
+from torch.ao.quantization import default_dynamic_qconfig, float_qparams_weight_only_qconfig, quantize_dynamic
+
+from seq2seq import EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+from vocab import Voc
+
+
+def checkpointConfig(checkpoint):
+    # state_dict 모양에서 모델 설정을 읽습니다 (checkpoint에는 hidden_size/층 수/attention 방식이 따로 저장되지 않음)
+    if checkpoint.get('encoder_mode') is not None:
+        raise ValueError('Checkpoints with a BERT encoder (encoder_mode={!r}) cannot be quantized without BERT.'.format(
+            checkpoint['encoder_mode']))
+    if checkpoint.get('output_head', 'linear') != 'linear':
+        raise ValueError(checkpoint['output_head'], "is not supported, quantize.py needs output_head='linear'.")
+    num_words, hidden_size = checkpoint['embedding']['weight'].shape
+    de = checkpoint['de']
+    if 'attn.v' in de:
+        attn_model = 'concat'
+    elif 'attn.attn.weight' in de:
+        attn_model = 'general'
+    else:
+        attn_model = 'dot'
+    return {'hidden_size': hidden_size, 'num_words': num_words, 'attn_model': attn_model,
+            'encoder_n_layers': sum(1 for k in checkpoint['en'] if k.startswith('gru.weight_ih_l') and 'reverse' not in k),
+            'decoder_n_layers': sum(1 for k in de if k.startswith('gru.weight_ih_l'))}
+
+
+def loadCheckpoint(path):
+    # fp32 모델 -> (encoder, decoder, voc, config)
+    checkpoint = torch.load(path, weights_only=False, map_location='cpu')
+    config = checkpointConfig(checkpoint)
+    voc = Voc('checkpoint', checkpoint['voc_dict']['tokenizer']).loadDict(checkpoint['voc_dict'])
+    embedding = nn.Embedding(config['num_words'], config['hidden_size'])
+    embedding.load_state_dict(checkpoint['embedding'])
+    encoder = EncoderRNN(config['hidden_size'], embedding, config['encoder_n_layers'])
+    decoder = LuongAttnDecoderRNN(config['attn_model'], embedding, config['hidden_size'], config['num_words'],
+                                  config['decoder_n_layers'], tie_embedding=checkpoint.get('tie_embedding', False))
+    encoder.load_state_dict(checkpoint['en'])
+    decoder.load_state_dict(checkpoint['de'])
+    return encoder.eval(), decoder.eval(), voc, config
+
+
+def quantizeModel(encoder, decoder, embedding='int8'):
+    # -> (encoder, decoder) int8. 원래 모듈은 바꾸지 않습니다
+    with warnings.catch_warnings():
+        # torch.ao.quantization 이전 안내와 양자화된 임베딩 안내 경고는 감춥니다
+        warnings.simplefilter('ignore', DeprecationWarning)
+        warnings.simplefilter('ignore', UserWarning)
+        qencoder = quantize_dynamic(encoder, {'gru': default_dynamic_qconfig})
+        qdecoder = quantize_dynamic(decoder, {'gru': default_dynamic_qconfig, 'concat': default_dynamic_qconfig,
+                                              'out': default_dynamic_qconfig})
+        shared = encoder.embedding
+        if embedding == 'int8':
+            shared = quantize_dynamic(nn.Sequential(shared), {nn.Embedding: float_qparams_weight_only_qconfig})[0]
+    # 인코더/디코더가 임베딩 하나를 같이 쓰도록 다시 묶습니다 (quantize_dynamic은 모듈마다 따로 복사함)
+    qencoder.embedding = shared
+    qdecoder.embedding = shared
+    return qencoder.eval(), qdecoder.eval()
+
+
+def saveQuantized(path, encoder, decoder, voc, config):
+    torch.save({'encoder': encoder, 'decoder': decoder, 'voc_dict': voc.__dict__, 'config': config}, path)
+
+
+def loadQuantized(path):
+    # -> (searcher, voc)
+    artifact = torch.load(path, weights_only=False, map_location='cpu')
+    voc = Voc('quantized', artifact['voc_dict']['tokenizer']).loadDict(artifact['voc_dict'])
+    sos = int(voc.toIndex(voc.tokenizer.cls_token_id))
+    eos = int(voc.toIndex(voc.tokenizer.sep_token_id))
+    return GreedySearchDecoder(artifact['encoder'], artifact['decoder'], sos, eos), voc
+
+
+def tokenAgreement(reference, candidate, prompts, max_length):
+    # 두 searcher의 응답이 같은 위치에서 같은 토큰인 비율 (reference 응답 길이 기준)과 응답 전체가 같은 비율
+    same_tokens, n_tokens, same_replies = 0, 0, 0
+    for (ref, _), (cand, _) in zip(reference.decodeBatch(prompts, max_length), candidate.decodeBatch(prompts, max_length)):
+        same_tokens += sum(1 for a, b in zip(ref, cand) if a == b)
+        n_tokens += len(ref)
+        same_replies += ref == cand
+    return same_tokens / max(n_tokens, 1), same_replies / max(len(prompts), 1)
+
+
+def replyLatency(searcher, prompts, max_length):
+    # 문장 하나씩 (batch 1) 응답을 만드는 데 걸리는 평균 시간
+    searcher.decodeBatch(prompts[:1], max_length)
+    start = time.time()
+    for prompt in prompts:
+        searcher.decodeBatch([prompt], max_length)
+    return (time.time() - start) / len(prompts)
+
+
+def moduleBytes(encoder, decoder):
+    # 양자화된 모듈의 packed 가중치도 포함되도록 직렬화한 크기로 잽니다
+    buffer = io.BytesIO()
+    torch.save((encoder, decoder), buffer)
+    return buffer.tell()
+
+
+def loadPrompts(path, voc, n_prompts):
+    # 학습에 쓰지 않은 문장 (한 줄에 하나)
+    with open(path) as f:
+        sentences = [line.strip() for line in f if line.strip()]
+    return [voc.toIndex(voc.tokenizer.encode(s)).tolist() for s in sentences[:n_prompts]]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('checkpoint')
+    parser.add_argument('--out', required=True)
+    parser.add_argument('--embedding', choices=['int8', 'fp32'], default='int8')
+    parser.add_argument('--prompts', required=True) # 학습 데이터와 겹치지 않는 문장, 한 줄에 하나
+    parser.add_argument('--n_prompts', type=int, default=200)
+    parser.add_argument('--max_length', type=int, default=10)
+    args = parser.parse_args()
+
+    torch.set_grad_enabled(False)
+    start = time.time()
+    encoder, decoder, voc, config = loadCheckpoint(args.checkpoint)
+    fp32_load = time.time() - start
+    qencoder, qdecoder = quantizeModel(encoder, decoder, args.embedding)
+    saveQuantized(args.out, qencoder, qdecoder, voc, config)
+
+    start = time.time()
+    searcher, voc = loadQuantized(args.out)
+    int8_load = time.time() - start
+    reference = GreedySearchDecoder(encoder, decoder, searcher.sos_token, searcher.eos_token)
+    prompts = loadPrompts(args.prompts, voc, args.n_prompts)
+
+    token_agreement, reply_agreement = tokenAgreement(reference, searcher, prompts, args.max_length)
+    print("config {}".format(config))
+    print("token agreement {:.4f}, identical replies {:.4f} ({} prompts)".format(
+        token_agreement, reply_agreement, len(prompts)))
+    print("fp32  model {:7.1f}MB  load {:6.2f}s (checkpoint)  reply {:7.1f} ms".format(
+        moduleBytes(encoder, decoder) / 2 ** 20, fp32_load, replyLatency(reference, prompts, args.max_length) * 1e3))
+    print("int8  model {:7.1f}MB  load {:6.2f}s ({})  reply {:7.1f} ms".format(
+        os.path.getsize(args.out) / 2 ** 20, int8_load, args.out, replyLatency(searcher, prompts, args.max_length) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
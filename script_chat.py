@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# export_script.py로 내보낸 TorchScript 파일로 채팅합니다 (torch와 wordpiece.py만 import)
+#   python script_chat.py chatbot_script.pt
+#   python script_chat.py chatbot_script.pt --ask "how are you ?"
+# 학습 스크립트, transformers, tensorflow를 import하지 않으므로 빨리 시작합니다
+
+import argparse
+import json
+import sys
+import time
+import warnings
+
+import torch
+
+from wordpiece import WordPieceTokenizer
+
+
+class ScriptedChatbot:
+    def __init__(self, path, map_location='cpu'):
+        extra_files = {'vocab.txt': '', 'config.json': ''}
+        with warnings.catch_warnings():
+            # torch.jit 이전 안내 경고는 감춥니다
+            warnings.simplefilter('ignore', FutureWarning)
+            warnings.simplefilter('ignore', DeprecationWarning)
+            self.searcher = torch.jit.load(path, map_location=map_location, _extra_files=extra_files)
+        self.searcher.eval()
+        self.device = torch.device(map_location)
+        vocab, config = [extra_files[name].decode('utf-8') if isinstance(extra_files[name], bytes) else extra_files[name]
+                         for name in ['vocab.txt', 'config.json']]
+        config = json.loads(config)
+        self.tokenizer = WordPieceTokenizer(vocab.split('\n')[:-1], **config['tokenizer'])
+        self.max_length = config['max_length']
+
+    @torch.no_grad()
+    def replyIds(self, sentence, max_length=None):
+        # 문장 -> 응답 BERT id 리스트 ([SEP]까지)
+        input_ids = self.tokenizer.encode(sentence)
+        input_seq = torch.tensor(input_ids, device=self.device).unsqueeze(1)
+        input_length = torch.tensor([len(input_ids)])
+        tokens, _ = self.searcher(input_seq, input_length, max_length or self.max_length)
+        return tokens[0].tolist()
+
+    def reply(self, sentence, max_length=None):
+        # evaluateStream과 같이 '.' 또는 '?'가 나오면 거기까지만 씁니다
+        text = ''
+        for delta in self.tokenizer.detokenize(self.replyIds(sentence, max_length)):
+            text += delta
+            if delta.strip() == '.' or delta.strip() == '?':
+                break
+        return text
+
+
+def main():
+    start = time.time()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('path')
+    parser.add_argument('--ask', default=None) # 문장 하나에 답하고 끝냅니다
+    parser.add_argument('--max_length', type=int, default=None)
+    parser.add_argument('--device', default='cpu')
+    args = parser.parse_args()
+
+    chatbot = ScriptedChatbot(args.path, args.device)
+    if args.ask is not None:
+        print('Bot:', chatbot.reply(args.ask, args.max_length))
+        print("startup + first reply {:.2f}s".format(time.time() - start), file=sys.stderr)
+        return
+    while True:
+        try:
+            input_sentence = input('> ')
+        except EOFError:
+            break
+        if input_sentence == 'exit' or input_sentence == 'quit':
+            break
+        print('Bot:', chatbot.reply(input_sentence, args.max_length))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,557 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 인코더 / attention / 디코더 / 탐색 모듈 (두 튜토리얼 스크립트가 같이 씁니다)
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+
+class EncoderRNN(nn.Module):
+    def __init__(self, hidden_size, embedding, n_layers=1, dropout=0):
+        super(EncoderRNN, self).__init__()
+        self.n_layers = n_layers
+        self.hidden_size = hidden_size
+        self.embedding = embedding
+        self.gru = nn.GRU(hidden_size, hidden_size, n_layers, 
+                          dropout = (0 if n_layers == 1 else dropout), bidirectional=True)
+        
+    def forward(self, input_seq, input_lengths, hidden=None):
+        embedded = self.embedding(input_seq) # input_seq : shape=(max_length, batch_size), input_variable
+        # print(input_lengths) : =lengths
+        # print(embedded.shape) : torch.Size([10, 64, 500]) [max_length, batch_size, hidden_size(은닉상태 크기)]
+        
+        # nn.utils.rnn.pack_padded_sequence : 패딩연산처리 쉽게하기 위해 중간에 빈공간 제거(형태 : tensor)
+        packed = nn.utils.rnn.pack_padded_sequence(embedded, input_lengths.cpu()) # input_lengths : shape=(batch_size)
+        #print(packed.batch_sizes)
+        # print(packed.batch_sizes) : tensor([64, 64, 64, 58, 52, 45, 38, 17,  8,  2])
+        
+        outputs, hidden = self.gru(packed, hidden) # 입력hidden : shape=(n_layers * num_directions, batch_size, hidden_size)
+        # print(outputs.batch_sizes) : tensor([64, 64, 63, 52, 47, 34, 24, 18, 12,  6])
+        # print(hidden.shape) : torch.Size([4, 64, 500]) [층 * 양방향이면2 아니면1, batch_size, hidden_size]
+        
+        # nn.utils.rnn.pad_packed_sequence : 패딩연산이 끝난 것을 다시 원래대로 (형태 : torch)
+        outputs, _ = nn.utils.rnn.pad_packed_sequence(outputs)
+        #print(outputs.shape)
+        # print(outputs.shape)# : torch.Size([10, 64, 1000]) # [max_length, batch_size, hidden_size(양방향으로 진행했으면 *2)]
+        
+        # 양방향 GRU의 출력을 합산합니다
+        outputs = outputs[:, :, :self.hidden_size] + outputs[:, : ,self.hidden_size:]
+        # print(outputs.shape) : torch.Size([10, 64, 500])
+        
+        # hidden : GRU의 최종 은닉 상태
+        return outputs, hidden
+
+class Attn(nn.Module):
+    def __init__(self, method, hidden_size):
+        super(Attn, self).__init__()
+        self.method = method
+        if self.method not in ['dot', 'general', 'concat']:
+            raise ValueError(self.method, 'is not an appropriate attention method.')
+        self.hidden_size = hidden_size
+        if self.method == 'general':
+            self.attn = nn.Linear(self.hidden_size, hidden_size)
+        elif self.method == 'concat':
+            self.attn = nn.Linear(self.hidden_size * 2, hidden_size)
+            self.v = nn.Parameter(torch.FloatTensor(hidden_size))
+            
+    def precompute(self, encoder_outputs, input_lengths=None):
+        # 인코더 쪽 계산은 문장마다 한 번만 해 두고 디코더의 모든 단계에서 다시 씁니다
+        # encoder_outputs : [max_length, batch_size, hidden_size], input_lengths : [batch_size] (None이면 패딩 없음)
+        # 반환값 (keys, mask)
+        #   dot     : keys = encoder_outputs                  [batch_size, max_length, hidden_size]
+        #   general : keys = attn(encoder_outputs)            [batch_size, max_length, hidden_size]
+        #   concat  : keys = W_e encoder_outputs + b          [max_length, batch_size, hidden_size]
+        #             (attn(cat(h, e)) = W_h h + W_e e + b 에서 인코더 쪽 절반)
+        #   mask    : 실제 토큰 위치 True [batch_size, 1, max_length]
+        if self.method == 'dot':
+            keys = encoder_outputs.transpose(0, 1)
+        elif self.method == 'general':
+            keys = self.attn(encoder_outputs.transpose(0, 1))
+        elif self.method == 'concat':
+            keys = F.linear(encoder_outputs, self.attn.weight[:, self.hidden_size:], self.attn.bias)
+        mask = None
+        if input_lengths is not None:
+            positions = torch.arange(encoder_outputs.size(0), device=encoder_outputs.device)
+            mask = (positions[None, :] < input_lengths.to(encoder_outputs.device)[:, None]).unsqueeze(1)
+        return keys, mask
+
+    # 가중치 계산을 dot-product로 계산
+    def dot_score(self, hidden, keys):
+        # hidden : [tgt_len, batch_size, hidden_size] -> [batch_size, tgt_len, max_length]
+        return hidden.transpose(0, 1).bmm(keys.transpose(1, 2))
+    
+    # keys에 이미 attn(encoder_output)이 들어 있으므로 dot과 같은 계산
+    def general_score(self, hidden, keys):
+        return hidden.transpose(0, 1).bmm(keys.transpose(1, 2))
+    
+    
+    def concat_score(self, hidden, keys):
+        # Tanh 함수는 함수값을 [-1, 1]로 제한시킴
+        # 단계마다 cat + Linear 대신 디코더 쪽 절반(W_h h)만 계산해서 미리 계산한 인코더 쪽 절반에 더합니다
+        query = F.linear(hidden, self.attn.weight[:, :self.hidden_size]) # [tgt_len, batch_size, hidden_size]
+        energy = (query.unsqueeze(1) + keys.unsqueeze(0)).tanh() # [tgt_len, max_length, batch_size, hidden_size]
+        return torch.sum(self.v * energy, dim=3).permute(2, 0, 1)
+    
+    def forward(self, hidden, encoder_outputs, attn_keys=None):
+        # hidden : 디코더 GRU 출력 [tgt_len, batch_size, hidden_size] (한 단계씩 디코딩할 때는 tgt_len = 1)
+        # attn_keys : precompute의 결과 (None이면 여기서 계산, 패딩 마스크 없음)
+        # 반환값 : [batch_size, tgt_len, max_length]
+        keys, mask = attn_keys if attn_keys is not None else self.precompute(encoder_outputs)
+        if self.method == 'general':
+            attn_energies = self.general_score(hidden, keys)
+        elif self.method == 'concat':
+            attn_energies = self.concat_score(hidden, keys)
+        elif self.method == 'dot':
+            attn_energies = self.dot_score(hidden, keys)
+
+        # 패딩 위치는 softmax에서 0이 되도록 가립니다
+        if mask is not None:
+            attn_energies = attn_energies.masked_fill(~mask, float('-inf'))
+        
+        # bf16 autocast에서도 softmax는 fp32로 계산합니다
+        return F.softmax(attn_energies, dim=2, dtype=torch.float)
+
+class AdaptiveSoftmaxHead(nn.Module):
+    # 코퍼스 토큰 빈도 순서로 vocab을 [0, cutoffs[0]), [cutoffs[0], cutoffs[1]), ... 클러스터로 나눈 adaptive softmax 출력층
+    # 자주 나오는 토큰(head)만 hidden_size 전체로 계산하고, 드문 토큰(tail)은 줄인 차원으로 필요할 때만 계산합니다
+    #   token_counts : [voc.num_words] 토큰 id별 등장 횟수 (PairStore.targetTokenCounts)
+    # nn.AdaptiveLogSoftmaxWithLoss는 빈도 순위로 정렬된 id를 받으므로 토큰 id <-> 순위 변환표를 버퍼로 저장합니다
+    def __init__(self, hidden_size, token_counts, cutoffs=(2000, 10000), div_value=4.0):
+        super(AdaptiveSoftmaxHead, self).__init__()
+        token_counts = torch.as_tensor(token_counts)
+        n_tokens = len(token_counts)
+        cutoffs = [c for c in cutoffs if 0 < c < n_tokens]
+        if not cutoffs:
+            raise ValueError('adaptive softmax needs a cutoff below the vocabulary size ({}).'.format(n_tokens))
+        order = torch.sort(-token_counts.long(), stable=True)[1] # order[순위] = 토큰 id
+        rank = torch.empty_like(order)
+        rank[order] = torch.arange(n_tokens)
+        self.register_buffer('order', order)
+        self.register_buffer('rank', rank) # rank[토큰 id] = 순위
+        self.adaptive = nn.AdaptiveLogSoftmaxWithLoss(hidden_size, n_tokens, cutoffs, div_value=div_value)
+
+    # 클러스터별 log_softmax가 bf16이 되지 않도록 autocast를 끄고 fp32로 계산합니다
+    def nll(self, features, target):
+        # features : [..., hidden_size], target : [...] -> 토큰별 -log p(target) [...]
+        with torch.autocast(device_type=features.device.type, enabled=False):
+            output = self.adaptive(features.reshape(-1, features.size(-1)).float(), self.rank[target.reshape(-1)]).output
+        return -output.view(target.shape)
+
+    def forward(self, features):
+        # 전체 vocab에 대한 log 확률 [..., voc.num_words] (토큰 id 순서). 정규화된 logits로 그대로 쓸 수 있습니다
+        with torch.autocast(device_type=features.device.type, enabled=False):
+            log_probs = self.adaptive.log_prob(features.reshape(-1, features.size(-1)).float())
+        return log_probs[:, self.rank].view(features.shape[:-1] + (-1,))
+
+    def predict(self, features):
+        # 탐욕적 디코딩용 : features [batch_size, hidden_size] -> (가장 확률 높은 토큰 id, 그 확률) [batch_size]
+        # 전체 vocab의 log 확률을 만들지 않고 head에서 고른 토큰이 tail 클러스터일 때만 그 클러스터를 계산합니다
+        with torch.autocast(device_type=features.device.type, enabled=False):
+            tokens = self.order[self.adaptive.predict(features.float())]
+        return tokens, torch.exp(-self.nll(features, tokens))
+
+class LuongAttnDecoderRNN(nn.Module):
+    # out : 출력층 (None이면 nn.Linear(hidden_size, output_size), AdaptiveSoftmaxHead를 넘길 수 있습니다)
+    # tie_embedding : 출력층 가중치를 임베딩 가중치와 같은 파라미터로 씁니다 ([output_size, hidden_size]로 크기가 같음)
+    def __init__(self, attn_model, embedding, hidden_size, output_size, n_layers=1, dropout=0.1, out=None,
+                 tie_embedding=False):
+        super(LuongAttnDecoderRNN, self).__init__()
+
+        # 참조를 보존해 둡니다
+        self.attn_model = attn_model
+        self.hidden_size = hidden_size
+        self.output_size = output_size
+        self.n_layers = n_layers
+        self.dropout = dropout
+
+        # 레이어를 정의합니다
+        self.embedding = embedding
+        self.embedding_dropout = nn.Dropout(dropout)
+        self.gru = nn.GRU(hidden_size, hidden_size, n_layers, dropout=(0 if n_layers == 1 else dropout))
+        self.concat = nn.Linear(hidden_size * 2, hidden_size)
+        self.out = nn.Linear(hidden_size, output_size) if out is None else out
+        if tie_embedding:
+            if not isinstance(self.out, nn.Linear) or self.out.weight.shape != embedding.weight.shape:
+                raise ValueError('tie_embedding needs a linear output layer of the embedding size.')
+            self.out.weight = embedding.weight
+
+        self.attn = Attn(attn_model, hidden_size)
+
+    def forward(self, input_step, last_hidden, encoder_outputs, attn_keys=None):
+        # output : 각 단어가 디코딩된 시퀀스에서 다음 단어로 사용되었을 때의 점수(logits, softmax 전).
+        # shape=(batch_size, voc.num_words), 확률이 필요하면 F.softmax(output, dim=1)
+        concat_output, hidden = self.forwardStep(input_step, last_hidden, encoder_outputs, attn_keys)
+        return self.out(concat_output), hidden
+
+    def forwardStep(self, input_step, last_hidden, encoder_outputs, attn_keys=None):
+        # 주의: 한 단위 시간에 대해 한 단계(단어)만을 수행합니다. 반환값은 출력층 직전 값 [batch_size, hidden_size]
+        # attn_keys : self.attn.precompute(encoder_outputs, lengths)로 문장마다 한 번 계산해 둔 attention key/패딩 마스크
+        # 현재의 입력 단어에 대한 임베딩을 구합니다   
+        #print(input_step)
+        embedded = self.embedding(input_step) # input_step : 입력 시퀀스 배치에 대한 한 단위 시간(한 단어). shape=(1, batch_size)
+        embedded = self.embedding_dropout(embedded)
+        #print(embedded.shape)
+        # print(embedded.shape) : torch.Size([1, 64, 500])
+        
+        # 양방향x
+        # last_hidden : GRU의 마지막 은닉 레이어. shape=(n_layers * num_directions, batch_size, hidden_size)
+        # print(last_hidden.shape) : torch.Size([2, 64, 500]) 
+        rnn_output, hidden = self.gru(embedded, last_hidden) 
+        # print(rnn_output.shape) : torch.Size([1, 64, 500])
+        # print(hidden.shape) : torch.Size([2, 64, 500])
+
+        # attention 가중치
+        attn_weights = self.attn(rnn_output, encoder_outputs, attn_keys) # encoder_outputs : 인코더 모델 출력 shape=(max_length, batch_size, hidden_size)
+        # print(attn_weights.shape) : torch.Size([64, 1, 10]) 
+
+        # 인코더 출력에 어텐션을 곱하여 새로운 context vector생성
+        context = attn_weights.bmm(encoder_outputs.transpose(0, 1))
+        # print(context.shape) : torch.Size([64, 1, 500])
+
+        rnn_output = rnn_output.squeeze(0) # print(rnn_output.shape) : torch.Size([64, 500])
+        context = context.squeeze(1) # print(context.shape) : torch.Size([64, 500])
+        concat_input = torch.cat((rnn_output, context), 1) # print(concat_input.shape) : torch.Size([64, 1000])
+        concat_output = torch.tanh(self.concat(concat_input))
+        # print(concat_output.shape) : torch.Size([64, 500])
+
+        return concat_output, hidden
+
+    def forwardSequence(self, input_seq, last_hidden, encoder_outputs, attn_keys=None):
+        # teacher forcing 학습용 : 디코더 입력 전체(SOS + 정답을 한 칸 민 것)를 한 번에 처리합니다
+        # input_seq : [tgt_len, batch_size] -> output : 출력층 직전 값 [tgt_len, batch_size, hidden_size]
+        # (손실은 nllLoss(output, target)으로 구합니다. [tgt_len, batch_size, voc.num_words] logits를 만들 필요가 없는
+        #  AdaptiveSoftmaxHead는 정답 토큰이 속한 클러스터만 계산합니다)
+        # GRU는 시퀀스 전체를 한 번에 돌리고, attention은 모든 단계에 대해 bmm 한 번으로 계산합니다
+        embedded = self.embedding_dropout(self.embedding(input_seq))
+        rnn_output, hidden = self.gru(embedded, last_hidden) # rnn_output : [tgt_len, batch_size, hidden_size]
+
+        attn_weights = self.attn(rnn_output, encoder_outputs, attn_keys) # [batch_size, tgt_len, max_length]
+        context = attn_weights.bmm(encoder_outputs.transpose(0, 1)).transpose(0, 1) # [tgt_len, batch_size, hidden_size]
+
+        concat_output = torch.tanh(self.concat(torch.cat((rnn_output, context), 2)))
+        return concat_output, hidden
+
+    def predict(self, output):
+        # output : forwardStep의 출력층 직전 값 -> (가장 가능성 높은 토큰, 그 softmax 점수) [batch_size] (fp32)
+        # AdaptiveSoftmaxHead는 전체 vocab의 log 확률 대신 AdaptiveSoftmaxHead.predict를 씁니다
+        if isinstance(self.out, AdaptiveSoftmaxHead):
+            return self.out.predict(output)
+        logits = self.out(output).float()
+        # softmax 전체 대신 logsumexp 한 번
+        scores, tokens = torch.max(logits, dim=1)
+        return tokens, torch.exp(scores - torch.logsumexp(logits, dim=1))
+
+    def nllLoss(self, output, target):
+        # output : forwardSequence의 출력층 직전 값, target : [tgt_len, batch_size] -> 토큰별 NLL [tgt_len, batch_size]
+        if isinstance(self.out, AdaptiveSoftmaxHead):
+            return self.out.nll(output, target)
+        logits = self.out(output).float() # bf16 autocast에서도 loss는 fp32
+        return F.cross_entropy(logits.view(-1, logits.size(-1)), target.view(-1), reduction='none').view(target.shape)
+
+def autocast(device, precision='fp32'):
+    # precision : 'fp32' (autocast 없음) 또는 'bf16' (Linear/bmm/BERT는 bfloat16으로 계산, GRU는 CPU에서 fp32 그대로)
+    # 파라미터와 optimizer 상태는 항상 fp32이므로 checkpoint는 precision과 관계없습니다
+    if precision not in ['fp32', 'bf16']:
+        raise ValueError(precision, "is not an appropriate precision.")
+    return torch.autocast(device_type=torch.device(device).type, dtype=torch.bfloat16, enabled=precision == 'bf16')
+
+def moduleDevice(module):
+    # 파라미터가 있는 장치. 동적 양자화된 모듈은 가중치가 파라미터가 아니라서 (packed params) CPU로 봅니다
+    for tensor in module.parameters():
+        return tensor.device
+    return torch.device('cpu')
+
+
+def initEmbedding(embedding, word_embeddings, token_ids=None):
+    # 공유 임베딩을 BERT word embedding(bert_model.embeddings.word_embeddings)으로 초기화합니다
+    # token_ids : 압축 단어집합(Voc.token_ids)이면 해당 BERT id의 행만 가져옵니다
+    if embedding.embedding_dim != word_embeddings.embedding_dim:
+        raise ValueError('hidden_size {} does not match the BERT embedding size {}.'.format(
+            embedding.embedding_dim, word_embeddings.embedding_dim))
+    weight = word_embeddings.weight.detach()
+    if token_ids is not None:
+        weight = weight[torch.as_tensor(token_ids, device=weight.device)]
+    with torch.no_grad():
+        embedding.weight.copy_(weight)
+    return embedding
+
+def maskNLLLossSequence(crossEntropy, mask):
+    # crossEntropy : LuongAttnDecoderRNN.nllLoss의 토큰별 NLL, mask : [tgt_len, batch_size]
+    # loss는 단계별 마스크 NLL 평균의 합(benchmarks/bench_teacher_forcing.py의 maskNLLLoss)과 같고, 두 번째 값은 마스크된 전체 토큰의 평균 NLL(출력용, 텐서)입니다
+    crossEntropy = crossEntropy.masked_fill(~mask, 0)
+    nTotals = mask.sum(1)
+    loss = (crossEntropy.sum(1) / nTotals).sum()
+    return loss, crossEntropy.sum() / nTotals.sum()
+
+# 탐욕적 디코딩(Greedy decoding) : 각 단계에 대해 단순히 decoder_output 에서 가장 높은 softmax값을 갖는 단어를 선택하는 방식
+# 여러 문장을 한 배치로 디코딩합니다. eos_token을 낸 문장은 끝난 것으로 표시하고(이후 토큰은 pad_token, 점수는 0)
+# 모든 문장이 끝나면 max_length 전에 멈춥니다
+class GreedySearchDecoder(nn.Module):
+    def __init__(self, encoder, decoder, sos_token, eos_token=None, pad_token=0, precision='fp32'):
+        super(GreedySearchDecoder, self).__init__()
+        self.encoder = encoder
+        self.decoder = decoder
+        self.sos_token = sos_token # 디코더의 처음 입력 (CLS_token)
+        self.eos_token = eos_token # 문장 끝 (SEP_token), None이면 항상 max_length 단계
+        self.pad_token = pad_token
+        self.precision = precision # 'bf16'이면 인코더/디코더를 bf16 autocast로 실행합니다 (점수는 fp32)
+
+    def steps(self, input_seq, input_length, max_length, session=None):
+        # input_seq : [max_len, batch_size] (길이 내림차순), input_length : [batch_size]
+        # 디코더 한 단계마다 (tokens, scores) [batch_size]를 내놓는 generator (이미 끝난 문장은 pad_token, 0)
+        # forward는 이것을 모아 텐서로 만들고, stream은 토큰이 나오는 대로 바로 넘겨줍니다
+        # session : 여러 턴 대화 상태 (session_store.SessionState, batch_size 1). 이전 턴의 마지막 디코더 hidden으로
+        #   인코더를 시작하고, 이번 턴의 인코더 출력을 session.context 뒤에 붙여 지금까지의 모든 턴에 attention합니다
+        #   새 context/hidden은 session.next_context/next_hidden에 두고, 턴이 끝나면 SessionStore.put(SessionState.commit)에서 반영합니다
+        device = input_seq.device
+        batch_size = input_seq.size(1)
+
+        # EncoderRNN의 forward부분 실행
+        with autocast(device, self.precision):
+            encoder_outputs, encoder_hidden = self.encoder(input_seq, input_length, self.sessionHidden(session))
+        #print('outputs : ', encoder_outputs.shape)
+        #print('hidden : ', encoder_hidden.shape)
+               
+        # encoder의 마지막 hidden이 decoder의 처음 hidden
+        decoder_hidden = encoder_hidden[:self.decoder.n_layers]
+        #print('decoder_hidden : ', decoder_hidden.shape)
+
+        if session is not None:
+            if session.context is not None:
+                encoder_outputs = torch.cat((session.context, encoder_outputs), 0)
+                input_length = torch.full_like(input_length, encoder_outputs.size(0))
+            session.next_context = encoder_outputs
+            session.next_hidden = None
+
+        # attention key는 문장마다 한 번만 계산합니다
+        with autocast(device, self.precision):
+            attn_keys = self.decoder.attn.precompute(encoder_outputs, input_length)
+        
+        # decoder의 처음입력을 SOS로 초기화
+        decoder_input = torch.full((1, batch_size), self.sos_token, device=device, dtype=torch.long)
+        #print('decoder_input : ', decoder_input)
+        
+        finished = torch.zeros(batch_size, device=device, dtype=torch.bool)
+        for _ in range(max_length):
+            # LuongAttnDecoderRNN의 한 단계 실행 (autocast는 yield를 넘기지 않도록 단계마다 켭니다)
+            # 가장 가능성 높은 단어 토큰과 그 softmax 점수를 구합니다 (LuongAttnDecoderRNN.predict, adaptive 출력층은 predict 경로)
+            with autocast(device, self.precision):
+                decoder_output, decoder_hidden = self.decoder.forwardStep(decoder_input, decoder_hidden, encoder_outputs, attn_keys)
+                tokens, decoder_scores = self.decoder.predict(decoder_output)
+            #print('decoder_hidden : ', decoder_hidden.shape)
+
+            # 이미 끝난 문장은 기록하지 않습니다
+            if session is not None:
+                session.next_hidden = decoder_hidden
+            yield tokens.masked_fill(finished, self.pad_token), decoder_scores.masked_fill(finished, 0)
+
+            if self.eos_token is not None:
+                finished |= tokens == self.eos_token
+                if bool(finished.all()):
+                    return
+
+            # 현재의 토큰을 디코더의 다음 입력으로 준비시킵니다(차원을 증가시켜서)
+            decoder_input = tokens.unsqueeze(0)
+
+    def sessionHidden(self, session):
+        # 이전 턴의 마지막 디코더 hidden [n_layers, 1, hidden] -> 양방향 GRU 인코더의 처음 hidden [n_layers * 2, 1, hidden]
+        # (층마다 정방향/역방향에 같은 값). 인코더 층 수가 다르거나 BertBridge를 쓰면 None (context만 이어집니다)
+        rnn_encoder = getattr(self.encoder, 'rnn_encoder', self.encoder)
+        if session is None or session.hidden is None or getattr(rnn_encoder, 'n_layers', None) != session.hidden.size(0):
+            return None
+        return session.hidden.repeat_interleave(2, dim=0)
+
+    def forward(self, input_seq, input_length, max_length):
+        # 반환값 : all_tokens, all_scores [batch_size, 실행한 단계 수 <= max_length]
+        # 디코더가 단어를 써 넣을 텐서를 미리 만들어 둡니다 (단계마다 torch.cat 하지 않음)
+        batch_size = input_seq.size(1)
+        all_tokens = torch.full((batch_size, max_length), self.pad_token, device=input_seq.device, dtype=torch.long)
+        all_scores = torch.zeros((batch_size, max_length), device=input_seq.device)
+
+        n_steps = 0
+        for tokens, scores in self.steps(input_seq, input_length, max_length):
+            all_tokens[:, n_steps] = tokens
+            all_scores[:, n_steps] = scores
+            n_steps += 1
+
+        return all_tokens[:, :n_steps], all_scores[:, :n_steps]
+
+    def decodeBatch(self, indexes_batch, max_length):
+        # indexes_batch : 문장별 토큰 id 리스트. 한 번만 패딩/길이순 정렬해서 forward를 실행하고
+        # 원래 순서대로 (토큰 id 리스트, 점수 리스트)를 돌려줍니다 (eos_token까지 포함)
+        device = moduleDevice(self.decoder)
+        order = sorted(range(len(indexes_batch)), key=lambda i: -len(indexes_batch[i]))
+        lengths = torch.tensor([len(indexes_batch[i]) for i in order])
+        input_seq = torch.full((int(lengths[0]), len(order)), self.pad_token, dtype=torch.long)
+        for b, i in enumerate(order):
+            input_seq[:len(indexes_batch[i]), b] = torch.as_tensor(indexes_batch[i])
+
+        with torch.no_grad():
+            all_tokens, all_scores = self(input_seq.to(device), lengths.to(device), max_length)
+        all_tokens, all_scores = all_tokens.tolist(), all_scores.tolist()
+
+        results = [None] * len(order)
+        for b, i in enumerate(order):
+            tokens = all_tokens[b]
+            end = tokens.index(self.eos_token) + 1 if self.eos_token in tokens else len(tokens)
+            results[i] = (tokens[:end], all_scores[b][:end])
+        return results
+
+    @torch.no_grad()
+    def stream(self, indexes, max_length, session=None):
+        # indexes : 문장 하나의 토큰 id 리스트. 응답 토큰을 디코더가 만드는 대로 (토큰 id, 점수)로 하나씩 내놓습니다
+        # (eos_token까지 포함). 중간에 generator를 닫으면 남은 단계는 실행하지 않습니다
+        # session : 여러 턴 대화 상태 (steps 참고). 다 쓴 뒤 SessionStore.put으로 다시 저장합니다
+        device = moduleDevice(self.decoder)
+        input_seq = torch.as_tensor(indexes, dtype=torch.long).unsqueeze(1)
+        input_length = torch.tensor([len(indexes)])
+        for tokens, scores in self.steps(input_seq.to(device), input_length.to(device), max_length, session):
+            yield int(tokens[0]), float(scores[0])
+
+
+# 빔 탐색(Beam search) : 문장마다 점수(log 확률 합)가 가장 높은 beam_size개의 후보를 유지합니다
+# 배치의 모든 문장의 모든 후보를 [batch_size * beam_size] 하나의 디코더 상태로 펼쳐서 단계마다 디코더를 한 번만 실행하고,
+# 살아남은 후보의 GRU 은닉 상태/지금까지의 토큰은 index_select로 다시 줄 세웁니다
+# 마지막에는 길이 정규화 점수 (log 확률 합 / 길이 ** length_penalty)가 가장 높은 후보를 고릅니다
+# GreedySearchDecoder와 같은 forward/decodeBatch 인터페이스입니다 (beam_size=1이면 탐욕적 디코딩과 같음)
+class BeamSearchDecoder(GreedySearchDecoder):
+    def __init__(self, encoder, decoder, sos_token, eos_token=None, pad_token=0, beam_size=4, length_penalty=1.0,
+                 precision='fp32'):
+        super(BeamSearchDecoder, self).__init__(encoder, decoder, sos_token, eos_token, pad_token, precision)
+        self.beam_size = beam_size
+        self.length_penalty = length_penalty
+
+    def forward(self, input_seq, input_length, max_length):
+        device = input_seq.device
+        batch_size = input_seq.size(1)
+        K = self.beam_size
+
+        with autocast(device, self.precision):
+            encoder_outputs, encoder_hidden = self.encoder(input_seq, input_length)
+
+        # 문장 b의 후보들은 b * K ... b * K + K - 1 번째 줄에 있습니다
+        expand = torch.arange(batch_size, device=device).repeat_interleave(K)
+        encoder_outputs = encoder_outputs.index_select(1, expand)
+        decoder_hidden = encoder_hidden[:self.decoder.n_layers].index_select(1, expand)
+        with autocast(device, self.precision):
+            attn_keys = self.decoder.attn.precompute(encoder_outputs, input_length.to(device).index_select(0, expand))
+
+        decoder_input = torch.full((1, batch_size * K), self.sos_token, device=device, dtype=torch.long)
+        # 처음에는 후보가 하나뿐이므로 나머지 후보의 점수를 -inf로 둡니다
+        beam_scores = torch.full((batch_size, K), float('-inf'), device=device)
+        beam_scores[:, 0] = 0
+        all_tokens = torch.full((batch_size * K, max_length), self.pad_token, device=device, dtype=torch.long)
+        all_scores = torch.zeros((batch_size * K, max_length), device=device)
+        finished = torch.zeros(batch_size * K, device=device, dtype=torch.bool)
+        lengths = torch.zeros(batch_size * K, device=device)
+        beam_base = (torch.arange(batch_size, device=device) * K)[:, None]
+
+        n_steps = 0
+        while n_steps < max_length:
+            with autocast(device, self.precision):
+                decoder_output, decoder_hidden = self.decoder(decoder_input, decoder_hidden, encoder_outputs, attn_keys)
+            log_probs = F.log_softmax(decoder_output.float(), dim=1) # [batch_size * K, voc.num_words]
+            n_words = log_probs.size(1)
+
+            # 끝난 후보는 점수를 바꾸지 않는 pad_token 하나로만 이어집니다
+            ended = torch.full_like(log_probs[0], float('-inf'))
+            ended[self.pad_token] = 0
+            log_probs = torch.where(finished[:, None], ended, log_probs)
+
+            candidates = (beam_scores.view(-1, 1) + log_probs).view(batch_size, K * n_words)
+            beam_scores, index = candidates.topk(K, dim=1)
+            source = (beam_base + index // n_words).view(-1) # 이어 갈 후보의 줄 번호
+            tokens = (index % n_words).view(-1)
+
+            decoder_hidden = decoder_hidden.index_select(1, source)
+            all_tokens = all_tokens.index_select(0, source)
+            all_scores = all_scores.index_select(0, source)
+            was_finished = finished.index_select(0, source)
+            all_tokens[:, n_steps] = tokens
+            all_scores[:, n_steps] = log_probs.index_select(0, source).gather(1, tokens[:, None]).squeeze(1).exp()
+            lengths = lengths.index_select(0, source) + (~was_finished).float()
+            n_steps += 1
+
+            if self.eos_token is not None:
+                finished = was_finished | (tokens == self.eos_token)
+                if bool(finished.all()):
+                    break
+
+            decoder_input = tokens.unsqueeze(0)
+
+        # 길이 정규화 점수가 가장 높은 후보를 고릅니다
+        normalized = beam_scores / lengths.view(batch_size, K).clamp(min=1) ** self.length_penalty
+        best = beam_base.view(-1) + normalized.argmax(dim=1)
+        return all_tokens[best, :n_steps], all_scores[best, :n_steps]
+
+    def stream(self, indexes, max_length, session=None):
+        # 가장 좋은 후보는 끝까지 디코딩해야 정해지므로 응답 전체를 만든 뒤 토큰을 차례로 내놓습니다
+        # (첫 토큰까지의 시간 = 전체 시간)
+        if session is not None:
+            raise ValueError('Multi-turn sessions are only supported by GreedySearchDecoder.')
+        tokens, scores = self.decodeBatch([indexes], max_length)[0]
+        for token, score in zip(tokens, scores):
+            yield token, score
+
+
+class BertBridge(nn.Module):
+    # BERT의 [CLS] 출력(source='cls'), pooler 출력(source='pooled') 또는 패딩을 뺀 모든 위치의 평균(source='mean')을
+    # 작은 선형 변환으로 디코더의 초기 은닉 상태 (n_layers, batch_size, hidden_size)로 바꿉니다
+    def __init__(self, bert_hidden_size, hidden_size, n_layers, source='cls', pooler=None):
+        super(BertBridge, self).__init__()
+        if source not in ['cls', 'pooled', 'mean']:
+            raise ValueError(source, 'is not an appropriate bridge source.')
+        if source == 'pooled' and pooler is None:
+            raise ValueError('source=pooled needs the BERT pooler.')
+        self.source = source
+        self.hidden_size = hidden_size
+        self.n_layers = n_layers
+        # BERT pooler는 학습하지 않으므로 하위 모듈로 등록하지 않습니다 (checkpoint/optimizer에서 제외)
+        self.__dict__['pooler'] = pooler
+        self.proj = nn.Linear(bert_hidden_size, hidden_size * n_layers)
+
+    def forward(self, encoder_outputs, input_lengths=None):
+        # encoder_outputs : BERT 출력 [max_len, batch_size, bert_hidden_size], 0번째 위치가 [CLS]
+        # input_lengths : [batch_size], source='mean'에서 패딩 위치를 뺍니다 (None이면 모든 위치)
+        cls = encoder_outputs[0]
+        if self.source == 'pooled':
+            with torch.no_grad():
+                cls = self.pooler(encoder_outputs.transpose(0, 1))
+        elif self.source == 'mean':
+            if input_lengths is None:
+                cls = encoder_outputs.mean(0)
+            else:
+                lengths = input_lengths.to(encoder_outputs.device)
+                mask = torch.arange(encoder_outputs.size(0), device=encoder_outputs.device)[:, None] < lengths[None, :]
+                cls = (encoder_outputs * mask.unsqueeze(2)).sum(0) / lengths.unsqueeze(1).to(encoder_outputs.dtype)
+        hidden = torch.tanh(self.proj(cls)) # [batch_size, n_layers * hidden_size]
+        return hidden.view(-1, self.n_layers, self.hidden_size).transpose(0, 1).contiguous()
+
+
+class BertEncoder(nn.Module):
+    # BERT 출력을 인코더 출력으로 쓰는 인코더. EncoderRNN과 같이 (outputs, hidden)을 돌려주므로
+    # train과 GreedySearchDecoder가 같은 경로를 씁니다
+    #   features : BertFeatureExtractor 또는 BertFeatureStore (encode(input_seq, input_lengths) -> [max_len, batch, hidden])
+    #   bridge : BertBridge가 주어지면 디코더 초기 은닉 상태를 BERT [CLS] 출력에서 만듭니다 (양방향 GRU 실행 없음)
+    #   rnn_encoder : bridge 대신 EncoderRNN의 마지막 은닉 상태를 씁니다 (기존 방식)
+    #   token_ids : 입력이 압축 id(Voc)일 때 압축 id -> BERT id 변환표 (Voc.token_ids)
+    def __init__(self, features, bridge=None, rnn_encoder=None, token_ids=None):
+        super(BertEncoder, self).__init__()
+        if (bridge is None) == (rnn_encoder is None):
+            raise ValueError('BertEncoder needs exactly one of bridge or rnn_encoder.')
+        # 고정된 BERT는 하위 모듈로 등록하지 않습니다 (checkpoint/optimizer에서 제외)
+        self.__dict__['features'] = features
+        self.bridge = bridge
+        self.rnn_encoder = rnn_encoder
+        # 변환표는 voc_dict에 이미 저장되므로 state_dict에는 넣지 않습니다
+        self.register_buffer('token_ids', None if token_ids is None else torch.as_tensor(token_ids), persistent=False)
+
+    def forward(self, input_seq, input_lengths, hidden=None):
+        bert_input = input_seq if self.token_ids is None else self.token_ids[input_seq]
+        outputs = self.features.encode(bert_input, input_lengths)
+        if self.bridge is not None:
+            hidden = self.bridge(outputs, input_lengths)
+        else:
+            hidden = self.rnn_encoder(input_seq, input_lengths, hidden)[1]
+        return outputs, hidden
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 여러 턴 대화 상태 저장소
+# 세션마다 지금까지의 인코더 출력(context)과 마지막 디코더 hidden을 저장해서, 새 턴에서는 새 문장만 인코딩하고
+# context 뒤에 붙입니다 (GreedySearchDecoder.stream(..., session=...))
+# 마지막 사용 후 ttl초가 지난 세션은 지우고, 전체 텐서 크기가 max_bytes를 넘으면 가장 오래 안 쓴 세션부터 지웁니다
+
+import collections
+import time
+
+
+class SessionState:
+    def __init__(self):
+        self.context = None # [지금까지의 토큰 수, 1, hidden_size] 인코더 출력
+        self.hidden = None # [decoder_n_layers, 1, hidden_size] 마지막 디코더 hidden
+        self.n_turns = 0
+        # 디코딩 중인 턴의 새 context/hidden (GreedySearchDecoder.steps가 채우고 commit에서 반영합니다)
+        # 턴이 중간에 실패하면 반영되지 않으므로 저장된 상태는 그대로입니다
+        self.next_context = None
+        self.next_hidden = None
+
+    def commit(self):
+        # 끝난 턴의 context/hidden을 반영합니다
+        if self.next_context is not None:
+            self.context = self.next_context
+            self.hidden = self.next_hidden
+            self.n_turns += 1
+        self.next_context = None
+        self.next_hidden = None
+
+    def nbytes(self):
+        return sum(t.numel() * t.element_size() for t in (self.context, self.hidden) if t is not None)
+
+
+class SessionStore:
+    def __init__(self, max_bytes=256 * 2 ** 20, ttl=30 * 60, max_context=None, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_context = max_context # context에 남길 최대 토큰 수 (None이면 제한 없음, 오래된 턴부터 버림)
+        self.clock = clock
+        self.sessions = collections.OrderedDict() # session_id -> (SessionState, nbytes, 마지막 사용 시각), LRU 순서
+        self.total_bytes = 0
+        self.n_evicted = 0
+        self.n_expired = 0
+
+    def get(self, session_id):
+        # 세션 상태를 돌려줍니다 (없거나 만료되었으면 빈 상태)
+        # 마지막 사용 시각도 지금으로 바꿔서 OrderedDict 순서가 시각 순서와 같게 둡니다 (expire가 이 순서를 씁니다)
+        self.expire()
+        if session_id in self.sessions:
+            state, nbytes, _ = self.sessions.pop(session_id)
+            self.sessions[session_id] = (state, nbytes, self.clock())
+            state.next_context = None
+            state.next_hidden = None
+            return state
+        return SessionState()
+
+    def put(self, session_id, state):
+        # 턴이 끝난 뒤 부릅니다. 이번 턴의 상태를 반영하고 크기를 다시 재서 예산을 넘으면 오래 안 쓴 세션부터 지웁니다
+        state.commit()
+        if self.max_context is not None and state.context is not None and state.context.size(0) > self.max_context:
+            state.context = state.context[-self.max_context:].clone()
+        self.pop(session_id)
+        nbytes = state.nbytes()
+        self.sessions[session_id] = (state, nbytes, self.clock())
+        self.total_bytes += nbytes
+        while self.total_bytes > self.max_bytes and len(self.sessions) > 1:
+            self.pop(next(iter(self.sessions)))
+            self.n_evicted += 1
+
+    def pop(self, session_id):
+        if session_id in self.sessions:
+            self.total_bytes -= self.sessions.pop(session_id)[1]
+
+    def expire(self):
+        # OrderedDict가 마지막 사용 순서이므로 앞에서부터 만료된 세션만 지웁니다
+        now = self.clock()
+        while self.sessions:
+            session_id, (_, _, last_used) = next(iter(self.sessions.items()))
+            if now - last_used <= self.ttl:
+                break
+            self.pop(session_id)
+            self.n_expired += 1
+
+    def stats(self):
+        return {'sessions': len(self.sessions), 'bytes': self.total_bytes, 'evicted': self.n_evicted,
+                'expired': self.n_expired}
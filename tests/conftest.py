@@ -0,0 +1,42 @@
+# coding: utf-8
+
+# 테스트용 작은 토크나이저/PairStore (인터넷, transformers 없이)
+
+import pytest
+
+from pair_store import PairStore, writeStore
+from wordpiece import WordPieceTokenizer
+
+TOY_VOCAB = ['[PAD]', '[UNK]', '[CLS]', '[SEP]', '[MASK]', 'hello', 'world', 'how', 'are', 'you', '?', '.',
+             'good', '##s', 'bye', 'i', 'am', 'fine', 'thank', '##ing', 'rare']
+
+
+class ToyTokenizer(WordPieceTokenizer):
+    # Voc는 BertTokenizer처럼 id 하나도 convert_ids_to_tokens에 넘깁니다
+    def convert_ids_to_tokens(self, ids):
+        if isinstance(ids, int):
+            return self.ids_to_tokens[ids]
+        return super(ToyTokenizer, self).convert_ids_to_tokens(ids)
+
+
+TOY_PAIRS = [
+    ('hello world', 'hello'),
+    ('how are you ?', 'i am fine .'),
+    ('good bye', 'bye .'),
+    ('thanking you', 'good'),
+    ('hello', 'how are you ?'),
+    ('i am fine thank you .', 'goods'),
+    ('rare', 'hello world .'),
+]
+
+
+@pytest.fixture
+def tokenizer():
+    return ToyTokenizer(TOY_VOCAB)
+
+
+@pytest.fixture
+def store(tokenizer, tmp_path):
+    pairs = [(tokenizer.encode(q), tokenizer.encode(a)) for q, a in TOY_PAIRS]
+    writeStore(iter(pairs), str(tmp_path / 'store'))
+    return PairStore(str(tmp_path / 'store'))
@@ -0,0 +1,67 @@
+# coding: utf-8
+
+import itertools
+
+import numpy as np
+import torch
+
+from batching import BucketBatchPlan, PairCollator, RandomBatchPlan
+
+
+def listBatch2TrainData(store, index_batch, pad_token=0):
+    # PairCollator 이전의 파이썬 리스트 경로 (zeroPadding/binaryMatrix)
+    index_batch = sorted(index_batch, key=lambda i: len(store.inputIds(i)), reverse=True)
+    input_batch = [store.inputIds(i).tolist() for i in index_batch]
+    output_batch = [store.targetIds(i).tolist() for i in index_batch]
+    lengths = torch.tensor([len(indexes) for indexes in input_batch])
+    inp = torch.LongTensor(list(itertools.zip_longest(*input_batch, fillvalue=pad_token)))
+    padList = list(itertools.zip_longest(*output_batch, fillvalue=pad_token))
+    mask = torch.BoolTensor([[token != pad_token for token in row] for row in padList])
+    return inp, lengths, torch.LongTensor(padList), mask, max(len(indexes) for indexes in output_batch)
+
+
+def test_random_plan_resume():
+    # checkpoint에서 새로 만든 plan도 같은 iteration에서 같은 배치를 냅니다
+    plan = RandomBatchPlan(100, 8, seed=3)
+    batches = [plan(i) for i in range(1, 21)]
+    resumed = RandomBatchPlan(100, 8, seed=3)
+    assert [resumed(i) for i in range(11, 21)] == batches[10:]
+    assert RandomBatchPlan(100, 8, seed=4)(1) != batches[0]
+
+
+def test_bucket_plan_resume():
+    rng = np.random.default_rng(0)
+    input_lengths = rng.integers(2, 12, size=50)
+    target_lengths = rng.integers(2, 12, size=50)
+    for max_tokens in [None, 60]:
+        plan = BucketBatchPlan(input_lengths, target_lengths, 8, seed=1, max_tokens=max_tokens)
+        batches = [plan(i) for i in range(1, 41)] # 여러 epoch에 걸침
+        # 첫 epoch의 배치들은 모든 쌍을 한 번씩 씁니다
+        first_epoch = plan.epoch_starts[1] - 1
+        assert sorted(sum(batches[:first_epoch], [])) == list(range(50))
+        for start in [1, first_epoch, first_epoch + 1, 33]:
+            resumed = BucketBatchPlan(input_lengths, target_lengths, 8, seed=1, max_tokens=max_tokens)
+            assert [resumed(i) for i in range(start, 41)] == batches[start - 1:]
+        if max_tokens is not None:
+            for batch in batches:
+                assert (input_lengths[batch].max() + target_lengths[batch].max()) * len(batch) <= max_tokens or len(batch) == 1
+
+
+def test_collator_matches_list_path(store):
+    collator = PairCollator(store)
+    for index_batch in [[0, 1, 2], [3, 3, 5, 6, 4], [6], list(range(len(store)))]:
+        inp, lengths, output, mask, max_target_len = collator(index_batch)
+        l_inp, l_lengths, l_output, l_mask, l_max_target_len = listBatch2TrainData(store, index_batch)
+        assert torch.equal(inp, l_inp)
+        assert torch.equal(lengths, l_lengths)
+        assert torch.equal(output, l_output)
+        assert torch.equal(mask, l_mask)
+        assert max_target_len == l_max_target_len
+
+
+def test_collator_id_map(store):
+    id_map = np.arange(int(store.input_ids.max()) + 1)[::-1].copy()
+    inp, _, output, mask, _ = PairCollator(store, id_map=id_map)(list(range(len(store))))
+    raw_inp, _, raw_output, _, _ = PairCollator(store)(list(range(len(store))))
+    assert torch.equal(output[mask], torch.from_numpy(id_map)[raw_output[mask]])
+    assert torch.equal(inp[0], torch.from_numpy(id_map)[raw_inp[0]])
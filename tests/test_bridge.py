@@ -0,0 +1,22 @@
+# coding: utf-8
+
+import torch
+
+from seq2seq import BertBridge
+
+
+def test_mean_bridge_ignores_padding():
+    torch.manual_seed(0)
+    bridge = BertBridge(8, 4, 2, 'mean')
+    outputs = torch.randn(5, 3, 8)
+    lengths = torch.tensor([5, 3, 1])
+    hidden = bridge(outputs, lengths)
+    assert hidden.shape == (2, 3, 4)
+    # 패딩 위치의 값을 바꿔도 결과는 같습니다
+    padded = outputs.clone()
+    padded[3:, 1] = 100
+    padded[1:, 2] = -100
+    assert torch.allclose(bridge(padded, lengths), hidden)
+    for b, length in enumerate(lengths.tolist()):
+        single = bridge(outputs[:length, b:b + 1], lengths[b:b + 1])
+        assert torch.allclose(single[:, 0], hidden[:, b], atol=1e-6)
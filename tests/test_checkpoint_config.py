@@ -0,0 +1,59 @@
+import pytest
+import torch
+
+from chatbot.config import makeConfig
+from chatbot.model import applyCheckpoint
+
+
+def fakeCheckpoint(hidden_size=8, encoder_n_layers=2, decoder_n_layers=1, **saved):
+    # state_dict 모양만 맞춘 checkpoint (EncoderRNN은 양방향, attn_model='general')
+    en = {}
+    for layer in range(encoder_n_layers):
+        en['gru.weight_ih_l{}'.format(layer)] = torch.zeros(3 * hidden_size, hidden_size)
+        en['gru.weight_ih_l{}_reverse'.format(layer)] = torch.zeros(3 * hidden_size, hidden_size)
+    de = {'attn.attn.weight': torch.zeros(hidden_size, hidden_size)}
+    for layer in range(decoder_n_layers):
+        de['gru.weight_ih_l{}'.format(layer)] = torch.zeros(3 * hidden_size, hidden_size)
+    checkpoint = {'embedding': {'weight': torch.zeros(20, hidden_size)}, 'en': en, 'de': de, 'batch_seed': 3}
+    checkpoint.update(saved)
+    return checkpoint
+
+
+def test_old_checkpoint_config_is_read_from_state_dict():
+    config = applyCheckpoint(makeConfig(), fakeCheckpoint())
+    assert config['model'] == 'rnn'
+    assert (config['hidden_size'], config['attn_model']) == (8, 'general')
+    assert (config['encoder_n_layers'], config['decoder_n_layers']) == (2, 1)
+    assert (config['output_head'], config['tie_embedding'], config['batch_seed']) == ('linear', False, 3)
+
+
+def test_bert_checkpoint_without_model_flag():
+    checkpoint = fakeCheckpoint(encoder_n_layers=0, model='bert', hidden_size=16, attn_model='dot',
+                                encoder_mode='bert')
+    config = applyCheckpoint(makeConfig(), checkpoint)
+    assert (config['model'], config['encoder_mode'], config['hidden_size']) == ('bert', 'bert', 16)
+    # model='bert'의 기본값도 따라옵니다
+    assert config['n_iteration'] == 40000
+    # model을 저장하기 전의 checkpoint도 encoder_mode가 있으면 model='bert'
+    del checkpoint['model']
+    assert applyCheckpoint(makeConfig(), checkpoint)['model'] == 'bert'
+
+
+def test_explicit_value_must_match_checkpoint():
+    checkpoint = fakeCheckpoint(model='rnn')
+    with pytest.raises(ValueError):
+        applyCheckpoint(makeConfig(model='bert'), checkpoint)
+    with pytest.raises(ValueError):
+        applyCheckpoint(makeConfig(hidden_size=16), checkpoint)
+    assert applyCheckpoint(makeConfig(hidden_size=8, search_method='beam'), checkpoint)['hidden_size'] == 8
+
+
+def test_bert_layers_and_bridge_source_are_restored():
+    checkpoint = fakeCheckpoint(encoder_n_layers=0, model='bert', encoder_mode='bert', bert_layers=[12],
+                                bert_bridge_source='mean')
+    config = applyCheckpoint(makeConfig(), checkpoint)
+    assert (config['bert_layers'], config['bert_bridge_source']) == ([12], 'mean')
+    with pytest.raises(ValueError):
+        applyCheckpoint(makeConfig(bert_bridge_source='pooled'), checkpoint)
+    with pytest.raises(ValueError):
+        applyCheckpoint(makeConfig(bert_layers=[-1]), checkpoint)
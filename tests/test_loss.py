@@ -0,0 +1,28 @@
+# coding: utf-8
+
+import torch
+import torch.nn.functional as F
+
+from seq2seq import maskNLLLossSequence
+
+
+def stepLoss(logits, target, mask):
+    # 단계마다 마스크된 토큰의 평균 NLL을 구해 더하는 이전 방식 (비교 기준)
+    loss = 0
+    for t in range(logits.size(0)):
+        loss = loss + F.cross_entropy(logits[t], target[t], reduction='none').masked_select(mask[t]).mean()
+    return loss
+
+
+def test_sequence_loss_matches_step_losses():
+    torch.manual_seed(0)
+    tgt_len, batch_size, vocab_size = 6, 5, 11
+    logits = torch.randn(tgt_len, batch_size, vocab_size)
+    target = torch.randint(1, vocab_size, (tgt_len, batch_size))
+    lengths = torch.tensor([6, 4, 4, 2, 1])
+    mask = torch.arange(tgt_len)[:, None] < lengths[None, :]
+
+    crossEntropy = F.cross_entropy(logits.view(-1, vocab_size), target.view(-1), reduction='none').view(tgt_len, batch_size)
+    loss, mean_loss = maskNLLLossSequence(crossEntropy, mask)
+    assert torch.allclose(loss, stepLoss(logits, target, mask))
+    assert torch.allclose(mean_loss, crossEntropy[mask].mean())
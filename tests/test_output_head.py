@@ -0,0 +1,44 @@
+# coding: utf-8
+
+import pytest
+import torch
+import torch.nn as nn
+
+from seq2seq import AdaptiveSoftmaxHead, EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+
+
+def test_adaptive_predict_matches_full_log_prob():
+    torch.manual_seed(0)
+    counts = torch.randint(0, 100, (50,))
+    head = AdaptiveSoftmaxHead(16, counts, (5, 20))
+    features = torch.randn(64, 16) * 3 # tail 클러스터 토큰도 고르도록 크게
+    with torch.no_grad():
+        log_probs = head(features)
+        tokens, scores = head.predict(features)
+    best, expected = log_probs.max(1)
+    assert torch.equal(tokens, expected)
+    assert torch.allclose(scores, best.exp(), atol=1e-6)
+    assert bool((head.rank[tokens] >= 5).any())
+
+
+def test_greedy_search_with_adaptive_head():
+    # GreedySearchDecoder는 adaptive 출력층의 predict 경로를 쓰고, 결과는 전체 log 확률의 argmax와 같습니다
+    torch.manual_seed(0)
+    embedding = nn.Embedding(50, 16)
+    encoder = EncoderRNN(16, embedding, 2, 0).eval()
+    head = AdaptiveSoftmaxHead(16, torch.randint(0, 100, (50,)), (5, 20))
+    decoder = LuongAttnDecoderRNN('dot', embedding, 16, 50, 2, 0, head).eval()
+    searcher = GreedySearchDecoder(encoder, decoder, 2)
+    prompt = torch.tensor([[2], [7], [9], [3]])
+    tokens, scores = searcher(prompt, torch.tensor([4]), 6)
+
+    with torch.no_grad():
+        outputs, hidden = encoder(prompt, torch.tensor([4]))
+        decoder_hidden = hidden[:decoder.n_layers]
+        decoder_input = torch.tensor([[2]])
+        for t in range(6):
+            log_probs, decoder_hidden = decoder(decoder_input, decoder_hidden, outputs)
+            best, token = log_probs.max(1)
+            assert int(tokens[0, t]) == int(token)
+            assert float(scores[0, t]) == pytest.approx(float(best.exp()), abs=1e-6)
+            decoder_input = token.unsqueeze(0)
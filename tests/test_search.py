@@ -0,0 +1,49 @@
+# coding: utf-8
+
+import pytest
+import torch
+import torch.nn as nn
+
+from seq2seq import BeamSearchDecoder, EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+
+SOS_token = 2
+EOS_token = 3
+VOCAB_SIZE = 21
+PROMPTS = [[2, 5, 6, 3], [2, 7, 8, 9, 10, 3], [2, 14, 3], [2, 15, 16, 17, 11, 12, 13, 3], [2, 7, 8, 9, 10, 3]]
+
+
+@pytest.fixture(params=['dot', 'general', 'concat'])
+def model(request):
+    torch.manual_seed(0)
+    embedding = nn.Embedding(VOCAB_SIZE, 16)
+    encoder = EncoderRNN(16, embedding, 2, 0).eval()
+    decoder = LuongAttnDecoderRNN(request.param, embedding, 16, VOCAB_SIZE, 2, 0).eval()
+    # 무작위 모델도 가끔 EOS를 내도록 EOS 출력의 bias를 올립니다 (문장마다 끝나는 단계가 달라짐)
+    with torch.no_grad():
+        decoder.out.bias[EOS_token] += 1.5
+    return encoder, decoder
+
+
+def test_decode_batch_matches_single(model):
+    searcher = GreedySearchDecoder(*model, SOS_token, EOS_token)
+    batched = searcher.decodeBatch(PROMPTS, 8)
+    for prompt, (tokens, scores) in zip(PROMPTS, batched):
+        single_tokens, single_scores = searcher.decodeBatch([prompt], 8)[0]
+        assert tokens == single_tokens
+        assert scores == pytest.approx(single_scores, abs=1e-5)
+    assert any(tokens[-1] == EOS_token for tokens, _ in batched)
+
+
+def test_stream_matches_decode_batch(model):
+    searcher = GreedySearchDecoder(*model, SOS_token, EOS_token)
+    for prompt in PROMPTS:
+        tokens, scores = searcher.decodeBatch([prompt], 8)[0]
+        streamed = list(searcher.stream(prompt, 8))
+        assert [token for token, _ in streamed] == tokens
+        assert [score for _, score in streamed] == pytest.approx(scores, abs=1e-5)
+
+
+def test_beam_size_one_matches_greedy(model):
+    greedy = GreedySearchDecoder(*model, SOS_token, EOS_token)
+    beam = BeamSearchDecoder(*model, SOS_token, EOS_token, beam_size=1)
+    assert [t for t, _ in beam.decodeBatch(PROMPTS, 8)] == [t for t, _ in greedy.decodeBatch(PROMPTS, 8)]
@@ -0,0 +1,55 @@
+# coding: utf-8
+
+import torch
+import torch.nn as nn
+
+from seq2seq import EncoderRNN, GreedySearchDecoder, LuongAttnDecoderRNN
+from session_store import SessionStore
+
+
+def makeSearcher():
+    torch.manual_seed(0)
+    embedding = nn.Embedding(21, 16)
+    encoder = EncoderRNN(16, embedding, 2, 0).eval()
+    decoder = LuongAttnDecoderRNN('dot', embedding, 16, 21, 2, 0).eval()
+    return GreedySearchDecoder(encoder, decoder, 2, 3)
+
+
+def test_turn_state_applied_on_put():
+    searcher = makeSearcher()
+    sessions = SessionStore()
+    session = sessions.get('a')
+    list(searcher.stream([2, 5, 6, 3], 5, session))
+    assert session.context is None # put 전에는 반영되지 않습니다
+    sessions.put('a', session)
+    assert session.context.size(0) == 4 and session.n_turns == 1
+    assert sessions.total_bytes == session.nbytes()
+
+    # 중간에 멈춘 턴은 저장된 상태를 바꾸지 않습니다
+    session = sessions.get('a')
+    turn = searcher.stream([2, 7, 8, 3], 5, session)
+    next(turn)
+    turn.close()
+    assert session.context.size(0) == 4 and session.n_turns == 1
+
+    session = sessions.get('a')
+    list(searcher.stream([2, 7, 8, 3], 5, session))
+    sessions.put('a', session)
+    assert session.context.size(0) == 8 and session.n_turns == 2
+    assert sessions.total_bytes == session.nbytes()
+
+
+def test_get_refreshes_last_used():
+    now = [0.0]
+    sessions = SessionStore(ttl=10, clock=lambda: now[0])
+    sessions.put('a', sessions.get('a'))
+    now[0] = 5
+    sessions.put('b', sessions.get('b'))
+    now[0] = 8
+    sessions.get('a') # put 없이 get만 (예: 알 수 없는 입력)
+    now[0] = 16
+    sessions.expire()
+    assert list(sessions.sessions) == ['a'] and sessions.n_expired == 1
+    now[0] = 19
+    sessions.expire()
+    assert len(sessions.sessions) == 0
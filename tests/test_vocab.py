@@ -0,0 +1,40 @@
+# coding: utf-8
+
+import numpy as np
+
+from vocab import Voc
+
+
+def test_build_vocab(tokenizer, store):
+    voc = Voc('test', tokenizer).buildVocab(store)
+    used = set(store.input_ids.tolist()) | set(store.target_ids.tolist())
+    assert set(voc.token_ids.tolist()) == used | set(voc.special_ids)
+    assert voc.toIndex(tokenizer.pad_token_id) == 0
+    ids = np.array(sorted(used))
+    assert (voc.toTokenIds(voc.toIndex(ids)) == ids).all()
+    # 코퍼스에 없는 토큰은 [UNK]
+    unused = tokenizer.vocab['[MASK]']
+    assert voc.toIndex(unused) == voc.toIndex(tokenizer.unk_token_id)
+    assert not voc.trimmed
+
+
+def test_build_vocab_min_count(tokenizer, store):
+    voc = Voc('test', tokenizer).buildVocab(store, min_count=2)
+    rare = tokenizer.vocab['rare']
+    assert rare not in voc.word2index
+    assert voc.toIndex(rare) == voc.toIndex(tokenizer.unk_token_id)
+    assert voc.trimmed
+    counts = np.bincount(store.target_ids, minlength=len(tokenizer.vocab))
+    compact = voc.compactCounts(counts)
+    assert compact.sum() == counts.sum()
+    assert compact[voc.toIndex(tokenizer.vocab['hello'])] == counts[tokenizer.vocab['hello']]
+
+
+def test_detokenize(tokenizer, store):
+    voc = Voc('test', tokenizer).buildVocab(store)
+    ids = tokenizer.encode('good goods thanking you .')
+    deltas = list(voc.detokenize(voc.toIndex(ids).tolist()))
+    assert deltas == ['good', ' good', 's', ' thank', 'ing', ' you', ' .']
+    assert deltas == list(tokenizer.detokenize(ids))
+    # 압축하지 않은 단어집합(BERT id 그대로)도 같습니다
+    assert list(Voc('test', tokenizer).detokenize(ids)) == deltas
@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# 코퍼스에 실제로 나오는 WordPiece id만 모은 압축 단어집합
+# 임베딩/디코더 출력층을 len(tokenizer.vocab)(30,522) 대신 num_words 크기로 만들고,
+# 토크나이저 경계에서만 id를 바꿉니다
+#   BERT id -> 압축 id : toIndex (PairCollator, evaluate 입력)
+#   압축 id -> BERT id : toTokenIds (BertEncoder의 BERT 입력, evaluate 출력)
+#   압축 id -> 글자 조각 : detokenize (응답 스트리밍)
+# Voc.__dict__가 checkpoint['voc_dict']로 저장되므로 매핑도 checkpoint에 같이 들어갑니다
+
+import numpy as np
+
+
+class Voc:
+    def __init__(self, name, tokenizer):
+        self.name = name
+        self.trimmed = False
+        self.tokenizer = tokenizer
+        self.special_ids = [tokenizer.pad_token_id, tokenizer.unk_token_id, tokenizer.cls_token_id, tokenizer.sep_token_id]
+        self.word2index = {} # BERT id -> 압축 id
+        self.word2count = {} # BERT id -> 코퍼스 등장 횟수
+        self.index2word = {i: tokenizer.convert_ids_to_tokens(i) for i in self.special_ids} # 압축 id -> WordPiece
+        self.num_words = len(tokenizer.vocab)
+        self.id_map = None # [len(tokenizer.vocab)] BERT id -> 압축 id (None이면 BERT id를 그대로 씁니다)
+        self.token_ids = None # [num_words] 압축 id -> BERT id
+
+    def buildVocab(self, pairs, min_count=1):
+        # pairs : PairStore. 질문과 응답에 나오는 토큰을 모두 셉니다 (인코더/디코더가 임베딩을 같이 씀)
+        # min_count번 미만 나온 토큰은 [UNK]로 바꿉니다. 특수 토큰([PAD]=0 포함)은 항상 남기며
+        # BERT id 순서대로 번호를 매기므로 [PAD]는 압축 id에서도 0입니다
+        n_tokens = len(self.tokenizer.vocab)
+        counts = (np.bincount(pairs.input_ids, minlength=n_tokens) +
+                  np.bincount(pairs.target_ids, minlength=n_tokens))
+        keep = counts >= max(min_count, 1)
+        keep[self.special_ids] = True
+        self.token_ids = np.flatnonzero(keep)
+        self.num_words = len(self.token_ids)
+        self.word2index = {int(b): i for i, b in enumerate(self.token_ids)}
+        self.word2count = {int(b): int(counts[b]) for b in self.token_ids}
+        self.index2word = dict(enumerate(self.tokenizer.convert_ids_to_tokens(self.token_ids.tolist())))
+        self.id_map = np.full(n_tokens, self.word2index[self.tokenizer.unk_token_id], dtype=np.int64)
+        self.id_map[self.token_ids] = np.arange(self.num_words)
+        self.trimmed = bool((counts[~keep] > 0).any())
+        return self
+
+    def loadDict(self, voc_dict):
+        # checkpoint['voc_dict']를 불러옵니다. 압축 단어집합 이전 checkpoint에는 매핑이 없으므로 BERT id를 그대로 씁니다
+        self.__init__(self.name, self.tokenizer)
+        self.__dict__.update(voc_dict)
+        return self
+
+    def toIndex(self, ids):
+        ids = np.asarray(ids, dtype=np.int64)
+        return ids if self.id_map is None else self.id_map[ids]
+
+    def toTokenIds(self, indexes):
+        indexes = np.asarray(indexes, dtype=np.int64)
+        return indexes if self.token_ids is None else self.token_ids[indexes]
+
+    def compactCounts(self, counts):
+        # BERT id별 횟수 -> 압축 id별 횟수 ([UNK]로 합쳐진 토큰은 [UNK]에 더합니다)
+        if self.id_map is None:
+            return counts
+        return np.bincount(self.id_map, weights=counts, minlength=self.num_words).astype(np.int64)
+
+    def detokenize(self, indexes):
+        # 압축 id를 하나씩 받아 화면에 덧붙일 글자 조각(delta)을 바로 내놓는 generator
+        # '##'로 시작하는 WordPiece는 앞 단어에 붙이고, 나머지는 공백 뒤에 씁니다 (토큰마다 상수 시간)
+        # [PAD], [CLS], [SEP]은 건너뜁니다
+        skip = set(self.toIndex([self.tokenizer.pad_token_id, self.tokenizer.cls_token_id,
+                                 self.tokenizer.sep_token_id]).tolist())
+        first = True
+        for index in indexes:
+            if index in skip:
+                continue
+            piece = self.index2word.get(index) if self.id_map is not None else None
+            if piece is None:
+                piece = self.tokenizer.convert_ids_to_tokens(int(self.toTokenIds(index)))
+            if piece.startswith('##') and not first:
+                yield piece[2:]
+            else:
+                yield piece if first else ' ' + piece
+            first = False
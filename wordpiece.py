@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# transformers 없이 쓰는 BERT WordPiece 토크나이저 (파이썬 표준 라이브러리만 사용)
+# BertTokenizer와 같은 규칙으로 나눕니다
+#   특수 토큰([CLS], [SEP], [MASK] ...)은 그대로 둠 -> 제어 문자 제거, 공백 문자 정리 -> 한자 앞뒤에 공백
+#   -> 공백으로 나눔 -> (do_lower_case) 소문자 + 악센트 제거 -> 구두점마다 나눔 -> 가장 긴 WordPiece부터 매칭
+# script_chat.py가 TorchScript 파일 안의 vocab.txt로 만듭니다
+
+import re
+import unicodedata
+
+
+def isWhitespace(char):
+    return char in ' \t\n\r' or unicodedata.category(char) == 'Zs'
+
+
+def isControl(char):
+    return char not in '\t\n\r' and unicodedata.category(char).startswith('C')
+
+
+def isPunctuation(char):
+    # ASCII의 문자/숫자가 아닌 기호는 유니코드 분류와 관계없이 구두점으로 봅니다 ('$', '^', '`' 등)
+    cp = ord(char)
+    if 33 <= cp <= 47 or 58 <= cp <= 64 or 91 <= cp <= 96 or 123 <= cp <= 126:
+        return True
+    return unicodedata.category(char).startswith('P')
+
+
+def isChineseChar(cp):
+    return (0x4E00 <= cp <= 0x9FFF or 0x3400 <= cp <= 0x4DBF or 0x20000 <= cp <= 0x2A6DF or 0x2A700 <= cp <= 0x2B73F or
+            0x2B740 <= cp <= 0x2B81F or 0x2B820 <= cp <= 0x2CEAF or 0xF900 <= cp <= 0xFAFF or 0x2F800 <= cp <= 0x2FA1F)
+
+
+class WordPieceTokenizer:
+    def __init__(self, vocab, do_lower_case=True, tokenize_chinese_chars=True, strip_accents=None, unk_token='[UNK]',
+                 cls_token='[CLS]', sep_token='[SEP]', pad_token='[PAD]', mask_token='[MASK]',
+                 max_input_chars_per_word=100):
+        # vocab : WordPiece 리스트 (리스트 위치가 BERT id, vocab.txt의 줄 순서)
+        self.ids_to_tokens = list(vocab)
+        self.vocab = {token: i for i, token in enumerate(self.ids_to_tokens)}
+        self.do_lower_case = do_lower_case
+        self.tokenize_chinese_chars = tokenize_chinese_chars
+        self.strip_accents = do_lower_case if strip_accents is None else strip_accents
+        self.unk_token = unk_token
+        self.max_input_chars_per_word = max_input_chars_per_word
+        self.unk_token_id = self.vocab[unk_token]
+        self.cls_token_id = self.vocab[cls_token]
+        self.sep_token_id = self.vocab[sep_token]
+        self.pad_token_id = self.vocab[pad_token]
+        self.special_tokens = [t for t in [unk_token, cls_token, sep_token, pad_token, mask_token] if t in self.vocab]
+        self.special_pattern = re.compile('(' + '|'.join(re.escape(t) for t in self.special_tokens) + ')')
+
+    @classmethod
+    def fromFile(cls, vocab_file, **kwargs):
+        with open(vocab_file, encoding='utf-8') as f:
+            return cls([line.rstrip('\n') for line in f], **kwargs)
+
+    def tokenize(self, text):
+        tokens = []
+        for i, part in enumerate(self.special_pattern.split(text)):
+            # split이 괄호로 잡은 특수 토큰은 홀수 위치에 옵니다
+            if i % 2 == 1:
+                tokens.append(part)
+                continue
+            for word in self.basicTokenize(part):
+                tokens += self.wordpiece(word)
+        return tokens
+
+    def basicTokenize(self, text):
+        text = ''.join(' ' if isWhitespace(c) else c for c in text if ord(c) not in (0, 0xFFFD) and not isControl(c))
+        if self.tokenize_chinese_chars:
+            text = ''.join(' {} '.format(c) if isChineseChar(ord(c)) else c for c in text)
+        words = []
+        for token in text.split():
+            if self.do_lower_case:
+                token = token.lower()
+            if self.strip_accents:
+                token = ''.join(c for c in unicodedata.normalize('NFD', token) if unicodedata.category(c) != 'Mn')
+            # 구두점은 한 글자씩 따로 떼어 냅니다
+            word = ''
+            for c in token:
+                if isPunctuation(c):
+                    if word:
+                        words.append(word)
+                    words.append(c)
+                    word = ''
+                else:
+                    word += c
+            if word:
+                words.append(word)
+        return words
+
+    def wordpiece(self, word):
+        # 앞에서부터 vocab에 있는 가장 긴 조각을 고릅니다. 중간에 맞는 조각이 없으면 단어 전체가 [UNK]
+        if len(word) > self.max_input_chars_per_word:
+            return [self.unk_token]
+        pieces = []
+        start = 0
+        while start < len(word):
+            end = len(word)
+            piece = None
+            while start < end:
+                candidate = word[start:end] if start == 0 else '##' + word[start:end]
+                if candidate in self.vocab:
+                    piece = candidate
+                    break
+                end -= 1
+            if piece is None:
+                return [self.unk_token]
+            pieces.append(piece)
+            start = end
+        return pieces
+
+    def convert_tokens_to_ids(self, tokens):
+        return [self.vocab.get(token, self.unk_token_id) for token in tokens]
+
+    def convert_ids_to_tokens(self, ids):
+        return [self.ids_to_tokens[i] for i in ids]
+
+    def encode(self, text):
+        # BertTokenizer.encode와 같이 [CLS] ... [SEP]
+        return [self.cls_token_id] + self.convert_tokens_to_ids(self.tokenize(text)) + [self.sep_token_id]
+
+    def detokenize(self, ids):
+        # Voc.detokenize와 같은 규칙으로 BERT id를 하나씩 받아 글자 조각(delta)을 내놓는 generator
+        skip = {self.pad_token_id, self.cls_token_id, self.sep_token_id}
+        first = True
+        for i in ids:
+            if i in skip:
+                continue
+            piece = self.ids_to_tokens[i]
+            if piece.startswith('##') and not first:
+                yield piece[2:]
+            else:
+                yield piece if first else ' ' + piece
+            first = False